@@ -0,0 +1,79 @@
+"""
+The configuration request paths: `endpoints.manifest`, served from its cache,
+revalidated with `If-None-Match` and rebuilt, and `endpoints.install`
+registering the app's webhooks in the stub Saleor.
+"""
+import json
+
+import pytest
+from conftest import asgi_request, get_webhook_details, make_app
+
+from saleor_app.deps import SALEOR_DOMAIN_HEADER
+from saleor_app.schemas.handlers import SaleorEventType
+
+
+async def product_updated():
+    return {}
+
+
+@pytest.fixture
+def manifest_app():
+    return make_app()
+
+
+def test_manifest(measure, manifest_app):
+    async def get_manifest():
+        status, _ = await asgi_request(manifest_app, "GET", "/configuration/manifest")
+        assert status == 200, status
+
+    measure(get_manifest, rounds=2000)
+
+
+def test_manifest_not_modified(measure, loop, manifest_app):
+    loop.run_until_complete(
+        asgi_request(manifest_app, "GET", "/configuration/manifest")
+    )
+    _, etag = manifest_app.manifest_cache.get("http://app.local/")
+
+    async def revalidate_manifest():
+        status, _ = await asgi_request(
+            manifest_app, "GET", "/configuration/manifest", {"if-none-match": etag}
+        )
+        assert status == 304, status
+
+    measure(revalidate_manifest, rounds=2000)
+
+
+def test_manifest_uncached(measure, manifest_app):
+    async def build_manifest():
+        manifest_app.manifest_cache.clear()
+        status, _ = await asgi_request(manifest_app, "GET", "/configuration/manifest")
+        assert status == 200, status
+
+    measure(build_manifest, rounds=1000)
+
+
+@pytest.mark.parametrize("events", (1, 10))
+def test_install(measure, loop, stub_saleor, events):
+    app = make_app(use_insecure_saleor_http=True)
+    app.include_webhook_router(get_webhook_details)
+    for event_type in list(SaleorEventType)[:events]:
+        # A subscription per event gets every event a webhook of its own
+        app.webhook_router.http_event_route(
+            event_type,
+            subscription_query=f"subscription {{ event {{ ... on {event_type} }} }}",
+        )(product_updated)
+    body = json.dumps({"auth_token": "app-token"}).encode("utf-8")
+    headers = {
+        SALEOR_DOMAIN_HEADER: stub_saleor.domain,
+        "content-type": "application/json",
+    }
+
+    async def install():
+        status, _ = await asgi_request(
+            app, "POST", "/configuration/install", headers, body
+        )
+        assert status == 200, status
+
+    measure(install, rounds=200)
+    loop.run_until_complete(app.router.shutdown())
@@ -0,0 +1,80 @@
+"""
+`SaleorClient` round trips to the stub Saleor GraphQL server: single
+operations, batches, pagination and streamed responses.
+"""
+import pytest
+from conftest import MANIFEST
+
+from saleor_app.saleor.client import SaleorSessionPool
+from saleor_app.saleor.utils import get_client_for_app
+
+PRODUCTS = """
+query Products($first: Int!, $after: String) {
+  products(first: $first, after: $after) {
+    edges {
+      cursor
+      node {
+        id
+        name
+      }
+    }
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+  }
+}
+"""
+
+
+@pytest.fixture
+def saleor_client(loop, stub_saleor):
+    session_pool = SaleorSessionPool()
+
+    async def make_client():
+        # aiohttp sessions belong to the loop they are created in
+        return get_client_for_app(
+            stub_saleor.url, manifest=MANIFEST, session_pool=session_pool
+        )
+
+    yield loop.run_until_complete(make_client())
+    loop.run_until_complete(session_pool.close())
+
+
+@pytest.mark.parametrize("size", (1, 100))
+def test_execute(measure, saleor_client, size):
+    async def execute():
+        await saleor_client.execute(PRODUCTS, {"first": size})
+
+    measure(execute, rounds=500)
+
+
+def test_execute_many(measure, saleor_client):
+    operations = [(PRODUCTS, {"first": 1})] * 50
+
+    async def execute_many():
+        await saleor_client.execute_many(operations)
+
+    measure(execute_many, rounds=200)
+
+
+def test_paginate(measure, saleor_client):
+    async def paginate():
+        count = 0
+        async for _ in saleor_client.paginate(PRODUCTS, path="products"):
+            count += 1
+        assert count == 1000
+
+    measure(paginate, rounds=50)
+
+
+def test_execute_stream(measure, saleor_client):
+    async def execute_stream():
+        count = 0
+        async for _ in saleor_client.execute_stream(
+            PRODUCTS, {"first": 1000}, path="products.edges"
+        ):
+            count += 1
+        assert count == 1000
+
+    measure(execute_stream, rounds=50)
@@ -0,0 +1,56 @@
+"""
+Looking up the webhook details with each tenant store, with and without the
+read-through cache. Each round is `LOOKUPS` lookups spread over `TENANTS`
+tenants by `CONCURRENCY` concurrent tasks.
+"""
+import asyncio
+
+import pytest
+
+from saleor_app.schemas.core import WebhookData
+from saleor_app.stores.base import CachedTenantStore
+from saleor_app.stores.memory import InMemoryTenantStore
+from saleor_app.stores.sqlite import SQLiteTenantStore
+
+LOOKUPS = 1_000
+TENANTS = 1_000
+CONCURRENCY = 50
+
+DOMAINS = [f"saleor-{i}.local" for i in range(TENANTS)]
+
+
+@pytest.fixture(params=["in-memory", "sqlite", "cached sqlite"])
+def tenant_store(request, loop, tmp_path):
+    database = str(tmp_path / "tenants.sqlite3")
+    store = {
+        "in-memory": lambda: InMemoryTenantStore(),
+        "sqlite": lambda: SQLiteTenantStore(database),
+        "cached sqlite": lambda: CachedTenantStore(SQLiteTenantStore(database)),
+    }[request.param]()
+
+    async def save_tenants():
+        for domain in DOMAINS:
+            await store.save_app_data(
+                domain,
+                "token",
+                WebhookData(webhook_id="webhook", webhook_secret_key="secret"),
+            )
+
+    loop.run_until_complete(save_tenants())
+    yield store
+    close = getattr(getattr(store, "store", store), "close", None)
+    if close is not None:
+        loop.run_until_complete(close())
+
+
+def test_get_webhook_details(benchmark, loop, tenant_store):
+    async def lookups(offset: int):
+        for i in range(LOOKUPS // CONCURRENCY):
+            await tenant_store.get_webhook_details(DOMAINS[(offset + i) % TENANTS])
+
+    async def webhooks():
+        await asyncio.gather(*(lookups(offset) for offset in range(CONCURRENCY)))
+
+    benchmark.pedantic(
+        lambda: loop.run_until_complete(webhooks()), rounds=20, warmup_rounds=1
+    )
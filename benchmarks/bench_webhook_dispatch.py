@@ -0,0 +1,39 @@
+"""
+The cost of picking the handler for an event. Before handlers were
+precompiled every webhook called `APIRoute.get_route_handler()`, now it's a
+dict lookup.
+"""
+from typing import List
+
+import pytest
+from conftest import get_webhook_details, make_app
+from fastapi import Depends
+
+from saleor_app.deps import saleor_domain_header
+from saleor_app.schemas.handlers import SaleorEventType
+from saleor_app.schemas.webhook import Webhook
+
+
+async def product_updated(
+    payload: List[Webhook], saleor_domain=Depends(saleor_domain_header)
+):
+    return {}
+
+
+@pytest.fixture(scope="module")
+def webhook_router():
+    app = make_app()
+    app.include_webhook_router(get_webhook_details)
+    for event_type in SaleorEventType:
+        app.webhook_router.http_event_route(event_type)(product_updated)
+    return app.webhook_router
+
+
+def test_rebuild_handler(benchmark, webhook_router):
+    route = webhook_router.http_routes["PRODUCT_UPDATED"]
+
+    benchmark(route.get_route_handler)
+
+
+def test_precompiled_handler(benchmark, webhook_router):
+    benchmark(webhook_router.http_handlers.get, "PRODUCT_UPDATED")
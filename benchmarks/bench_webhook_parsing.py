@@ -0,0 +1,26 @@
+"""
+Validating webhook payloads with the `Webhook` union against the key based
+`parse_webhooks`, with and without validation.
+"""
+from typing import List
+
+import pytest
+from conftest import PAYLOAD_SIZES, PAYLOAD_VERSIONS, make_payload
+from pydantic import parse_obj_as
+
+from saleor_app.schemas.webhook import Webhook, parse_webhooks
+
+PARSERS = {
+    "union": lambda payload: parse_obj_as(List[Webhook], payload),
+    "parse_webhooks": parse_webhooks,
+    "trusted": lambda payload: parse_webhooks(payload, trusted=True),
+}
+
+
+@pytest.mark.parametrize("size", PAYLOAD_SIZES)
+@pytest.mark.parametrize("version", PAYLOAD_VERSIONS)
+@pytest.mark.parametrize("parser", PARSERS)
+def test_parse(benchmark, parser, version, size):
+    payload = make_payload(version, size)
+
+    benchmark(PARSERS[parser], payload)
@@ -0,0 +1,109 @@
+"""
+The webhook request path: `WebhookRoute` dispatch, domain validation, the
+webhook details lookup, `verify_webhook_signature`, payload parsing and a
+handler that does nothing.
+"""
+import json
+from typing import List
+
+import pytest
+from conftest import (
+    PAYLOAD_SIZES,
+    PAYLOAD_VERSIONS,
+    asgi_request,
+    get_webhook_details,
+    make_app,
+    make_payload,
+    webhook_headers,
+)
+from fastapi import Depends
+
+from saleor_app.deps import parsed_webhook_payload, verify_webhook_signature
+from saleor_app.metrics import Metrics
+from saleor_app.schemas.handlers import SaleorEventType
+from saleor_app.schemas.webhook import Webhook
+from saleor_app.tracing import InMemoryTracer
+
+
+async def product_updated_body(payload: List[Webhook]):
+    return {}
+
+
+async def product_updated_parsed(
+    payload: List[Webhook] = Depends(parsed_webhook_payload),
+):
+    return {}
+
+
+HANDLERS = {
+    # The payload validated by FastAPI against the `Webhook` union
+    "body": product_updated_body,
+    # The payload parsed by `parsed_webhook_payload`
+    "parsed": product_updated_parsed,
+}
+
+
+def make_webhook_app(handler="parsed", ack="after_handler", **kwargs):
+    app = make_app(**kwargs)
+    app.include_webhook_router(get_webhook_details)
+    app.webhook_router.http_event_route(SaleorEventType.PRODUCT_UPDATED, ack=ack)(
+        HANDLERS[handler]
+    )
+    return app
+
+
+def webhook_request(app, version: str, size: int):
+    body = json.dumps(make_payload(version, size)).encode("utf-8")
+    headers = webhook_headers("product_updated", body)
+
+    async def post_webhook():
+        status, _ = await asgi_request(app, "POST", "/webhook", headers, body)
+        assert status == 200, status
+
+    return post_webhook
+
+
+def rounds_for(size: int) -> int:
+    return max(20, 2000 // size)
+
+
+@pytest.mark.parametrize("size", PAYLOAD_SIZES)
+@pytest.mark.parametrize("version", PAYLOAD_VERSIONS)
+@pytest.mark.parametrize("handler", HANDLERS)
+def test_webhook(measure, handler, version, size):
+    app = make_webhook_app(handler)
+
+    measure(webhook_request(app, version, size), rounds=rounds_for(size))
+
+
+@pytest.mark.parametrize("size", PAYLOAD_SIZES)
+def test_webhook_immediate_ack(measure, loop, size):
+    app = make_webhook_app(ack="immediate")
+
+    measure(webhook_request(app, "v3", size), rounds=rounds_for(size))
+    # Drains the work queue
+    loop.run_until_complete(app.router.shutdown())
+
+
+@pytest.mark.parametrize("size", (1, 100))
+def test_webhook_instrumented(measure, size):
+    app = make_webhook_app(tracer=InMemoryTracer())
+    app.include_metrics_route(Metrics())
+
+    measure(webhook_request(app, "v3", size), rounds=rounds_for(size))
+
+
+@pytest.mark.parametrize("size", PAYLOAD_SIZES)
+def test_verify_webhook_signature(measure, size):
+    app = make_webhook_app()
+    body = json.dumps(make_payload("v3", size)).encode("utf-8")
+    headers = webhook_headers("product_updated", body)
+    app.get("/signature")(
+        lambda _=Depends(verify_webhook_signature): None  # noqa: E731
+    )
+
+    async def check_signature():
+        status, _ = await asgi_request(app, "GET", "/signature", headers, body)
+        assert status == 200, status
+
+    measure(check_signature, rounds=rounds_for(size))
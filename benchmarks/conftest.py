@@ -0,0 +1,373 @@
+"""
+Fixtures shared by the benchmarks: Saleor webhook payloads, an in-process
+ASGI driver, a stub Saleor GraphQL server and `measure`, which reports
+req/s, p50/p99 latency and memory allocated per request on top of
+pytest-benchmark's timings.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import pytest
+from aiohttp import web
+
+from saleor_app.app import SaleorApp
+from saleor_app.deps import SALEOR_DOMAIN_HEADER, SALEOR_SIGNATURE_HEADER
+from saleor_app.schemas.core import DomainName, WebhookData
+from saleor_app.schemas.manifest import Manifest
+
+PAYLOAD_SIZES = (1, 100, 1000)
+PAYLOAD_VERSIONS = ("v1", "v2", "v3")
+
+SALEOR_DOMAIN = "shop.saleor.local"
+WEBHOOK_SECRET = "webhook-secret"
+
+# Rounds used to measure memory, on top of the timed ones, tracemalloc
+# slows the requests down a few times
+ALLOCATION_ROUNDS = 10
+
+META = {
+    "issued_at": "2022-03-09T14:42:00.756412+00:00",
+    "version": "3.1.0-a.25",
+    "issuing_principal": {"id": "VXNlcjox", "type": "app"},
+}
+
+MANIFEST = Manifest(
+    id="benchmark",
+    permissions=["MANAGE_PRODUCTS"],
+    name="Benchmark",
+    version="0.0.0",
+    about="",
+    extensions=[],
+    data_privacy="",
+    data_privacy_url="http://localhost/",
+    homepage_url="http://localhost/",
+    support_url="http://localhost/",
+    app_url="http://localhost/",
+)
+
+
+def global_id(type_name: str, pk: int) -> str:
+    return base64.b64encode(f"{type_name}:{pk}".encode("utf-8")).decode("ascii")
+
+
+def make_product(pk: int) -> Dict[str, Any]:
+    """Roughly what Saleor sends in a PRODUCT_* webhook for one product."""
+    return {
+        "type": "Product",
+        "id": global_id("Product", pk),
+        "name": f"Product {pk}",
+        "slug": f"product-{pk}",
+        "description": json.dumps(
+            {"blocks": [{"type": "paragraph", "data": {"text": "A product."}}]}
+        ),
+        "seo_title": "",
+        "seo_description": "",
+        "rating": None,
+        "updated_at": "2022-03-09T14:42:00.756412+00:00",
+        "charge_taxes": True,
+        "weight": "1.0 kg",
+        "product_type": {"id": global_id("ProductType", 1), "name": "Default"},
+        "category": {"id": global_id("Category", 1), "name": "Default"},
+        "metadata": {"key": "value"},
+        "private_metadata": {},
+        "attributes": [
+            {
+                "name": "Color",
+                "input_type": "dropdown",
+                "values": [{"name": "Red", "slug": "red"}],
+            }
+        ],
+        "variants": [
+            {
+                "id": global_id("ProductVariant", pk * 10 + i),
+                "sku": f"SKU-{pk}-{i}",
+                "name": f"Variant {i}",
+                "track_inventory": True,
+                "channel_listings": [
+                    {"channel_slug": "default-channel", "price_amount": "10.00"}
+                ],
+            }
+            for i in range(3)
+        ],
+    }
+
+
+def make_payload(version: str, size: int) -> List[Dict[str, Any]]:
+    """A webhook body of `size` products in the given payload format."""
+    products = [make_product(pk) for pk in range(1, size + 1)]
+    if version == "v1":
+        return products
+    if version == "v2":
+        return [{**product, "meta": META} for product in products]
+    return [{"meta": META, "payload": product} for product in products]
+
+
+def sign(body: bytes, secret: str = WEBHOOK_SECRET) -> str:
+    return hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def webhook_headers(event_type: str, body: bytes) -> Dict[str, str]:
+    return {
+        SALEOR_DOMAIN_HEADER: SALEOR_DOMAIN,
+        SALEOR_SIGNATURE_HEADER: sign(body),
+        "x-saleor-event": event_type,
+        "content-type": "application/json",
+    }
+
+
+async def get_webhook_details(saleor_domain: DomainName) -> WebhookData:
+    return WebhookData(webhook_id="webhook", webhook_secret_key=WEBHOOK_SECRET)
+
+
+async def validate_domain(saleor_domain: DomainName) -> bool:
+    return True
+
+
+async def save_app_data(saleor_domain, auth_token, webhook_data):
+    pass
+
+
+def make_app(**kwargs) -> SaleorApp:
+    app = SaleorApp(
+        manifest=MANIFEST,
+        validate_domain=validate_domain,
+        save_app_data=save_app_data,
+        **kwargs,
+    )
+    app.include_saleor_app_routes()
+    return app
+
+
+async def asgi_request(
+    app,
+    method: str,
+    path: str,
+    headers: Optional[Dict[str, str]] = None,
+    body: bytes = b"",
+) -> Tuple[int, bytes]:
+    """Calls the ASGI app directly, without a server or an HTTP client."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("utf-8"),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"app.local")]
+        + [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in (headers or {}).items()
+        ],
+        "server": ("app.local", 80),
+        "client": ("127.0.0.1", 50000),
+    }
+    request_sent = False
+    status = 0
+    chunks = []
+
+    async def receive():
+        nonlocal request_sent
+        if request_sent:
+            return {"type": "http.disconnect"}
+        request_sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+class StubSaleor:
+    """
+    A Saleor GraphQL endpoint answering the operations used by the framework
+    and a paginated `products` query, with pre-serialized responses so that
+    the stub adds as little as possible to the measured time.
+    """
+
+    def __init__(self, products: int = 1000):
+        self.products = [make_product(pk) for pk in range(1, products + 1)]
+        self.pages: Dict[Tuple[int, Optional[str]], bytes] = {}
+        self.runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/graphql/", self.graphql)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self.runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    @property
+    def domain(self) -> str:
+        return self.url.split("://", 1)[1]
+
+    async def graphql(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        if isinstance(payload, list):
+            body = b"[" + b",".join(self.respond(item) for item in payload) + b"]"
+        else:
+            body = self.respond(payload)
+        return web.Response(body=body, content_type="application/json")
+
+    def respond(self, operation: Dict[str, Any]) -> bytes:
+        query = operation.get("query") or ""
+        variables = operation.get("variables") or {}
+        if "webhookCreate" in query:
+            return json.dumps(
+                {
+                    "data": {
+                        "webhookCreate": {
+                            "webhookErrors": [],
+                            "webhook": {"id": global_id("Webhook", 1)},
+                        }
+                    }
+                }
+            ).encode("utf-8")
+        if "tokenVerify" in query:
+            return b'{"data": {"tokenVerify": {"isValid": true, "user": null}}}'
+        if "products" in query:
+            return self.products_page(
+                variables.get("first", 100), variables.get("after")
+            )
+        return b'{"data": {}}'
+
+    def products_page(self, first: int, after: Optional[str]) -> bytes:
+        key = (first, after)
+        if key not in self.pages:
+            start = int(after) if after else 0
+            end = min(start + first, len(self.products))
+            edges = [
+                {"cursor": str(start + i + 1), "node": product}
+                for i, product in enumerate(self.products[start:end])
+            ]
+            self.pages[key] = json.dumps(
+                {
+                    "data": {
+                        "products": {
+                            "edges": edges,
+                            "pageInfo": {
+                                "hasNextPage": end < len(self.products),
+                                "endCursor": str(end),
+                            },
+                        }
+                    }
+                }
+            ).encode("utf-8")
+        return self.pages[key]
+
+
+@pytest.fixture(scope="session")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def stub_saleor(loop):
+    stub = StubSaleor()
+    loop.run_until_complete(stub.start())
+    yield stub
+    loop.run_until_complete(stub.stop())
+
+
+RESULTS: List[Tuple[str, Dict[str, float]]] = []
+
+
+def percentile(timings: List[float], fraction: float) -> float:
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def measure_memory(run: Callable[[], Any]) -> Dict[str, float]:
+    """
+    The peak of memory allocated while handling one request, and what's
+    still allocated per request after `ALLOCATION_ROUNDS` of them.
+    """
+    peaks = []
+    for _ in range(ALLOCATION_ROUNDS // 2):
+        tracemalloc.start()
+        try:
+            run()
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    tracemalloc.start()
+    try:
+        for _ in range(ALLOCATION_ROUNDS):
+            run()
+        retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_kib": sorted(peaks)[len(peaks) // 2] / 1024,
+        "retained_bytes": retained / ALLOCATION_ROUNDS,
+    }
+
+
+@pytest.fixture
+def measure(benchmark, loop, request):
+    """
+    Times `func()`, a coroutine function making one request, for `rounds`
+    rounds in the session's event loop and reports the request path
+    statistics in the benchmark's `extra_info` and the terminal summary.
+    """
+
+    def measure(func: Callable[[], Awaitable], rounds: int = 200, warmup: int = 10):
+        def run():
+            return loop.run_until_complete(func())
+
+        result = benchmark.pedantic(
+            run, rounds=rounds, iterations=1, warmup_rounds=warmup
+        )
+        if benchmark.disabled:
+            return result
+        timings = benchmark.stats.stats.data
+        stats = {
+            "req_per_s": len(timings) / sum(timings),
+            "p50_us": percentile(timings, 0.5) * 1e6,
+            "p99_us": percentile(timings, 0.99) * 1e6,
+            **measure_memory(run),
+        }
+        benchmark.extra_info.update(stats)
+        RESULTS.append((request.node.name, stats))
+        return result
+
+    return measure
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not RESULTS:
+        return
+    terminalreporter.section("request paths")
+    width = max(len(name) for name, _ in RESULTS)
+    terminalreporter.write_line(
+        f"{'name':<{width}} {'req/s':>10} {'p50 us':>10} {'p99 us':>10} "
+        f"{'peak KiB':>10} {'retained B':>11}"
+    )
+    for name, stats in sorted(RESULTS):
+        terminalreporter.write_line(
+            f"{name:<{width}} {stats['req_per_s']:>10.0f} {stats['p50_us']:>10.1f} "
+            f"{stats['p99_us']:>10.1f} {stats['peak_kib']:>10.1f} "
+            f"{stats['retained_bytes']:>11.0f}"
+        )
@@ -1,11 +1,22 @@
-from typing import Awaitable, Callable, Optional
+from typing import Awaitable, Callable, Dict, Iterable, Optional
 
 from fastapi import APIRouter, FastAPI
 
-from saleor_app.endpoints import install, manifest
+from saleor_app.cache import InMemoryCacheBackend, TTLCache
+from saleor_app.dedup import WebhookDeduplicator
+from saleor_app.domains import DomainValidator
+from saleor_app.endpoints import install, manifest, prometheus_metrics
+from saleor_app.errors import ConfigurationError
+from saleor_app.metrics import Metrics, NoopMetrics
+from saleor_app.saleor.client import SaleorSessionPool
 from saleor_app.schemas.core import DomainName, WebhookData
 from saleor_app.schemas.manifest import Manifest
+from saleor_app.schemas.utils import build_route_index
+from saleor_app.stores.base import CachedTenantStore, TenantStore
+from saleor_app.tokens import JWKSTokenVerifier, TokenVerificationCache
+from saleor_app.tracing import NoopTracer, Tracer
 from saleor_app.webhook import WebhookRoute, WebhookRouter
+from saleor_app.work_queue import WebhookWorkQueue
 
 
 class SaleorApp(FastAPI):
@@ -13,26 +24,119 @@ class SaleorApp(FastAPI):
         self,
         *,
         manifest: Manifest,
-        validate_domain: Callable[[DomainName], Awaitable[bool]],
+        validate_domain: Optional[Callable[[DomainName], Awaitable[bool]]] = None,
         save_app_data: Callable[[DomainName, str, WebhookData], Awaitable],
+        get_app_token: Optional[
+            Callable[[DomainName], Awaitable[Optional[str]]]
+        ] = None,
+        app_token_cache_ttl: float = 300,
+        allowed_domains: Optional[Iterable[str]] = None,
+        domain_cache_ttl: float = 300,
+        domain_negative_cache_ttl: float = 5,
         use_insecure_saleor_http: bool = False,
         development_auth_token: Optional[str] = None,
+        saleor_session_pool: Optional[SaleorSessionPool] = None,
+        token_verification_cache: Optional[TokenVerificationCache] = None,
+        jwks_verifier: Optional[JWKSTokenVerifier] = None,
+        install_concurrency: int = 5,
+        tracer: Optional[Tracer] = None,
+        manifest_max_age: int = 300,
         **kwargs,
     ):
         super().__init__(**kwargs)
 
         self.manifest = manifest
+        # Serialized manifests with their ETags, per base url
+        self.manifest_cache = TTLCache(maxsize=64, ttl=manifest_max_age)
+        self.manifest_max_age = manifest_max_age
+        self.route_index: Optional[Dict[str, str]] = None
+        # The number of routes the index was built from
+        self.route_index_size = 0
+        self.add_event_handler("startup", self.get_route_index)
 
-        self.validate_domain = validate_domain
+        self.validate_domain = DomainValidator(
+            validate_domain,
+            allowed_domains=allowed_domains,
+            ttl=domain_cache_ttl,
+            negative_ttl=domain_negative_cache_ttl,
+        )
         self.save_app_data = save_app_data
+        self.tenant_store: Optional[TenantStore] = None
+        self.get_app_token = get_app_token
+        self.app_token_cache = TTLCache(ttl=app_token_cache_ttl)
 
         self.use_insecure_saleor_http = use_insecure_saleor_http
         self.development_auth_token = development_auth_token
+        self.install_concurrency = install_concurrency
+
+        self.saleor_session_pool = saleor_session_pool or SaleorSessionPool()
+        self.add_event_handler("shutdown", self.saleor_session_pool.close)
+
+        self.token_verification_cache = (
+            token_verification_cache or TokenVerificationCache()
+        )
+        self.jwks_verifier = jwks_verifier
+
+        self.webhook_details_cache: Optional[TTLCache] = None
+        self.webhook_work_queue: Optional[WebhookWorkQueue] = None
+        self.metrics: Metrics = NoopMetrics()
+        self.tracer = tracer or NoopTracer()
 
         self.configuration_router = APIRouter(
             prefix="/configuration", tags=["configuration"]
         )
 
+    @classmethod
+    def from_tenant_store(
+        cls,
+        tenant_store: TenantStore,
+        *,
+        manifest: Manifest,
+        cache_ttl: float = 300,
+        **kwargs,
+    ) -> "SaleorApp":
+        """
+        Creates an app that keeps its per Saleor instance data in
+        `tenant_store`, read through a `CachedTenantStore` unless `cache_ttl`
+        is 0. The app's own domain, app token and webhook details caches are
+        off by default then, the `CachedTenantStore` already caches them.
+        """
+        if cache_ttl:
+            store = CachedTenantStore(tenant_store, ttl=cache_ttl)
+            kwargs.setdefault("domain_cache_ttl", 0)
+            kwargs.setdefault("domain_negative_cache_ttl", 0)
+            kwargs.setdefault("app_token_cache_ttl", 0)
+        else:
+            store = tenant_store
+        app = cls(
+            manifest=manifest,
+            validate_domain=store.validate_domain,
+            save_app_data=store.save_app_data,
+            get_app_token=store.get_app_token,
+            **kwargs,
+        )
+        app.tenant_store = store
+        if hasattr(tenant_store, "close"):
+            app.add_event_handler("shutdown", tenant_store.close)
+        return app
+
+    def get_route_index(self) -> Dict[str, str]:
+        """
+        Returns the route name to path index used to resolve lazy urls. It is
+        built, and the manifest lazy urls are checked against it, on startup
+        or on first use, and rebuilt when routes were added since.
+        """
+        if self.route_index is None or len(self.routes) != self.route_index_size:
+            route_index_size = len(self.routes)
+            route_index = build_route_index(self.routes)
+            for lazy_url in self.manifest.lazy_urls():
+                lazy_url.path(route_index)
+            self.route_index = route_index
+            self.route_index_size = route_index_size
+            # Manifests were resolved against the previous index
+            self.manifest_cache.clear()
+        return self.route_index
+
     def include_saleor_app_routes(self):
         self.configuration_router.get(
             "/manifest", response_model=Manifest, name="manifest"
@@ -48,11 +152,56 @@ class SaleorApp(FastAPI):
 
         self.include_router(self.configuration_router)
 
+    def include_metrics_route(
+        self, metrics: Optional[Metrics] = None, path: str = "/metrics"
+    ):
+        """
+        Enables metrics collection and serves the metrics in the Prometheus
+        text format at `path`. Until it's called metrics are not collected.
+        """
+        self.metrics = metrics or Metrics()
+        self.add_api_route(
+            path, prometheus_metrics, include_in_schema=False, name="metrics"
+        )
+
     def include_webhook_router(
-        self, get_webhook_details: Callable[[DomainName], Awaitable[WebhookData]]
+        self,
+        get_webhook_details: Optional[
+            Callable[[DomainName], Awaitable[WebhookData]]
+        ] = None,
+        webhook_details_cache_ttl: Optional[float] = None,
+        webhook_details_cache_size: int = 1024,
+        trust_verified_payloads: bool = False,
+        webhook_response_timeout: Optional[float] = None,
+        webhook_work_queue: Optional[WebhookWorkQueue] = None,
+        deduplicate_webhooks: bool = False,
+        webhook_deduplicator: Optional[WebhookDeduplicator] = None,
     ):
+        if get_webhook_details is None:
+            if self.tenant_store is None:
+                raise ConfigurationError(
+                    "include_webhook_router needs get_webhook_details or a tenant store."
+                )
+            get_webhook_details = self.tenant_store.get_webhook_details
+        if webhook_details_cache_ttl is None:
+            # A `CachedTenantStore` already caches the webhook details
+            cached_store = isinstance(self.tenant_store, CachedTenantStore)
+            webhook_details_cache_ttl = 0 if cached_store else 300
         self.get_webhook_details = get_webhook_details
+        if webhook_deduplicator is None and deduplicate_webhooks:
+            webhook_deduplicator = WebhookDeduplicator()
+        self.webhook_deduplicator = webhook_deduplicator
+        self.webhook_response_timeout = webhook_response_timeout
+        self.trust_verified_payloads = trust_verified_payloads
+        self.webhook_details_cache = TTLCache(
+            maxsize=webhook_details_cache_size, ttl=webhook_details_cache_ttl
+        )
+        self.webhook_work_queue = None
+        if webhook_work_queue is not None:
+            self.webhook_work_queue = webhook_work_queue
+            self.add_event_handler("shutdown", webhook_work_queue.drain)
         self.webhook_router = WebhookRouter(
+            get_work_queue=self.get_webhook_work_queue,
             prefix="/webhook",
             responses={
                 400: {"description": "Missing required header"},
@@ -63,3 +212,66 @@ class SaleorApp(FastAPI):
         )
 
         self.include_router(self.webhook_router)
+
+    def get_webhook_work_queue(self) -> WebhookWorkQueue:
+        """
+        Returns the queue running the handlers of webhooks registered with
+        `ack="immediate"`, created along with the first such route unless one
+        was passed to `include_webhook_router`. It's drained on shutdown.
+        """
+        if self.webhook_work_queue is None:
+            self.webhook_work_queue = WebhookWorkQueue()
+            self.add_event_handler("shutdown", self.webhook_work_queue.drain)
+        return self.webhook_work_queue
+
+    async def fetch_webhook_details(self, saleor_domain: DomainName) -> WebhookData:
+        """
+        Returns `get_webhook_details` for the domain, cached for
+        `webhook_details_cache_ttl` seconds.
+        """
+        return await self.webhook_details_cache.get_or_load(
+            saleor_domain, lambda: self.get_webhook_details(saleor_domain)
+        )
+
+    async def fetch_app_token(self, saleor_domain: DomainName) -> Optional[str]:
+        """
+        Returns the auth token stored for the domain by `get_app_token`,
+        cached for `app_token_cache_ttl` seconds.
+        """
+        if self.get_app_token is None:
+            raise ConfigurationError(
+                "SaleorApp needs get_app_token to create Saleor clients for requests."
+            )
+        return await self.app_token_cache.get_or_load(
+            saleor_domain, lambda: self.get_app_token(saleor_domain)
+        )
+
+    def clear_domain_cache(self, saleor_domain: DomainName):
+        """
+        Drops everything the app cached for the domain, call it whenever the
+        data returned by your storage callables changes outside of the
+        install flow.
+        """
+        if self.webhook_details_cache is not None:
+            self.webhook_details_cache.pop(saleor_domain)
+        if isinstance(self.validate_domain, DomainValidator):
+            self.validate_domain.invalidate(saleor_domain)
+        self.app_token_cache.pop(saleor_domain)
+        if isinstance(self.tenant_store, CachedTenantStore):
+            self.tenant_store.invalidate(saleor_domain)
+
+    def get_caches(self) -> Dict[str, TTLCache]:
+        """The app's in-process caches by name, for the cache metrics."""
+        caches = {
+            "manifest": self.manifest_cache,
+            "app_token": self.app_token_cache,
+        }
+        if isinstance(self.validate_domain, DomainValidator):
+            caches["domain"] = self.validate_domain.cache
+        if self.webhook_details_cache is not None:
+            caches["webhook_details"] = self.webhook_details_cache
+        if isinstance(self.token_verification_cache.backend, InMemoryCacheBackend):
+            caches["token_verification"] = self.token_verification_cache.backend.cache
+        if isinstance(self.tenant_store, CachedTenantStore):
+            caches["tenants"] = self.tenant_store.tenants
+        return caches
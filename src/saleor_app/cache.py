@@ -0,0 +1,144 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Protocol
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    A bounded, in-process LRU cache where every entry expires after a TTL.
+    `hits` and `misses` count the outcomes of `get`.
+
+    Not thread safe, meant to be used from within the event loop.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 60,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.pending: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            expires_at, value = self.data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        if expires_at <= self.clock():
+            del self.data[key]
+            self.misses += 1
+            return default
+        self.data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            self.data.pop(key, None)
+            return
+        self.data[key] = (self.clock() + ttl, value)
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+    ) -> Any:
+        """
+        Returns the cached value or awaits `loader` to get and store it,
+        concurrent misses for the same key share a single `loader` call.
+        `None` results are not cached. If the caller running `loader` is
+        cancelled, one of the callers waiting for it runs `loader` again.
+        """
+        while True:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            pending = self.pending.get(key)
+            if pending is None:
+                break
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    # This caller was cancelled, not the one loading the value
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending[key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Retrieve it so the loop doesn't warn when there are no waiters
+            future.exception()
+            raise
+        else:
+            if value is not None:
+                self.set(key, value, ttl=ttl)
+            future.set_result(value)
+            return value
+        finally:
+            del self.pending[key]
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        expires_at, value = self.data.pop(key, (None, default))
+        return value
+
+    def clear(self):
+        self.data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+class CacheBackend(Protocol):
+    """
+    An async key-value store with per-key TTL, implement it to plug in an
+    external cache (e.g. Redis) shared between app processes.
+    """
+
+    async def get(self, key: str) -> Any:
+        ...
+
+    async def set(self, key: str, value: Any, ttl: float):
+        ...
+
+    async def delete(self, key: str):
+        ...
+
+
+class InMemoryCacheBackend:
+    """The default `CacheBackend`, local to the app process."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Any:
+        return self.cache.get(key)
+
+    async def set(self, key: str, value: Any, ttl: float):
+        self.cache.set(key, value, ttl=ttl)
+
+    async def delete(self, key: str):
+        self.cache.pop(key)
@@ -0,0 +1,44 @@
+import hashlib
+from typing import Optional
+
+from saleor_app.cache import CacheBackend, InMemoryCacheBackend
+from saleor_app.schemas.core import DomainName
+
+
+class WebhookDeduplicator:
+    """
+    Remembers the webhooks that were handled for `ttl` seconds, so that
+    Saleor's repeated deliveries of the same webhook can be answered without
+    running the handler again.
+
+    Webhooks are told apart by domain, event type and signature (the body
+    hash for unsigned ones). Use a shared `CacheBackend` when the app runs in
+    many processes.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        ttl: float = 600,
+        maxsize: int = 10000,
+    ):
+        self.backend = backend or InMemoryCacheBackend(maxsize=maxsize, ttl=ttl)
+        self.ttl = ttl
+
+    @staticmethod
+    def get_key(
+        saleor_domain: DomainName,
+        event_type: str,
+        signature: Optional[str],
+        body: bytes,
+    ) -> str:
+        fingerprint = signature or hashlib.sha256(body).hexdigest()
+        return hashlib.sha256(
+            f"{saleor_domain}:{event_type.upper()}:{fingerprint}".encode("utf-8")
+        ).hexdigest()
+
+    async def is_duplicate(self, key: str) -> bool:
+        return await self.backend.get(key) is not None
+
+    async def mark_handled(self, key: str):
+        await self.backend.set(key, True, ttl=self.ttl)
@@ -1,21 +1,35 @@
 import hashlib
 import hmac
+import json
 import logging
-from typing import List, Optional
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, List, Optional, Union
 
-import jwt
 from fastapi import Depends, Header, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 
+from saleor_app.errors import (
+    ConfigurationError,
+    DuplicateWebhook,
+    TokenVerificationError,
+)
+from saleor_app.saleor.client import SaleorClient
 from saleor_app.saleor.exceptions import GraphQLError
 from saleor_app.saleor.mutations import VERIFY_TOKEN
 from saleor_app.saleor.utils import get_client_for_app
 from saleor_app.schemas.core import DomainName
+from saleor_app.schemas.lazy import LazyModel
+from saleor_app.schemas.webhook import Webhook, parse_webhooks
+from saleor_app.tokens import decode_token_unverified
 
 logger = logging.getLogger(__name__)
 
 SALEOR_DOMAIN_HEADER = "x-saleor-domain"
 SALEOR_TOKEN_HEADER = "x-saleor-token"
 SALEOR_SIGNATURE_HEADER = "x-saleor-signature"
+SALEOR_EVENT_HEADER = "x-saleor-event"
 
 
 async def saleor_domain_header(
@@ -48,23 +62,15 @@ async def verify_saleor_token(
     saleor_domain=Depends(saleor_domain_header),
     token=Depends(saleor_token),
 ) -> bool:
-    schema = "http" if request.app.use_insecure_saleor_http else "https"
-    async with get_client_for_app(
-        f"{schema}://{saleor_domain}", manifest=request.app.manifest
-    ) as saleor_client:
-        try:
-            response = await saleor_client.execute(
-                VERIFY_TOKEN,
-                variables={
-                    "token": token,
-                },
-            )
-        except GraphQLError:
+    if request.app.jwks_verifier is not None:
+        is_valid = await _verify_saleor_token_locally(request, saleor_domain, token)
+    else:
+        is_valid = await request.app.token_verification_cache.get(saleor_domain, token)
+    if is_valid is None:
+        is_valid = await _verify_saleor_token_remote(request, saleor_domain, token)
+        if is_valid is None:
             return False
-    try:
-        is_valid = response["tokenVerify"]["isValid"] is True
-    except KeyError:
-        is_valid = False
+        await request.app.token_verification_cache.set(saleor_domain, token, is_valid)
 
     if not is_valid:
         logger.warning(
@@ -81,11 +87,57 @@ async def verify_saleor_token(
     return True
 
 
+async def _verify_saleor_token_locally(
+    request: Request, saleor_domain: DomainName, token: str
+) -> bool:
+    schema = "http" if request.app.use_insecure_saleor_http else "https"
+    saleor_url = f"{schema}://{saleor_domain}"
+    try:
+        await request.app.jwks_verifier.verify(
+            saleor_url,
+            token,
+            session=request.app.saleor_session_pool.get_session(saleor_url),
+        )
+    except TokenVerificationError as exc:
+        logger.debug(str(exc), exc_info=1)
+        return False
+    return True
+
+
+async def _verify_saleor_token_remote(
+    request: Request, saleor_domain: DomainName, token: str
+) -> Optional[bool]:
+    schema = "http" if request.app.use_insecure_saleor_http else "https"
+    async with get_client_for_app(
+        f"{schema}://{saleor_domain}",
+        manifest=request.app.manifest,
+        session_pool=request.app.saleor_session_pool,
+        metrics=request.app.metrics,
+        tracer=request.app.tracer,
+    ) as saleor_client:
+        try:
+            response = await saleor_client.execute(
+                VERIFY_TOKEN,
+                variables={
+                    "token": token,
+                },
+            )
+        except GraphQLError:
+            return None
+    try:
+        return response["tokenVerify"]["isValid"] is True
+    except KeyError:
+        return False
+
+
 async def verify_saleor_domain(
     request: Request,
     saleor_domain=Depends(saleor_domain_header),
 ) -> bool:
-    domain_is_valid = await request.app.validate_domain(saleor_domain)
+    with request.app.tracer.start_span(
+        "saleor_app.validate_domain", {"saleor.domain": saleor_domain}
+    ):
+        domain_is_valid = await request.app.validate_domain(saleor_domain)
     if not domain_is_valid:
         logger.warning(f"Provided domain {saleor_domain} is invalid.")
         raise HTTPException(
@@ -104,21 +156,181 @@ async def verify_webhook_signature(
             status_code=401,
             detail=(f"Missing signature header - {SALEOR_SIGNATURE_HEADER}"),
         )
-    webhook_details = await request.app.get_webhook_details(domain_name)
+    tracer = request.app.tracer
+    started_at = time.perf_counter()
+    with tracer.start_span("saleor_app.get_webhook_details"):
+        webhook_details = await request.app.fetch_webhook_details(domain_name)
+    if webhook_details is None:
+        logger.warning(f"No webhook details for {domain_name}, is the app installed?")
+        raise HTTPException(
+            status_code=401,
+            detail=f"The app is not installed for {domain_name}",
+        )
+    fetched_at = time.perf_counter()
     content = await request.body()
     webhook_signature_bytes = bytes(signature, "utf-8")
 
-    secret_key_bytes = bytes(webhook_details.webhook_secret_key, "utf-8")
-    content_signature_str = hmac.new(
-        secret_key_bytes, content, hashlib.sha256
-    ).hexdigest()
-    content_signature = bytes(content_signature_str, "utf-8")
+    with tracer.start_span("saleor_app.verify_signature"):
+        secret_key_bytes = bytes(webhook_details.webhook_secret_key, "utf-8")
+        content_signature_str = hmac.new(
+            secret_key_bytes, content, hashlib.sha256
+        ).hexdigest()
+        content_signature = bytes(content_signature_str, "utf-8")
+
+        if not hmac.compare_digest(content_signature, webhook_signature_bytes):
+            raise HTTPException(
+                status_code=401,
+                detail=(f"Invalid webhook signature for {SALEOR_SIGNATURE_HEADER}"),
+            )
+    # The webhook route reports the time from here on as the handler stage
+    request.state.webhook_verified_at = time.perf_counter()
+    event_type = request.headers.get(SALEOR_EVENT_HEADER, "").upper()
+    metrics = request.app.metrics
+    metrics.observe_webhook_stage(
+        event_type, "webhook_details", fetched_at - started_at
+    )
+    metrics.observe_webhook_stage(
+        event_type, "signature", request.state.webhook_verified_at - fetched_at
+    )
+
+
+async def deduplicate_webhook(
+    request: Request,
+    saleor_domain=Depends(saleor_domain_header),
+    event_type: str = Header(..., alias=SALEOR_EVENT_HEADER),
+    signature: Optional[str] = Header(None, alias=SALEOR_SIGNATURE_HEADER),
+    _verify_webhook_signature=Depends(verify_webhook_signature),
+):
+    """
+    Raises `DuplicateWebhook` for webhooks the app has already handled, the
+    webhook route answers them with 200 without calling the handler.
+    """
+    deduplicator = request.app.webhook_deduplicator
+    if deduplicator is None:
+        return
+    key = deduplicator.get_key(
+        saleor_domain, event_type, signature, await request.body()
+    )
+    if await deduplicator.is_duplicate(key):
+        logger.info("Skipping a repeated %s webhook from %s", event_type, saleor_domain)
+        raise DuplicateWebhook()
+    # Marked as handled by the webhook route once the handler succeeds
+    request.state.webhook_dedup_key = key
+
+
+async def webhook_payload(
+    request: Request,
+    _verify_webhook_signature=Depends(verify_webhook_signature),
+) -> Any:
+    """
+    The decoded webhook body, available only after the signature was
+    verified. Within the webhook router the body is decoded once per request.
+    """
+    try:
+        with request.app.tracer.start_span("saleor_app.decode_payload"):
+            return await request.json()
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload.")
+
+
+async def parsed_webhook_payload(
+    request: Request,
+    payload=Depends(webhook_payload),
+) -> List[Webhook]:
+    """
+    The webhook body as `Webhook` models, the model for each item is picked
+    by its keys instead of trial validation of the `Webhook` union. Skips
+    validation if the app trusts verified payloads.
+    """
+    try:
+        with request.app.tracer.start_span("saleor_app.parse_payload"):
+            return parse_webhooks(payload, trusted=request.app.trust_verified_payloads)
+    except ValidationError as exc:
+        raise RequestValidationError(exc.raw_errors)
+
+
+async def typed_webhook_payload(
+    request: Request,
+    payload=Depends(webhook_payload),
+    event_type: str = Header(..., alias=SALEOR_EVENT_HEADER),
+) -> Union[LazyModel, List[LazyModel]]:
+    """
+    The webhook body wrapped in the `payload_model` the event handler was
+    registered with, fields are validated only when accessed.
+    """
+    model = request.app.webhook_router.http_payload_models.get(event_type.upper())
+    if model is None:
+        raise ConfigurationError(
+            f"No payload_model was registered for {event_type.upper()} webhooks."
+        )
+    try:
+        if isinstance(payload, list):
+            return [LazyModel(model, item) for item in payload]
+        return LazyModel(model, payload)
+    except ValidationError as exc:
+        raise RequestValidationError(exc.raw_errors)
+
+
+async def request_deadline(request: Request) -> Optional[float]:
+    """
+    The `time.monotonic()` by which a webhook response is due, pass it as
+    the `deadline` of Saleor calls made while handling the webhook. `None`
+    without a `webhook_response_timeout`.
+    """
+    return getattr(request.state, "deadline", None)
 
-    if not hmac.compare_digest(content_signature, webhook_signature_bytes):
+
+@asynccontextmanager
+async def _request_saleor_client(
+    request: Request, saleor_domain: DomainName, deadline: Optional[float]
+) -> AsyncIterator[SaleorClient]:
+    auth_token = await request.app.fetch_app_token(saleor_domain)
+    if not auth_token:
         raise HTTPException(
-            status_code=401,
-            detail=(f"Invalid webhook signature for {SALEOR_SIGNATURE_HEADER}"),
+            status_code=403, detail=f"The app is not installed for {saleor_domain}."
         )
+    schema = "http" if request.app.use_insecure_saleor_http else "https"
+    async with get_client_for_app(
+        f"{schema}://{saleor_domain}",
+        manifest=request.app.manifest,
+        auth_token=auth_token,
+        session_pool=request.app.saleor_session_pool,
+        deadline=deadline,
+        metrics=request.app.metrics,
+        tracer=request.app.tracer,
+    ) as client:
+        yield client
+
+
+async def webhook_saleor_client(
+    request: Request,
+    saleor_domain=Depends(saleor_domain_header),
+    _domain_is_valid=Depends(verify_saleor_domain),
+    _verify_webhook_signature=Depends(verify_webhook_signature),
+    deadline=Depends(request_deadline),
+) -> AsyncIterator[SaleorClient]:
+    """
+    A client for the Saleor instance that sent the webhook, authorized with
+    the app token returned by the app's `get_app_token` and using the app's
+    session pool. The webhook signature is checked first, calls made with
+    the client respect the webhook deadline.
+    """
+    async with _request_saleor_client(request, saleor_domain, deadline) as client:
+        yield client
+
+
+async def configuration_saleor_client(
+    request: Request,
+    saleor_domain=Depends(saleor_domain_header),
+    _domain_is_valid=Depends(verify_saleor_domain),
+    _token_is_valid=Depends(verify_saleor_token),
+) -> AsyncIterator[SaleorClient]:
+    """
+    Like `webhook_saleor_client`, for requests from the dashboard, e.g. the
+    configuration routes. The Saleor token of the request is verified first.
+    """
+    async with _request_saleor_client(request, saleor_domain, None) as client:
+        yield client
 
 
 def require_permission(permissions: List):
@@ -137,7 +349,7 @@ def require_permission(permissions: List):
         saleor_token=Depends(saleor_token),
         _token_is_valid=Depends(verify_saleor_token),
     ):
-        jwt_payload = jwt.decode(saleor_token, verify=False)
+        jwt_payload = decode_token_unverified(saleor_token)
         user_permissions = set(jwt_payload.get("permissions", []))
         if not set([p.value for p in permissions]) - user_permissions:
             return True
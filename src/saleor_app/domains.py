@@ -0,0 +1,107 @@
+import re
+from typing import Awaitable, Callable, Iterable, Optional
+
+from saleor_app.cache import TTLCache
+from saleor_app.errors import ConfigurationError
+from saleor_app.schemas.core import DomainName
+
+
+class DomainAllowList:
+    """
+    Matches Saleor domains against exact names (`saleor.example.com`,
+    `localhost:8000`) and wildcard suffixes (`*.saleor.cloud`).
+
+    A wildcard matches any number of leading labels but not the bare suffix,
+    all wildcards are compiled into a single regular expression. Matching is
+    case insensitive and done on the whole domain, port included.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.exact = set()
+        suffixes = []
+        for pattern in patterns:
+            pattern = pattern.strip().lower()
+            if pattern.startswith("*."):
+                suffix = pattern[2:]
+                if "*" in suffix:
+                    raise ConfigurationError(
+                        f"Invalid domain pattern {pattern}, only a leading "
+                        "`*.` wildcard is supported."
+                    )
+                suffixes.append(suffix)
+            elif "*" in pattern:
+                raise ConfigurationError(
+                    f"Invalid domain pattern {pattern}, only a leading "
+                    "`*.` wildcard is supported."
+                )
+            elif pattern:
+                self.exact.add(pattern)
+        self.suffix_pattern = (
+            re.compile(
+                r"(?:[a-z0-9_-]+\.)+(?:%s)"
+                % "|".join(re.escape(suffix) for suffix in sorted(set(suffixes)))
+            )
+            if suffixes
+            else None
+        )
+
+    def __contains__(self, saleor_domain: DomainName) -> bool:
+        saleor_domain = saleor_domain.lower()
+        if saleor_domain in self.exact:
+            return True
+        return (
+            self.suffix_pattern is not None
+            and self.suffix_pattern.fullmatch(saleor_domain) is not None
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self.exact) or self.suffix_pattern is not None
+
+
+class DomainValidator:
+    """
+    The `validate_domain` of `SaleorApp`.
+
+    Domains on the allow list are valid without calling anything, the rest
+    are checked with `validate_domain`. Its decisions are cached, valid
+    domains for `ttl` seconds, invalid ones for `negative_ttl` seconds.
+    Concurrent checks of the same domain share a single call.
+    """
+
+    def __init__(
+        self,
+        validate_domain: Optional[Callable[[DomainName], Awaitable[bool]]] = None,
+        allowed_domains: Optional[Iterable[str]] = None,
+        ttl: float = 300,
+        negative_ttl: float = 5,
+        maxsize: int = 1024,
+    ):
+        self.allow_list = DomainAllowList(allowed_domains or ())
+        if validate_domain is None and not self.allow_list:
+            raise ConfigurationError(
+                "Either `validate_domain` or `allowed_domains` is required."
+            )
+        self.validate_domain = validate_domain
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def __call__(self, saleor_domain: DomainName) -> bool:
+        if saleor_domain in self.allow_list:
+            return True
+        if self.validate_domain is None:
+            return False
+        loaded = False
+
+        async def load() -> bool:
+            nonlocal loaded
+            loaded = True
+            return bool(await self.validate_domain(saleor_domain))
+
+        is_valid = await self.cache.get_or_load(saleor_domain, load)
+        if loaded and not is_valid:
+            self.cache.set(saleor_domain, False, ttl=self.negative_ttl)
+        return is_valid
+
+    def invalidate(self, saleor_domain: DomainName):
+        self.cache.pop(saleor_domain)
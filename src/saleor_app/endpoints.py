@@ -1,28 +1,67 @@
+import hashlib
 import logging
+import time
 from collections import defaultdict
+from typing import Tuple
 
-from fastapi import Depends, Request
+from fastapi import Depends, Request, Response
 from fastapi.exceptions import HTTPException
 
 from saleor_app.deps import saleor_domain_header, verify_saleor_domain
 from saleor_app.errors import InstallAppError
 from saleor_app.install import install_app
+from saleor_app.metrics import CONTENT_TYPE
 from saleor_app.saleor.exceptions import GraphQLError
 from saleor_app.schemas.core import InstallData
+from saleor_app.schemas.manifest import Manifest
 from saleor_app.schemas.utils import LazyUrl
 
 logger = logging.getLogger(__name__)
 
 
+def resolve_manifest(manifest: Manifest, request: Request) -> Manifest:
+    """Returns a copy of the manifest with all lazy urls resolved."""
+    update = {
+        name: str(field(request))
+        for name, field in manifest
+        if isinstance(field, LazyUrl)
+    }
+    update["extensions"] = [
+        extension.copy(update={"url": str(extension.url(request))})
+        if isinstance(extension.url, LazyUrl)
+        else extension
+        for extension in manifest.extensions
+    ]
+    return manifest.copy(update=update)
+
+
+def serialize_manifest(manifest: Manifest, request: Request) -> Tuple[bytes, str]:
+    body = resolve_manifest(manifest, request).json(by_alias=True).encode("utf-8")
+    return body, f'"{hashlib.sha256(body).hexdigest()}"'
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    return any(
+        tag.strip() in ("*", etag, f"W/{etag}") for tag in if_none_match.split(",")
+    )
+
+
 async def manifest(request: Request):
-    manifest = request.app.manifest
-    for name, field in manifest:
-        if isinstance(field, LazyUrl):
-            setattr(manifest, name, field(request))
-    for extension in manifest.extensions:
-        if isinstance(extension.url, LazyUrl):
-            extension.url = extension.url(request)
-    return manifest
+    base_url = str(request.base_url)
+    cached = request.app.manifest_cache.get(base_url)
+    if cached is None:
+        cached = serialize_manifest(request.app.manifest, request)
+        request.app.manifest_cache.set(base_url, cached)
+    body, etag = cached
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={request.app.manifest_max_age}",
+        "Vary": "Host",
+    }
+    if etag_matches(etag, request.headers.get("if-none-match", "")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 async def install(
@@ -31,6 +70,22 @@ async def install(
     _domain_is_valid=Depends(verify_saleor_domain),
     saleor_domain=Depends(saleor_domain_header),
 ):
+    started_at = time.perf_counter()
+    status = "error"
+    try:
+        with request.app.tracer.start_span(
+            "saleor_app.install", {"saleor.domain": saleor_domain}
+        ):
+            await install_tenant(request, data, saleor_domain)
+        status = "ok"
+    finally:
+        request.app.metrics.observe_install(
+            saleor_domain, status, time.perf_counter() - started_at
+        )
+    return {}
+
+
+async def install_tenant(request: Request, data: InstallData, saleor_domain: str):
     events = defaultdict(list)
     if hasattr(request.app, "webhook_router"):
         for event_type in request.app.webhook_router.http_routes:
@@ -54,8 +109,15 @@ async def install(
                 manifest=request.app.manifest,
                 events=events,
                 use_insecure_saleor_http=request.app.use_insecure_saleor_http,
+                concurrency=request.app.install_concurrency,
+                session_pool=request.app.saleor_session_pool,
+                metrics=request.app.metrics,
+                tracer=request.app.tracer,
             )
         except (InstallAppError, GraphQLError) as exc:
+            if isinstance(exc, InstallAppError) and exc.__cause__ is not None:
+                # Not a Saleor GraphQL error, e.g. Saleor is unreachable
+                raise
             logger.debug(str(exc), exc_info=1)
             raise HTTPException(
                 status_code=403, detail="Incorrect token or not enough permissions"
@@ -68,5 +130,11 @@ async def install(
         auth_token=data.auth_token,
         webhook_data=webhook_data,
     )
+    request.app.clear_domain_cache(saleor_domain)
 
-    return {}
+
+async def prometheus_metrics(request: Request):
+    return Response(
+        content=request.app.metrics.render(request.app.get_caches()),
+        media_type=CONTENT_TYPE,
+    )
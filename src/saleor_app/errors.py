@@ -1,10 +1,25 @@
+from typing import Sequence
+
+
 class SaleorAppError(Exception):
     """Generic Saleor App Error, all framework errros inherit from this"""
 
 
 class InstallAppError(SaleorAppError):
-    """Install App error"""
+    """Install App error, `errors` are the failures of the webhook creation"""
+
+    def __init__(self, message: str, errors: Sequence[BaseException] = ()):
+        super().__init__(message)
+        self.errors = list(errors)
 
 
 class ConfigurationError(SaleorAppError):
     """App is misconfigured"""
+
+
+class TokenVerificationError(SaleorAppError):
+    """Token could not be verified"""
+
+
+class DuplicateWebhook(SaleorAppError):
+    """The webhook was already handled"""
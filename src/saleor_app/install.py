@@ -1,9 +1,11 @@
+import asyncio
 import logging
 import secrets
 import string
-from typing import Dict, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from saleor_app.errors import InstallAppError
+from saleor_app.saleor.client import SaleorClient
 from saleor_app.saleor.exceptions import GraphQLError
 from saleor_app.saleor.mutations import CREATE_WEBHOOK
 from saleor_app.saleor.utils import get_client_for_app
@@ -14,43 +16,85 @@ from saleor_app.schemas.manifest import Manifest
 logger = logging.getLogger(__name__)
 
 
+def group_webhook_events(
+    events: Dict[str, List[Tuple[SaleorEventType, Optional[str]]]]
+) -> List[Tuple[str, List[str], Optional[str]]]:
+    """
+    Returns `(target_url, event_types, subscription_query)` for every webhook
+    to create. Events of a target url that share the same subscription query
+    (or have none) are registered with a single webhook.
+    """
+    webhooks: Dict[Tuple[str, Optional[str]], List[str]] = {}
+    for target_url, target_events in events.items():
+        for event_type, subscription_query in target_events:
+            key = (str(target_url), subscription_query or None)
+            webhooks.setdefault(key, []).append(event_type.upper())
+    return [
+        (target_url, event_types, subscription_query)
+        for (target_url, subscription_query), event_types in webhooks.items()
+    ]
+
+
+async def create_webhook(
+    saleor_client: SaleorClient, webhook_input: Dict[str, Any]
+) -> str:
+    response = await saleor_client.execute(
+        CREATE_WEBHOOK,
+        variables={"input": webhook_input},
+    )
+    webhook_create = response["webhookCreate"]
+    if webhook_create.get("webhookErrors") or not webhook_create.get("webhook"):
+        raise GraphQLError(
+            webhook_create.get("webhookErrors")
+            or [{"message": "Webhook was not created"}],
+            response_data=response,
+        )
+    return webhook_create["webhook"]["id"]
+
+
 async def install_app(
     saleor_domain: DomainName,
     auth_token: AppToken,
     manifest: Manifest,
-    events: Dict[str, Tuple[SaleorEventType, str]],
+    events: Dict[str, List[Tuple[SaleorEventType, Optional[str]]]],
     use_insecure_saleor_http: bool,
+    concurrency: int = 5,
+    **client_options,
 ):
     alphabet = string.ascii_letters + string.digits
     secret_key = "".join(secrets.choice(alphabet) for _ in range(20))
 
     schema = "http" if use_insecure_saleor_http else "https"
 
-    errors = []
+    semaphore = asyncio.Semaphore(concurrency)
 
     async with get_client_for_app(
-        f"{schema}://{saleor_domain}", manifest=manifest, auth_token=auth_token
+        f"{schema}://{saleor_domain}",
+        manifest=manifest,
+        auth_token=auth_token,
+        **client_options,
     ) as saleor_client:
-        for target_url, target_events in events.items():
-            for event_type, subscription_query in target_events:
-                webhook_input = {
-                    "targetUrl": str(target_url),
-                    "events": [event_type.upper()],
-                    "name": f"{manifest.name}",
-                    "secretKey": secret_key,
-                }
-
-                if subscription_query:
-                    webhook_input["query"] = subscription_query
-
-                try:
-                    response = await saleor_client.execute(
-                        CREATE_WEBHOOK,
-                        variables={"input": webhook_input},
-                    )
-                except GraphQLError as exc:
-                    errors.append(exc)
 
+        async def create(target_url, event_types, subscription_query):
+            webhook_input = {
+                "targetUrl": target_url,
+                "events": event_types,
+                "name": f"{manifest.name}",
+                "secretKey": secret_key,
+            }
+
+            if subscription_query:
+                webhook_input["query"] = subscription_query
+
+            async with semaphore:
+                return await create_webhook(saleor_client, webhook_input)
+
+        results = await asyncio.gather(
+            *(create(*webhook) for webhook in group_webhook_events(events)),
+            return_exceptions=True,
+        )
+
+    errors = [result for result in results if isinstance(result, BaseException)]
     if errors:
         logger.error("Unable to finish installation of app for %s.", saleor_domain)
         logger.debug(
@@ -58,7 +102,14 @@ async def install_app(
             saleor_domain,
             list(map(str, errors)),
         )
-        raise InstallAppError("Failed to create webhooks for %s.", saleor_domain)
+        error = InstallAppError(
+            f"Failed to create webhooks for {saleor_domain}.", errors
+        )
+        unexpected = [exc for exc in errors if not isinstance(exc, GraphQLError)]
+        if unexpected:
+            raise error from unexpected[0]
+        raise error
 
-    saleor_webhook_id = response["webhookCreate"]["webhook"]["id"]
-    return WebhookData(webhook_id=saleor_webhook_id, webhook_secret_key=secret_key)
+    return WebhookData(
+        webhook_id=results[-1], webhook_ids=results, webhook_secret_key=secret_key
+    )
@@ -0,0 +1,230 @@
+"""
+Counters and histograms of the framework's hot paths, rendered in the
+Prometheus text exposition format by the `/metrics` route, see
+`SaleorApp.include_metrics_route`.
+"""
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from saleor_app.cache import TTLCache
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# The `saleor_domain` label of webhooks that failed the signature check, the
+# header of unauthenticated requests would let anyone add new series
+UNVERIFIED_DOMAIN = "unverified"
+
+OPERATION_RE = re.compile(r"^\s*(query|mutation|subscription)\s+(\w+)")
+
+Labels = Tuple[str, ...]
+
+
+@lru_cache(maxsize=256)
+def get_operation_name(query: str) -> str:
+    """The name of the GraphQL operation, `anonymous` for unnamed ones."""
+    match = OPERATION_RE.match(query)
+    return match.group(2) if match else "anonymous"
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{escape_label_value(str(value))}"'
+        for name, value in zip(names, values)
+    )
+    return f"{{{pairs}}}"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Labels = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: Dict[Labels, float] = defaultdict(int)
+
+    def inc(self, labels: Labels = (), amount: float = 1):
+        self.values[labels] += amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self.values.items():
+            yield (
+                f"{self.name}{format_labels(self.labelnames, labels)} "
+                f"{format_value(value)}"
+            )
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Labels = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # Per labels: the count of each bucket (not cumulative, the last one
+        # is +Inf) and the sum of observed values
+        self.counts: Dict[Labels, List[int]] = {}
+        self.sums: Dict[Labels, float] = defaultdict(float)
+
+    def observe(self, value: float, labels: Labels = ()):
+        try:
+            counts = self.counts[labels]
+        except KeyError:
+            counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[labels] += value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        names = self.labelnames + ("le",)
+        for labels, counts in self.counts.items():
+            total = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                total += count
+                yield (
+                    f"{self.name}_bucket"
+                    f"{format_labels(names, labels + (format_value(bound),))} {total}"
+                )
+            rendered_labels = format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{rendered_labels} {format_value(self.sums[labels])}"
+            yield f"{self.name}_count{rendered_labels} {total}"
+
+
+class Metrics:
+    """
+    The framework's metrics: webhooks per event type, domain and status with
+    the time spent in each stage of handling them, app installs and GraphQL
+    calls to Saleor per operation name. Hit rates of the app's caches are
+    read from the caches when rendering.
+    """
+
+    enabled = True
+
+    def __init__(
+        self, prefix: str = "saleor_app", buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.prefix = prefix
+        self.webhooks = Counter(
+            f"{prefix}_webhooks_total",
+            "Webhooks received.",
+            ("event", "saleor_domain", "status"),
+        )
+        self.webhook_duration = Histogram(
+            f"{prefix}_webhook_duration_seconds",
+            "Time spent handling webhooks, per stage.",
+            ("event", "stage"),
+            buckets,
+        )
+        self.installs = Counter(
+            f"{prefix}_installs_total",
+            "App installations.",
+            ("saleor_domain", "status"),
+        )
+        self.install_duration = Histogram(
+            f"{prefix}_install_duration_seconds",
+            "Time spent installing the app.",
+            ("status",),
+            buckets,
+        )
+        self.saleor_requests = Counter(
+            f"{prefix}_saleor_requests_total",
+            "GraphQL calls to Saleor.",
+            ("operation", "status"),
+        )
+        self.saleor_request_duration = Histogram(
+            f"{prefix}_saleor_request_duration_seconds",
+            "Time spent on GraphQL calls to Saleor, retries included.",
+            ("operation",),
+            buckets,
+        )
+
+    def observe_webhook(
+        self, event: str, saleor_domain: str, status: str, seconds: float
+    ):
+        self.webhooks.inc((event, saleor_domain, status))
+        self.webhook_duration.observe(seconds, (event, "total"))
+
+    def observe_webhook_stage(self, event: str, stage: str, seconds: float):
+        self.webhook_duration.observe(seconds, (event, stage))
+
+    def observe_install(self, saleor_domain: str, status: str, seconds: float):
+        self.installs.inc((saleor_domain, status))
+        self.install_duration.observe(seconds, (status,))
+
+    def observe_saleor_request(self, query: str, status: str, seconds: float):
+        operation = get_operation_name(query)
+        self.saleor_requests.inc((operation, status))
+        self.saleor_request_duration.observe(seconds, (operation,))
+
+    def render_caches(self, caches: Mapping[str, TTLCache]) -> Iterator[str]:
+        for kind, documentation in (
+            ("hits", "Cache lookups that found a live entry."),
+            ("misses", "Cache lookups that did not find a live entry."),
+        ):
+            name = f"{self.prefix}_cache_{kind}_total"
+            yield f"# HELP {name} {documentation}"
+            yield f"# TYPE {name} counter"
+            for cache_name, cache in caches.items():
+                yield f'{name}{{cache="{cache_name}"}} {getattr(cache, kind)}'
+
+    def render(self, caches: Optional[Mapping[str, TTLCache]] = None) -> str:
+        lines = []
+        for metric in (
+            self.webhooks,
+            self.webhook_duration,
+            self.installs,
+            self.install_duration,
+            self.saleor_requests,
+            self.saleor_request_duration,
+        ):
+            lines.extend(metric.render())
+        if caches:
+            lines.extend(self.render_caches(caches))
+        return "\n".join(lines) + "\n"
+
+
+class NoopMetrics(Metrics):
+    """Used until metrics are enabled, every call is a no-op."""
+
+    enabled = False
+
+    def __init__(self):
+        pass
+
+    def observe_webhook(self, event, saleor_domain, status, seconds):
+        pass
+
+    def observe_webhook_stage(self, event, stage, seconds):
+        pass
+
+    def observe_install(self, saleor_domain, status, seconds):
+        pass
+
+    def observe_saleor_request(self, query, status, seconds):
+        pass
+
+    def render(self, caches=None) -> str:
+        return ""
@@ -1,27 +1,156 @@
+import asyncio
 import logging
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple
 
 import aiohttp
 from aiohttp.client import ClientTimeout
 
+from saleor_app.metrics import Metrics, NoopMetrics, get_operation_name
 from saleor_app.saleor.exceptions import GraphQLError
+from saleor_app.saleor.persisted_queries import (
+    PersistedQuerySupport,
+    is_persisted_query_miss,
+    is_persisted_query_not_supported,
+    persisted_query_payload,
+)
+from saleor_app.saleor.retry import CircuitBreaker, RetryPolicy, is_mutation
+from saleor_app.tracing import NoopTracer, Tracer
+from saleor_app.utils import json_loads
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover
+    ijson = None
 
 logger = logging.getLogger("saleor.client")
 
 
+class SaleorSessionPool:
+    """
+    App-lifetime registry of `aiohttp.ClientSession` objects keyed by the
+    Saleor base url.
+
+    Sessions are created on first use and reused by every `SaleorClient`
+    pointed at the same Saleor instance, so the TCP connections (and TLS
+    handshakes) are kept alive between requests. The auth token is not part
+    of the session, each client sends its own headers with every call.
+
+    The pool also keeps a `CircuitBreaker` and a `PersistedQuerySupport` per
+    Saleor url, shared by all the clients of that instance.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 10,
+        keepalive_timeout: float = 30,
+        ttl_dns_cache: Optional[int] = 300,
+        failure_threshold: int = 5,
+        recovery_time: float = 30,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.sessions: Dict[str, aiohttp.ClientSession] = {}
+        self.circuit_breakers: Dict[str, CircuitBreaker] = {}
+        self.persisted_query_support: Dict[str, PersistedQuerySupport] = {}
+
+    def get_session(self, saleor_url: str) -> aiohttp.ClientSession:
+        session = self.sessions.get(saleor_url)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.ttl_dns_cache,
+            )
+            session = aiohttp.ClientSession(
+                base_url=saleor_url,
+                connector=connector,
+                raise_for_status=True,
+            )
+            self.sessions[saleor_url] = session
+        return session
+
+    def get_circuit_breaker(self, saleor_url: str) -> CircuitBreaker:
+        circuit_breaker = self.circuit_breakers.get(saleor_url)
+        if circuit_breaker is None:
+            circuit_breaker = self.circuit_breakers[saleor_url] = CircuitBreaker(
+                failure_threshold=self.failure_threshold,
+                recovery_time=self.recovery_time,
+            )
+        return circuit_breaker
+
+    def get_persisted_query_support(self, saleor_url: str) -> PersistedQuerySupport:
+        support = self.persisted_query_support.get(saleor_url)
+        if support is None:
+            support = self.persisted_query_support[saleor_url] = PersistedQuerySupport()
+        return support
+
+    async def close(self):
+        sessions, self.sessions = self.sessions, {}
+        for session in sessions.values():
+            await session.close()
+
+
 class SaleorClient:
-    def __init__(self, saleor_url, user_agent, auth_token=None, timeout=15):
+    def __init__(
+        self,
+        saleor_url,
+        user_agent,
+        auth_token=None,
+        timeout=15,
+        session: Optional[aiohttp.ClientSession] = None,
+        max_batch_size: int = 50,
+        persisted_queries: bool = False,
+        persisted_query_support: Optional[PersistedQuerySupport] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        deadline: Optional[float] = None,
+        metrics: Optional[Metrics] = None,
+        tracer: Optional[Tracer] = None,
+    ):
+        self.timeout = timeout
+        self.metrics = metrics or NoopMetrics()
+        self.tracer = tracer or NoopTracer()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker
+        self.deadline = deadline
+        self.max_batch_size = max_batch_size
+        self.persisted_queries = persisted_queries
+        self.persisted_query_support = (
+            persisted_query_support or PersistedQuerySupport()
+        )
+        self.pending_batch: List[Tuple[str, Any, asyncio.Future]] = []
+        self.batch_tasks: Set[asyncio.Task] = set()
         headers = {"User-Agent": user_agent}
         if auth_token:
             headers["Authorization"] = f"Bearer {auth_token}"
-        self.session = aiohttp.ClientSession(
-            base_url=saleor_url,
-            headers=headers,
-            raise_for_status=True,
-            timeout=ClientTimeout(total=timeout),
-        )
+        if session is None:
+            self.session = aiohttp.ClientSession(
+                base_url=saleor_url,
+                headers=headers,
+                raise_for_status=True,
+                timeout=ClientTimeout(total=timeout),
+            )
+            self.owns_session = True
+            self.request_kwargs = {}
+        else:
+            # A shared session, the per client settings go with each request
+            self.session = session
+            self.owns_session = False
+            self.request_kwargs = {
+                "headers": headers,
+                "timeout": ClientTimeout(total=timeout),
+            }
 
     async def close(self):
-        await self.session.close()
+        if self.owns_session:
+            await self.session.close()
 
     async def __aenter__(self) -> aiohttp.ClientSession:
         return self
@@ -34,16 +163,407 @@ class SaleorClient:
     ) -> None:
         await self.close()
 
-    async def execute(self, query, variables=None):
-        async with self.session.post(
-            url="/graphql/", json={"query": query, "variables": variables}
-        ) as resp:
-            response_data = await resp.json()
-            if errors := response_data.get("errors"):
-                exc = GraphQLError(
-                    errors=errors, response_data=response_data.get("data")
+    async def post(
+        self,
+        payload: Any,
+        idempotent: bool = False,
+        deadline: Optional[float] = None,
+    ) -> Any:
+        """
+        Posts the payload, retrying it according to the retry policy when
+        `idempotent`. `deadline` is the `time.monotonic()` by which the call
+        has to finish, it shortens the timeout and stops further retries.
+        """
+        deadline = self.deadline if deadline is None else deadline
+        delays = self.retry_policy.delays() if idempotent else iter(())
+        while True:
+            try:
+                return await self.post_once(payload, deadline)
+            except Exception as exc:
+                delay = next(delays, None)
+                if (
+                    delay is None
+                    or not self.retry_policy.should_retry(exc)
+                    or (deadline is not None and time.monotonic() + delay >= deadline)
+                ):
+                    raise
+                logger.warning("Retrying a GraphQL call to Saleor after %r", exc)
+                await asyncio.sleep(delay)
+
+    def get_request_kwargs(self, deadline: Optional[float]) -> Dict[str, Any]:
+        if deadline is None:
+            return self.request_kwargs
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise asyncio.TimeoutError()
+        return {
+            **self.request_kwargs,
+            "timeout": ClientTimeout(total=min(self.timeout, remaining)),
+        }
+
+    async def post_once(self, payload: Any, deadline: Optional[float]) -> Any:
+        request_kwargs = self.get_request_kwargs(deadline)
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_call()
+        with self.tracer.start_span("saleor_app.graphql_request") as span:
+            trace_headers: Dict[str, str] = {}
+            self.tracer.inject(trace_headers)
+            if trace_headers:
+                request_kwargs = {
+                    **request_kwargs,
+                    "headers": {**request_kwargs.get("headers", {}), **trace_headers},
+                }
+            try:
+                async with self.session.post(
+                    url="/graphql/",
+                    json=payload,
+                    **request_kwargs,
+                ) as resp:
+                    span.set_attribute("http.status_code", resp.status)
+                    response_data = await resp.json()
+            except BaseException as exc:
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record(exc)
+                raise
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record()
+        return response_data
+
+    def get_result(self, response_data: Dict[str, Any]) -> Any:
+        if errors := response_data.get("errors"):
+            exc = GraphQLError(errors=errors, response_data=response_data.get("data"))
+            logger.error("Error when executing a GraphQL call to Saleor")
+            logger.debug(str(exc))
+            raise exc
+        return response_data.get("data")
+
+    async def execute(
+        self,
+        query,
+        variables=None,
+        idempotent: Optional[bool] = None,
+        deadline: Optional[float] = None,
+    ):
+        """
+        Queries are retried on transient errors, mutations only when
+        `idempotent` is set.
+        """
+        options = {
+            "idempotent": not is_mutation(query) if idempotent is None else idempotent,
+            "deadline": deadline,
+        }
+        started_at = time.perf_counter()
+        status = "error"
+        try:
+            with self.tracer.start_span(
+                "saleor_app.graphql",
+                {"graphql.operation.name": get_operation_name(query)},
+            ):
+                response_data = await self.post_query(query, variables, **options)
+                status = "graphql_error" if response_data.get("errors") else "ok"
+                return self.get_result(response_data)
+        finally:
+            self.metrics.observe_saleor_request(
+                query, status, time.perf_counter() - started_at
+            )
+
+    async def post_query(self, query, variables, **options) -> Any:
+        support = self.persisted_query_support
+        if not (self.persisted_queries and support.supported):
+            return await self.post({"query": query, "variables": variables}, **options)
+        try:
+            response_data = await self.post(
+                persisted_query_payload(query, variables), **options
+            )
+        except aiohttp.ClientResponseError as exc:
+            # Saleor answers a request without the query text with a 400
+            if exc.status != 400:
+                raise
+            support.supported = False
+        else:
+            errors = response_data.get("errors") or []
+            if not is_persisted_query_miss(errors):
+                return response_data
+            if is_persisted_query_not_supported(errors):
+                support.supported = False
+        return await self.post(
+            persisted_query_payload(query, variables, include_query=True), **options
+        )
+
+    async def paginate(
+        self,
+        query: str,
+        variables: Optional[Dict[str, Any]] = None,
+        path: str = "",
+        page_size: int = 100,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yields the edges of a Relay connection, fetching the next page while
+        the current one is being consumed.
+
+        The query has to accept `$first` and `$after` variables and select
+        `pageInfo { hasNextPage endCursor }` of the connection found at the
+        dot separated `path` in the response data, e.g. `"channel.products"`.
+        """
+        variables = {**(variables or {}), "first": page_size}
+
+        async def fetch_page(after):
+            data = await self.execute(query, variables={**variables, "after": after})
+            for key in path.split(".") if path else []:
+                data = data[key]
+            return data
+
+        next_page = asyncio.ensure_future(fetch_page(None))
+        try:
+            while next_page is not None:
+                connection = await next_page
+                page_info = connection["pageInfo"]
+                next_page = (
+                    asyncio.ensure_future(fetch_page(page_info["endCursor"]))
+                    if page_info["hasNextPage"]
+                    else None
                 )
-                logger.error("Error when executing a GraphQL call to Saleor")
-                logger.debug(str(exc))
-                raise exc
-            return response_data.get("data")
+                for edge in connection["edges"]:
+                    yield edge
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    async def execute_stream(
+        self,
+        query,
+        variables=None,
+        path: str = "",
+        deadline: Optional[float] = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Yields the items of the list at the dot separated `path` in the
+        response data, e.g. `"products.edges"`.
+
+        With `ijson` installed the response is decoded incrementally and only
+        one item is held in memory at a time, otherwise it's read whole and
+        decoded with `json_loads`. Errors are only known once the whole
+        response was read, a `GraphQLError` is raised after the items.
+        A `ValueError` is raised if `path` points at something other than a
+        list. Streamed calls are not retried.
+        """
+        deadline = self.deadline if deadline is None else deadline
+        request_kwargs = self.get_request_kwargs(deadline)
+        keys = path.split(".") if path else []
+        errors = []
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_call()
+        try:
+            async with self.session.post(
+                url="/graphql/",
+                json={"query": query, "variables": variables},
+                **request_kwargs,
+            ) as resp:
+                if resp.status >= 400:
+                    # The session may not raise for status, don't decode an
+                    # error page
+                    resp.raise_for_status()
+                if ijson is not None:
+                    items = stream_items(resp.content, ".".join(["data", *keys]))
+                    async for prefix, item in items:
+                        if prefix == "errors":
+                            errors = item
+                        else:
+                            yield item
+                else:
+                    response_data = json_loads(await resp.read())
+                    errors = response_data.get("errors")
+                    data = response_data.get("data")
+                    del response_data
+                    for key in keys:
+                        data = data.get(key) if isinstance(data, dict) else None
+                    if data is not None and not isinstance(data, list):
+                        raise ValueError(f"data.{path} is not a list")
+                    for item in data or []:
+                        yield item
+        except BaseException as exc:
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record(exc)
+            raise
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record()
+        if errors:
+            exc = GraphQLError(errors=errors)
+            logger.error("Error when executing a GraphQL call to Saleor")
+            logger.debug(str(exc))
+            raise exc
+
+    async def execute_many(
+        self,
+        operations: Sequence[Tuple[str, Optional[Dict[str, Any]]]],
+        return_exceptions: bool = False,
+        idempotent: Optional[bool] = None,
+        deadline: Optional[float] = None,
+    ) -> List[Any]:
+        """
+        Sends `(query, variables)` operations in a single array-batched
+        request and returns their data in the same order.
+
+        The first `GraphQLError` is raised, unless `return_exceptions` is set,
+        then errors are returned in place of the data of failed operations.
+        When the server refuses the batch with a non-list body or a 400 the
+        operations are sent one by one with `execute` instead.
+        """
+        if not operations:
+            return []
+        started_at = time.perf_counter()
+        try:
+            response_data = await self.post(
+                [
+                    {"query": query, "variables": variables}
+                    for query, variables in operations
+                ],
+                idempotent=(
+                    not any(is_mutation(query) for query, _ in operations)
+                    if idempotent is None
+                    else idempotent
+                ),
+                deadline=deadline,
+            )
+        except aiohttp.ClientResponseError as exc:
+            if exc.status != 400:
+                self.observe_batch(operations, None, started_at)
+                raise
+            response_data = None
+        except BaseException:
+            self.observe_batch(operations, None, started_at)
+            raise
+        if not isinstance(response_data, list):
+            # The server doesn't support array batching
+            return await self.execute_each(
+                operations, return_exceptions, idempotent, deadline
+            )
+        self.observe_batch(operations, response_data, started_at)
+        if len(response_data) != len(operations):
+            raise GraphQLError(
+                errors=[{"message": "Invalid batch response"}],
+                response_data=response_data,
+            )
+
+        results = []
+        for item in response_data:
+            try:
+                results.append(self.get_result(item))
+            except GraphQLError as exc:
+                if not return_exceptions:
+                    raise
+                results.append(exc)
+        return results
+
+    async def execute_each(
+        self,
+        operations: Sequence[Tuple[str, Optional[Dict[str, Any]]]],
+        return_exceptions: bool,
+        idempotent: Optional[bool],
+        deadline: Optional[float],
+    ) -> List[Any]:
+        results = await asyncio.gather(
+            *(
+                self.execute(query, variables, idempotent=idempotent, deadline=deadline)
+                for query, variables in operations
+            ),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException) and not (
+                return_exceptions and isinstance(result, GraphQLError)
+            ):
+                raise result
+        return results
+
+    def observe_batch(
+        self,
+        operations: Sequence[Tuple[str, Optional[Dict[str, Any]]]],
+        response_data: Optional[List[Any]],
+        started_at: float,
+    ):
+        """Records the metrics of each operation sent in a batch."""
+        seconds = time.perf_counter() - started_at
+        if response_data is None or len(response_data) != len(operations):
+            response_data = [None] * len(operations)
+        for (query, _), item in zip(operations, response_data):
+            if not isinstance(item, dict):
+                status = "error"
+            elif item.get("errors"):
+                status = "graphql_error"
+            else:
+                status = "ok"
+            self.metrics.observe_saleor_request(query, status, seconds)
+
+    async def execute_batched(self, query, variables=None):
+        """
+        Like `execute`, but queries issued within the same event loop
+        iteration are sent together with `execute_many`. Each caller gets its
+        own data or `GraphQLError`.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self.pending_batch:
+            loop.call_soon(self.dispatch_batch)
+        self.pending_batch.append((query, variables, future))
+        return await future
+
+    def dispatch_batch(self):
+        batch, self.pending_batch = self.pending_batch, []
+        size = self.max_batch_size
+        for start in range(0, len(batch), size):
+            end = start + size
+            task = asyncio.ensure_future(self.resolve_batch(batch[start:end]))
+            self.batch_tasks.add(task)
+            task.add_done_callback(self.batch_tasks.discard)
+
+    async def resolve_batch(self, batch: List[Tuple[str, Any, asyncio.Future]]):
+        try:
+            if len(batch) == 1:
+                results = [await self.execute(batch[0][0], batch[0][1])]
+            else:
+                results = await self.execute_many(
+                    [(query, variables) for query, variables, _ in batch],
+                    return_exceptions=True,
+                )
+        except Exception as exc:
+            results = [exc] * len(batch)
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+async def stream_items(stream, prefix: str) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Incrementally decodes a GraphQL response with `ijson`, yields
+    `(prefix, item)` for every item of the list at `prefix` and
+    `("errors", errors)` if the response has errors. Raises `ValueError` if
+    the value at `prefix` is not a list.
+    """
+    items_prefix = f"{prefix}.item"
+    builder = None
+    depth = 0
+    async for current, event, value in ijson.parse_async(stream, use_float=True):
+        if current == prefix and event not in ("start_array", "end_array", "null"):
+            raise ValueError(f"{prefix} is not a list")
+        if builder is None:
+            if current not in (items_prefix, "errors"):
+                continue
+            if event not in ("start_map", "start_array"):
+                if current == items_prefix:
+                    yield current, value
+                continue
+            builder_prefix = current
+            builder = ijson.ObjectBuilder()
+        builder.event(event, value)
+        if event in ("start_map", "start_array"):
+            depth += 1
+        elif event in ("end_map", "end_array"):
+            depth -= 1
+        if depth == 0:
+            yield builder_prefix, builder.value
+            builder = None
@@ -25,3 +25,13 @@ class IgnoredPrincipal(Exception):
 
     def __init__(self, principal_ids: List[str]):
         super().__init__(self.message.format(",".join(principal_ids)))
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a Saleor instance that is failing
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Saleor is unavailable, retry in {retry_after:.1f}s.")
+        self.retry_after = retry_after
@@ -1,3 +1,5 @@
+from saleor_app.saleor.persisted_queries import precompute_hashes
+
 CREATE_WEBHOOK = """
 mutation WebhookCreate($input: WebhookCreateInput!) {
   webhookCreate(input: $input) {
@@ -25,3 +27,5 @@ mutation TokenVerify($token: String!) {
 }
 
 """
+
+precompute_hashes(CREATE_WEBHOOK, VERIFY_TOKEN)
@@ -0,0 +1,71 @@
+"""
+Automatic persisted queries, the query is sent as its sha256 hash and only
+sent in full when the server does not know the hash yet.
+"""
+import hashlib
+from functools import lru_cache
+from typing import Any, Dict, Optional, Sequence
+
+PERSISTED_QUERY_VERSION = 1
+PERSISTED_QUERY_ERRORS = {"PersistedQueryNotFound", "PersistedQueryNotSupported"}
+# What GraphQL servers without persisted queries, Saleor included, answer to
+# a request that only carries the hash
+MISSING_QUERY_ERRORS = {"Must provide a query string.", "Must provide query string."}
+
+
+class PersistedQuerySupport:
+    """
+    Whether a Saleor instance accepts persisted queries. It's assumed until
+    the server answers with `PersistedQueryNotSupported`, or rejects the
+    hash alone like Saleor does, from then on the clients sharing it send
+    full queries.
+    """
+
+    def __init__(self):
+        self.supported = True
+
+
+@lru_cache(maxsize=1024)
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+def precompute_hashes(*queries: str):
+    """Hashes the queries ahead of time, call it where queries are defined."""
+    for query in queries:
+        query_hash(query)
+
+
+def persisted_query_payload(
+    query: str, variables: Optional[Dict[str, Any]], include_query: bool = False
+) -> Dict[str, Any]:
+    payload = {
+        "variables": variables,
+        "extensions": {
+            "persistedQuery": {
+                "version": PERSISTED_QUERY_VERSION,
+                "sha256Hash": query_hash(query),
+            }
+        },
+    }
+    if include_query:
+        payload["query"] = query
+    return payload
+
+
+def is_persisted_query_not_supported(errors: Sequence[Dict[str, Any]]) -> bool:
+    return any(
+        error.get("message") == "PersistedQueryNotSupported"
+        or error.get("message") in MISSING_QUERY_ERRORS
+        or (error.get("extensions") or {}).get("code")
+        == "PERSISTED_QUERY_NOT_SUPPORTED"
+        for error in errors
+    )
+
+
+def is_persisted_query_miss(errors: Sequence[Dict[str, Any]]) -> bool:
+    return is_persisted_query_not_supported(errors) or any(
+        error.get("message") in PERSISTED_QUERY_ERRORS
+        or (error.get("extensions") or {}).get("code") == "PERSISTED_QUERY_NOT_FOUND"
+        for error in errors
+    )
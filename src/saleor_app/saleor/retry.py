@@ -0,0 +1,146 @@
+import asyncio
+import random
+import re
+import time
+from functools import lru_cache
+from typing import Callable, Collection, Iterator, Optional
+
+import aiohttp
+
+from saleor_app.saleor.exceptions import CircuitOpenError
+
+# Strings and comments, which can contain anything, including braces
+IGNORED_RE = re.compile(r'"""(?:\\"""|[^"]|"(?!""))*"""|"(?:\\.|[^"\\\n])*"|#[^\n\r]*')
+TOKEN_RE = re.compile(r"[{}()]|[_A-Za-z][_0-9A-Za-z]*")
+
+SAFE_DEFINITIONS = frozenset({"query", "subscription", "fragment"})
+
+
+@lru_cache(maxsize=256)
+def is_mutation(query: str) -> bool:
+    """
+    Whether the document may contain a mutation. Every top level definition
+    is checked, documents that can't be classified count as mutations so
+    they aren't retried.
+    """
+    depth = 0
+    operations = 0
+    in_definition = False
+    for token in TOKEN_RE.findall(IGNORED_RE.sub(" ", query)):
+        if token == "{" or token == "(":
+            if depth == 0 and not in_definition:
+                # The anonymous query shorthand, `{ ... }`
+                in_definition = True
+                operations += 1
+            depth += 1
+        elif token == "}" or token == ")":
+            depth -= 1
+            if depth < 0:
+                return True
+            if depth == 0 and token == "}":
+                in_definition = False
+        elif depth == 0 and not in_definition:
+            if token not in SAFE_DEFINITIONS:
+                return True
+            in_definition = True
+            operations += token != "fragment"
+    return depth != 0 or operations == 0
+
+
+class RetryPolicy:
+    """
+    Retries failed calls with a "full jitter" exponential backoff, every
+    delay is random between 0 and `base_delay * 2 ** attempt`, capped at
+    `max_delay`.
+
+    Connection errors, timeouts and `retry_statuses` responses are retried,
+    GraphQL errors are not.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.1,
+        max_delay: float = 2,
+        retry_statuses: Collection[int] = frozenset({429, 502, 503, 504}),
+        rng: Callable[[], float] = random.random,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = retry_statuses
+        self.rng = rng
+
+    def delays(self) -> Iterator[float]:
+        for attempt in range(self.max_attempts - 1):
+            yield self.rng() * min(self.max_delay, self.base_delay * 2**attempt)
+
+    def should_retry(self, exc: BaseException) -> bool:
+        if isinstance(exc, aiohttp.ClientResponseError):
+            return exc.status in self.retry_statuses
+        return isinstance(exc, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast with `CircuitOpenError` after `failure_threshold`
+    consecutive failures. After `recovery_time` seconds a single trial call
+    is let through, its success closes the circuit again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_time: float = 30,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def before_call(self):
+        if self.opened_at is None:
+            return
+        if self.trial_running or self.clock() - self.opened_at < self.recovery_time:
+            raise CircuitOpenError(self.opened_at + self.recovery_time - self.clock())
+        self.trial_running = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.trial_running or self.failures >= self.failure_threshold:
+            self.opened_at = self.clock()
+        self.trial_running = False
+
+    def record(self, exc: Optional[BaseException] = None):
+        """Records the outcome of a call, `exc` is what the call raised."""
+        if exc is None:
+            self.record_success()
+        elif not isinstance(exc, Exception):
+            # Cancelled, Saleor's health is unknown
+            self.trial_running = False
+        elif self.is_failure(exc):
+            self.record_failure()
+        else:
+            # Saleor did respond, e.g. with a 4xx
+            self.record_success()
+
+    @staticmethod
+    def is_failure(exc: BaseException) -> bool:
+        if isinstance(exc, aiohttp.ClientResponseError):
+            return exc.status >= 500
+        return isinstance(exc, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
@@ -1,8 +1,24 @@
-from saleor_app.saleor.client import SaleorClient
+from typing import Optional
+
+from saleor_app.saleor.client import SaleorClient, SaleorSessionPool
 from saleor_app.schemas.manifest import Manifest
 
 
-def get_client_for_app(saleor_url: str, manifest: Manifest, **kwargs) -> SaleorClient:
+def get_client_for_app(
+    saleor_url: str,
+    manifest: Manifest,
+    session_pool: Optional[SaleorSessionPool] = None,
+    **kwargs,
+) -> SaleorClient:
+    if session_pool is not None:
+        kwargs["session"] = session_pool.get_session(saleor_url)
+        kwargs.setdefault(
+            "circuit_breaker", session_pool.get_circuit_breaker(saleor_url)
+        )
+        kwargs.setdefault(
+            "persisted_query_support",
+            session_pool.get_persisted_query_support(saleor_url),
+        )
     return SaleorClient(
         saleor_url=saleor_url,
         user_agent=f"saleor_client/{manifest.id}-{manifest.version}",
@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import List
 
 from pydantic import BaseModel
 
@@ -10,6 +11,7 @@ Url = str
 class WebhookData(BaseModel):
     webhook_id: str
     webhook_secret_key: str
+    webhook_ids: List[str] = []
 
 
 class InstallData(BaseModel):
@@ -0,0 +1,104 @@
+from functools import lru_cache
+from inspect import Parameter, signature
+from typing import Any, Dict, Generic, Mapping, Type, TypeVar
+
+from pydantic import BaseModel, Extra, ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.errors import DictError, MissingError
+from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON, ModelField
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_MISSING = object()
+
+
+@lru_cache(maxsize=None)
+def supports_lazy_validation(model: Type[BaseModel]) -> bool:
+    """
+    Whether the fields of `model` can be validated one by one with the same
+    result as `model.parse_obj`. Root validators, validators reading the
+    `values` of other fields, `extra = "forbid"` and
+    `allow_population_by_field_name` need all the data at once.
+    """
+    if model.__pre_root_validators__ or model.__post_root_validators__:
+        return False
+    config = model.__config__
+    if config.extra == Extra.forbid or config.allow_population_by_field_name:
+        return False
+    for validators in model.__validators__.values():
+        for validator in validators:
+            parameters = signature(validator.func).parameters.values()
+            if any(
+                parameter.name == "values" or parameter.kind == Parameter.VAR_KEYWORD
+                for parameter in parameters
+            ):
+                return False
+    return True
+
+
+class LazyModel(Generic[ModelT]):
+    """
+    A read-only view of raw data as a Pydantic `model` where every field is
+    validated only when it's accessed for the first time.
+
+    Nested models (and lists of them) are wrapped in `LazyModel` too, so
+    reading `payload.order.id` does not validate the rest of the order.
+    Validation errors are raised as `ValidationError` on access. Models that
+    don't `supports_lazy_validation` are validated whole right away.
+    """
+
+    __slots__ = ("_model", "_data", "_values")
+
+    def __init__(self, model: Type[ModelT], data: Mapping[str, Any]):
+        if not isinstance(data, Mapping):
+            raise ValidationError([ErrorWrapper(DictError(), loc="__root__")], model)
+        self._model = model
+        self._data = data
+        self._values: Dict[str, Any] = {}
+        if not supports_lazy_validation(model):
+            instance = model.parse_obj(data)
+            self._values = {name: getattr(instance, name) for name in model.__fields__}
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        try:
+            field = self._model.__fields__[name]
+        except KeyError:
+            raise AttributeError(
+                f"'{self._model.__name__}' object has no attribute '{name}'"
+            )
+        value = self._values[name] = self._validate_field(field)
+        return value
+
+    def _validate_field(self, field: ModelField) -> Any:
+        raw = self._data.get(field.alias, _MISSING)
+        if raw is _MISSING:
+            if field.required:
+                raise ValidationError(
+                    [ErrorWrapper(MissingError(), loc=field.alias)], self._model
+                )
+            return field.get_default()
+
+        nested = field.type_
+        if isinstance(nested, type) and issubclass(nested, BaseModel):
+            if field.shape == SHAPE_SINGLETON and isinstance(raw, Mapping):
+                return LazyModel(nested, raw)
+            if field.shape == SHAPE_LIST and isinstance(raw, list):
+                return [LazyModel(nested, item) for item in raw]
+
+        value, errors = field.validate(raw, {}, loc=field.alias, cls=self._model)
+        if errors:
+            raise ValidationError([errors], self._model)
+        return value
+
+    def to_model(self) -> ModelT:
+        """Validates all the data at once and returns the actual model."""
+        return self._model.parse_obj(self._data)
+
+    def __repr__(self):
+        return f"LazyModel({self._model.__name__})"
@@ -64,3 +64,11 @@ class Manifest(BaseModel):
 
     class Config:
         allow_population_by_field_name = True
+
+    def lazy_urls(self) -> List[LazyUrl]:
+        """Returns all the lazy urls of the manifest and its extensions."""
+        return [field for _, field in self if isinstance(field, LazyUrl)] + [
+            extension.url
+            for extension in self.extensions
+            if isinstance(extension.url, LazyUrl)
+        ]
@@ -1,9 +1,37 @@
+from typing import Dict, Iterable, Mapping
+
 from fastapi import Request
-from starlette.routing import NoMatchFound
+from starlette.routing import BaseRoute, Mount
 
 from saleor_app.errors import ConfigurationError
 
 
+def build_route_index(routes: Iterable[BaseRoute], prefix: str = "") -> Dict[str, str]:
+    """
+    Maps the names of all the routes without path parameters to their paths,
+    mounted routes are included under the `mount_name:route_name` name.
+    """
+    index = {}
+    for route in routes:
+        if isinstance(route, Mount):
+            if route.name and "{" not in route.path:
+                mount_prefix = f"{prefix}{route.name}:"
+                for name, path in build_route_index(route.routes).items():
+                    index[f"{mount_prefix}{name}"] = f"{route.path}{path}"
+            continue
+        name = getattr(route, "name", None)
+        if name and not getattr(route, "param_convertors", None):
+            index[f"{prefix}{name}"] = route.path
+    return index
+
+
+def get_route_index(request: Request) -> Mapping[str, str]:
+    get_index = getattr(request.app, "get_route_index", None)
+    if get_index is not None:
+        return get_index()
+    return build_route_index(request.app.routes)
+
+
 class LazyUrl(str):
     """
     Used to declare a fully qualified url that is to be resolved when the
@@ -21,18 +49,20 @@ class LazyUrl(str):
     def validate(cls, v):
         return v
 
-    def resolve(self):
-        return self.request.url_for(self.name)
-
-    def __call__(self, request: Request):
-        self.request = request
+    def path(self, route_index: Mapping[str, str]) -> str:
         try:
-            return self.resolve()
-        except NoMatchFound:
+            return route_index[self.name]
+        except KeyError:
             raise ConfigurationError(
                 f"Failed to resolve a lazy url, check if an endpoint named '{self.name}' is defined."
             )
 
+    def resolve(self, base_url: str, route_index: Mapping[str, str]) -> str:
+        return f"{base_url.rstrip('/')}{self.path(route_index)}"
+
+    def __call__(self, request: Request):
+        return self.resolve(str(request.base_url), get_route_index(request))
+
     def __hash__(self):
         return hash(self.name)
 
@@ -56,8 +86,8 @@ class LazyPath(LazyUrl):
     maintain the same usage as the LazyUrl class.
     """
 
-    def resolve(self):
-        return self.request.app.url_path_for(self.name)
+    def resolve(self, base_url: str, route_index: Mapping[str, str]) -> str:
+        return self.path(route_index)
 
     def __str__(self):
         return f"LazyPath('{self.name}')"
@@ -1,8 +1,10 @@
 from datetime import datetime
 from enum import Enum
-from typing import Any, Optional, Union
+from typing import Any, List, Optional, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.errors import ListError
 from pydantic.fields import Field
 from pydantic.main import Extra
 
@@ -48,3 +50,36 @@ class WebhookV3(BaseModel):
 
 
 Webhook = Union[WebhookV3, WebhookV2, WebhookV1]
+
+WEBHOOK_V3_FIELDS = frozenset(WebhookV3.__fields__)
+
+
+def parse_webhook(data: Any, trusted: bool = False) -> Webhook:
+    """
+    Builds the `Webhook` model matching the payload format without trying
+    each member of the union in turn.
+
+    With `trusted` the models are built with `construct()` and not validated,
+    the nested `meta` is then left as a dict. Only use it for payloads with a
+    verified signature.
+    """
+    if isinstance(data, dict) and "meta" in data:
+        model = WebhookV3 if data.keys() <= WEBHOOK_V3_FIELDS else WebhookV2
+        if trusted:
+            return model.construct(**data)
+        try:
+            return model.parse_obj(data)
+        except ValidationError:
+            # Same as the union, a malformed meta falls back to the legacy format
+            pass
+    if trusted and isinstance(data, dict):
+        return WebhookV1.construct(**data)
+    return WebhookV1.parse_obj(data)
+
+
+def parse_webhooks(data: Any, trusted: bool = False) -> List[Webhook]:
+    if not isinstance(data, list):
+        raise ValidationError(
+            [ErrorWrapper(ListError(), loc="__root__")], model=WebhookV1
+        )
+    return [parse_webhook(item, trusted=trusted) for item in data]
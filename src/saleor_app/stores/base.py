@@ -0,0 +1,160 @@
+from typing import Collection, Dict, Optional, Protocol, Sequence
+
+from pydantic import BaseModel
+
+from saleor_app.cache import TTLCache
+from saleor_app.schemas.core import AppToken, DomainName, WebhookData
+
+
+class TenantData(BaseModel):
+    """What the app stores for every Saleor instance it is installed in."""
+
+    saleor_domain: DomainName
+    auth_token: AppToken
+    webhook_data: Optional[WebhookData] = None
+
+
+class TenantStore(Protocol):
+    """
+    Storage of the per Saleor instance data, the methods match the
+    callables `SaleorApp` takes, see `SaleorApp.from_tenant_store`.
+    """
+
+    async def validate_domain(self, saleor_domain: DomainName) -> bool:
+        ...
+
+    async def save_app_data(
+        self,
+        saleor_domain: DomainName,
+        auth_token: AppToken,
+        webhook_data: Optional[WebhookData],
+    ):
+        ...
+
+    async def get_tenants(
+        self, saleor_domains: Sequence[DomainName]
+    ) -> Dict[DomainName, TenantData]:
+        """Returns the data of the installed ones among `saleor_domains`."""
+        ...
+
+    async def delete_app_data(self, saleor_domain: DomainName):
+        ...
+
+    async def get_webhook_details(
+        self, saleor_domain: DomainName
+    ) -> Optional[WebhookData]:
+        ...
+
+    async def get_app_token(self, saleor_domain: DomainName) -> Optional[AppToken]:
+        ...
+
+
+class AllowedDomainsMixin:
+    """
+    `validate_domain` of the bundled stores, any domain is valid when
+    `allowed_domains` is `None`.
+    """
+
+    allowed_domains: Optional[Collection[DomainName]] = None
+
+    async def validate_domain(self, saleor_domain: DomainName) -> bool:
+        return self.allowed_domains is None or saleor_domain in self.allowed_domains
+
+
+class TenantLookupMixin:
+    """Single tenant reads on top of `get_tenants`."""
+
+    async def get_tenant(self, saleor_domain: DomainName) -> Optional[TenantData]:
+        return (await self.get_tenants([saleor_domain])).get(saleor_domain)
+
+    async def get_webhook_details(
+        self, saleor_domain: DomainName
+    ) -> Optional[WebhookData]:
+        tenant = await self.get_tenant(saleor_domain)
+        return tenant.webhook_data if tenant is not None else None
+
+    async def get_app_token(self, saleor_domain: DomainName) -> Optional[AppToken]:
+        tenant = await self.get_tenant(saleor_domain)
+        return tenant.auth_token if tenant is not None else None
+
+
+_MISSING = TenantData(saleor_domain="", auth_token="")
+
+
+class CachedTenantStore(TenantLookupMixin):
+    """
+    Read-through cache in front of another `TenantStore`.
+
+    A tenant is loaded once per `ttl` for both its webhook details and app
+    token, domains that are not installed are remembered for `negative_ttl`.
+    Concurrent misses share a single load and writes made through the cache
+    invalidate it.
+    """
+
+    def __init__(self, store: TenantStore, ttl: float = 300, negative_ttl: float = 5):
+        self.store = store
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.tenants = TTLCache(maxsize=4096, ttl=ttl)
+        self.valid_domains = TTLCache(maxsize=4096, ttl=ttl)
+
+    async def validate_domain(self, saleor_domain: DomainName) -> bool:
+        async def load():
+            if await self.store.validate_domain(saleor_domain):
+                return True
+            self.valid_domains.set(saleor_domain, False, ttl=self.negative_ttl)
+            return None
+
+        return bool(await self.valid_domains.get_or_load(saleor_domain, load))
+
+    async def load_tenant(self, saleor_domain: DomainName) -> Optional[TenantData]:
+        tenant = (await self.store.get_tenants([saleor_domain])).get(saleor_domain)
+        if tenant is None:
+            self.tenants.set(saleor_domain, _MISSING, ttl=self.negative_ttl)
+            return None
+        return tenant
+
+    async def get_tenants(
+        self, saleor_domains: Sequence[DomainName]
+    ) -> Dict[DomainName, TenantData]:
+        tenants = {}
+        missing = []
+        for saleor_domain in saleor_domains:
+            tenant = self.tenants.get(saleor_domain)
+            if tenant is None:
+                missing.append(saleor_domain)
+            elif tenant is not _MISSING:
+                tenants[saleor_domain] = tenant
+        if len(missing) == 1:
+            tenant = await self.tenants.get_or_load(
+                missing[0], lambda: self.load_tenant(missing[0])
+            )
+            if tenant is not None and tenant is not _MISSING:
+                tenants[missing[0]] = tenant
+        elif missing:
+            loaded = await self.store.get_tenants(missing)
+            for saleor_domain in missing:
+                tenant = loaded.get(saleor_domain)
+                if tenant is None:
+                    self.tenants.set(saleor_domain, _MISSING, ttl=self.negative_ttl)
+                else:
+                    self.tenants.set(saleor_domain, tenant)
+                    tenants[saleor_domain] = tenant
+        return tenants
+
+    async def save_app_data(
+        self,
+        saleor_domain: DomainName,
+        auth_token: AppToken,
+        webhook_data: Optional[WebhookData],
+    ):
+        await self.store.save_app_data(saleor_domain, auth_token, webhook_data)
+        self.invalidate(saleor_domain)
+
+    async def delete_app_data(self, saleor_domain: DomainName):
+        await self.store.delete_app_data(saleor_domain)
+        self.invalidate(saleor_domain)
+
+    def invalidate(self, saleor_domain: DomainName):
+        self.tenants.pop(saleor_domain)
+        self.valid_domains.pop(saleor_domain)
@@ -0,0 +1,39 @@
+from typing import Collection, Dict, Optional, Sequence
+
+from saleor_app.schemas.core import AppToken, DomainName, WebhookData
+from saleor_app.stores.base import AllowedDomainsMixin, TenantData, TenantLookupMixin
+
+
+class InMemoryTenantStore(AllowedDomainsMixin, TenantLookupMixin):
+    """
+    Keeps the tenants in a dict, meant for tests and development as the data
+    is lost when the process exits.
+    """
+
+    def __init__(self, allowed_domains: Optional[Collection[DomainName]] = None):
+        self.allowed_domains = allowed_domains
+        self.tenants: Dict[DomainName, TenantData] = {}
+
+    async def save_app_data(
+        self,
+        saleor_domain: DomainName,
+        auth_token: AppToken,
+        webhook_data: Optional[WebhookData],
+    ):
+        self.tenants[saleor_domain] = TenantData(
+            saleor_domain=saleor_domain,
+            auth_token=auth_token,
+            webhook_data=webhook_data,
+        )
+
+    async def get_tenants(
+        self, saleor_domains: Sequence[DomainName]
+    ) -> Dict[DomainName, TenantData]:
+        return {
+            saleor_domain: self.tenants[saleor_domain]
+            for saleor_domain in saleor_domains
+            if saleor_domain in self.tenants
+        }
+
+    async def delete_app_data(self, saleor_domain: DomainName):
+        self.tenants.pop(saleor_domain, None)
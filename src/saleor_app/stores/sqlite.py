@@ -0,0 +1,189 @@
+import asyncio
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Collection, Dict, List, Optional, Sequence, TypeVar
+
+from saleor_app.errors import ConfigurationError
+from saleor_app.schemas.core import AppToken, DomainName, WebhookData
+from saleor_app.stores.base import AllowedDomainsMixin, TenantData, TenantLookupMixin
+
+T = TypeVar("T")
+
+TABLE_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+MAX_QUERY_PARAMS = 500  # stays below SQLITE_MAX_VARIABLE_NUMBER on old builds
+
+
+class SQLiteConnectionPool:
+    """
+    Runs blocking `sqlite3` calls in a dedicated thread pool, each call gets
+    a connection of its own out of at most `size` reused ones.
+    """
+
+    def __init__(self, database: str, size: int = 4, timeout: float = 5):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(
+            max_workers=size, thread_name_prefix="saleor-app-sqlite"
+        )
+        self.idle: Optional[asyncio.Queue] = None
+        self.connections: List[sqlite3.Connection] = []
+        self.opened = 0
+
+    def connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.database, timeout=self.timeout, check_same_thread=False
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    async def acquire(self) -> sqlite3.Connection:
+        if self.idle is None:
+            self.idle = asyncio.Queue()
+        if self.idle.empty() and self.opened < self.size:
+            # Count it before connecting so the pool never overgrows
+            self.opened += 1
+            try:
+                connection = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self.connect
+                )
+            except BaseException:
+                self.opened -= 1
+                raise
+            self.connections.append(connection)
+            return connection
+        return await self.idle.get()
+
+    def release(self, connection: sqlite3.Connection):
+        self.idle.put_nowait(connection)
+
+    async def run(self, func: Callable[[sqlite3.Connection], T]) -> T:
+        connection = await self.acquire()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, func, connection
+            )
+        finally:
+            self.release(connection)
+
+    async def close(self):
+        connections, self.connections = self.connections, []
+        self.idle = None
+        self.opened = 0
+        for connection in connections:
+            connection.close()
+        self.executor.shutdown(wait=False)
+
+
+class SQLiteTenantStore(AllowedDomainsMixin, TenantLookupMixin):
+    """
+    Keeps the tenants in an SQLite database file, the table is created on
+    first use.
+    """
+
+    def __init__(
+        self,
+        database: str,
+        allowed_domains: Optional[Collection[DomainName]] = None,
+        pool_size: int = 4,
+        table: str = "saleor_app_tenants",
+    ):
+        if not TABLE_NAME_RE.match(table):
+            raise ConfigurationError(f"Invalid SQLite table name {table!r}.")
+        self.allowed_domains = allowed_domains
+        self.table = table
+        self.pool = SQLiteConnectionPool(database, size=pool_size)
+        self.created = False
+        self.create_lock: Optional[asyncio.Lock] = None
+
+    def create_table(self, connection: sqlite3.Connection):
+        with connection:
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "saleor_domain TEXT PRIMARY KEY, "
+                "auth_token TEXT NOT NULL, "
+                "webhook_data TEXT"
+                ")"
+            )
+
+    async def run(self, func: Callable[[sqlite3.Connection], T]) -> T:
+        if not self.created:
+            if self.create_lock is None:
+                self.create_lock = asyncio.Lock()
+            async with self.create_lock:
+                if not self.created:
+                    await self.pool.run(self.create_table)
+                    self.created = True
+        return await self.pool.run(func)
+
+    async def save_app_data(
+        self,
+        saleor_domain: DomainName,
+        auth_token: AppToken,
+        webhook_data: Optional[WebhookData],
+    ):
+        row = (
+            saleor_domain,
+            auth_token,
+            webhook_data.json() if webhook_data is not None else None,
+        )
+
+        def save(connection: sqlite3.Connection):
+            with connection:
+                connection.execute(
+                    f"INSERT INTO {self.table} "
+                    "(saleor_domain, auth_token, webhook_data) VALUES (?, ?, ?) "
+                    "ON CONFLICT(saleor_domain) DO UPDATE SET "
+                    "auth_token = excluded.auth_token, "
+                    "webhook_data = excluded.webhook_data",
+                    row,
+                )
+
+        await self.run(save)
+
+    async def get_tenants(
+        self, saleor_domains: Sequence[DomainName]
+    ) -> Dict[DomainName, TenantData]:
+        saleor_domains = list(dict.fromkeys(saleor_domains))
+
+        def select(connection: sqlite3.Connection) -> List[Any]:
+            rows = []
+            for start in range(0, len(saleor_domains), MAX_QUERY_PARAMS):
+                end = start + MAX_QUERY_PARAMS
+                chunk = saleor_domains[start:end]
+                rows.extend(
+                    connection.execute(
+                        "SELECT saleor_domain, auth_token, webhook_data "
+                        f"FROM {self.table} WHERE saleor_domain IN "
+                        f"({', '.join('?' * len(chunk))})",
+                        chunk,
+                    )
+                )
+            return rows
+
+        if not saleor_domains:
+            return {}
+        return {
+            saleor_domain: TenantData(
+                saleor_domain=saleor_domain,
+                auth_token=auth_token,
+                webhook_data=(
+                    WebhookData.parse_raw(webhook_data) if webhook_data else None
+                ),
+            )
+            for saleor_domain, auth_token, webhook_data in await self.run(select)
+        }
+
+    async def delete_app_data(self, saleor_domain: DomainName):
+        def delete(connection: sqlite3.Connection):
+            with connection:
+                connection.execute(
+                    f"DELETE FROM {self.table} WHERE saleor_domain = ?",
+                    (saleor_domain,),
+                )
+
+        await self.run(delete)
+
+    async def close(self):
+        await self.pool.close()
@@ -1,6 +1,11 @@
+import base64
 from unittest.mock import AsyncMock, Mock, create_autospec
 
+import aiohttp
 import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt import JWT, jwk_from_dict, jwk_from_pem
 
 from saleor_app.app import SaleorApp
 from saleor_app.schemas.handlers import SaleorEventType, SQSUrl
@@ -19,6 +24,52 @@ def aws_settings():
     )
 
 
+@pytest.fixture
+def make_jwt():
+    key = jwk_from_dict(
+        {"kty": "oct", "k": base64.urlsafe_b64encode(b"secret").decode("utf-8")}
+    )
+
+    def _make_jwt(payload):
+        return JWT().encode(payload, key)
+
+    return _make_jwt
+
+
+@pytest.fixture(scope="session")
+def rsa_jwk():
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return jwk_from_pem(
+        private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+
+
+@pytest.fixture
+def jwks(rsa_jwk):
+    return {"keys": [{**rsa_jwk.to_dict(public_only=True), "kid": "key-1"}]}
+
+
+@pytest.fixture
+def make_signed_jwt(rsa_jwk):
+    def _make_signed_jwt(payload, kid="key-1"):
+        return JWT().encode(
+            payload, rsa_jwk, alg="RS256", optional_headers={"kid": kid}
+        )
+
+    return _make_signed_jwt
+
+
+@pytest.fixture
+def jwks_session(jwks):
+    session = AsyncMock(aiohttp.ClientSession)
+    session.get.return_value.__aenter__.return_value.json.return_value = jwks
+    return session
+
+
 @pytest.fixture
 def manifest():
     return Manifest(
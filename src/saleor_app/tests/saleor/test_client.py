@@ -1,11 +1,18 @@
-from unittest.mock import AsyncMock
+import asyncio
+import io
+import json
+from unittest.mock import AsyncMock, Mock, call
 
 import aiohttp
 import pytest
 from aiohttp import ClientTimeout
 
-from saleor_app.saleor.client import SaleorClient
-from saleor_app.saleor.exceptions import GraphQLError
+from saleor_app.metrics import Metrics
+from saleor_app.saleor.client import SaleorClient, SaleorSessionPool
+from saleor_app.saleor.exceptions import CircuitOpenError, GraphQLError
+from saleor_app.saleor.persisted_queries import persisted_query_payload
+from saleor_app.saleor.retry import CircuitBreaker, RetryPolicy
+from saleor_app.tracing import TRACEPARENT_HEADER, InMemoryTracer
 
 
 @pytest.mark.parametrize(
@@ -69,18 +76,754 @@ async def test_execute(monkeypatch):
     )
 
 
-async def test_execute_error(monkeypatch):
+async def test_execute_error():
     mock_session = AsyncMock(aiohttp.ClientSession)
     mock_session.post.return_value.__aenter__.return_value.json.return_value = {
         "data": "response_data",
         "errors": [{"message": "there are errors"}],
     }
     async with SaleorClient(
-        saleor_url="http://saleor.local", user_agent="test"
+        saleor_url="http://saleor.local", user_agent="test", session=mock_session
     ) as saleor:
-        monkeypatch.setattr(saleor, "session", mock_session, raising=True)
         with pytest.raises(GraphQLError) as excinfo:
             await saleor.execute("QUERY", variables={"test": "value"})
 
     assert excinfo.value.errors == [{"message": "there are errors"}]
     assert excinfo.value.response_data == "response_data"
+
+
+async def test_session_pool_reuses_session_per_url():
+    pool = SaleorSessionPool(limit_per_host=5, keepalive_timeout=10)
+
+    session = pool.get_session("http://saleor.local")
+
+    assert pool.get_session("http://saleor.local") is session
+    assert pool.get_session("http://other.saleor.local") is not session
+    assert session.connector.limit_per_host == 5
+
+    await pool.close()
+
+    assert session.closed
+    assert pool.sessions == {}
+
+
+async def test_session_pool_replaces_closed_session():
+    pool = SaleorSessionPool()
+    session = pool.get_session("http://saleor.local")
+    await session.close()
+
+    assert pool.get_session("http://saleor.local") is not session
+
+    await pool.close()
+
+
+async def test_shared_session_client():
+    pool = SaleorSessionPool()
+    session = pool.get_session("http://saleor.local")
+
+    async with SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        auth_token="token",
+        timeout=5,
+        session=session,
+    ) as saleor:
+        assert saleor.session is session
+        assert "Authorization" not in session.headers
+        assert saleor.request_kwargs == {
+            "headers": {"User-Agent": "test", "Authorization": "Bearer token"},
+            "timeout": ClientTimeout(5),
+        }
+
+    assert not session.closed
+
+    await pool.close()
+
+
+async def test_execute_shared_session():
+    mock_session = AsyncMock(aiohttp.ClientSession)
+    mock_session.post.return_value.__aenter__.return_value.json.return_value = {
+        "data": "response_data"
+    }
+    async with SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        auth_token="token",
+        session=mock_session,
+    ) as saleor:
+        assert await saleor.execute("QUERY") == "response_data"
+
+    mock_session.post.assert_called_once_with(
+        url="/graphql/",
+        json={"query": "QUERY", "variables": None},
+        headers={"User-Agent": "test", "Authorization": "Bearer token"},
+        timeout=ClientTimeout(15),
+    )
+    mock_session.close.assert_not_awaited()
+
+
+@pytest.fixture
+def batch_session():
+    mock_session = AsyncMock(aiohttp.ClientSession)
+
+    async def json():
+        payload = mock_session.post.call_args.kwargs["json"]
+        if isinstance(payload, dict):
+            return respond(payload)
+        return [respond(operation) for operation in payload]
+
+    def respond(operation):
+        if operation["query"] == "FAIL":
+            return {"data": None, "errors": [{"message": "failed"}]}
+        return {"data": {"query": operation["query"], **operation["variables"]}}
+
+    mock_session.post.return_value.__aenter__.return_value.json.side_effect = json
+    return mock_session
+
+
+async def test_execute_many(batch_session):
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local", user_agent="test", session=batch_session
+    )
+
+    assert await saleor.execute_many(
+        [("QUERY_1", {"id": "1"}), ("QUERY_2", {"id": "2"})]
+    ) == [{"query": "QUERY_1", "id": "1"}, {"query": "QUERY_2", "id": "2"}]
+
+    batch_session.post.assert_called_once_with(
+        url="/graphql/",
+        json=[
+            {"query": "QUERY_1", "variables": {"id": "1"}},
+            {"query": "QUERY_2", "variables": {"id": "2"}},
+        ],
+        headers={"User-Agent": "test"},
+        timeout=ClientTimeout(15),
+    )
+
+
+async def test_execute_many_errors(batch_session):
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local", user_agent="test", session=batch_session
+    )
+    operations = [("QUERY_1", {"id": "1"}), ("FAIL", {})]
+
+    with pytest.raises(GraphQLError):
+        await saleor.execute_many(operations)
+
+    data, error = await saleor.execute_many(operations, return_exceptions=True)
+    assert data == {"query": "QUERY_1", "id": "1"}
+    assert isinstance(error, GraphQLError)
+    assert error.errors == [{"message": "failed"}]
+
+
+@pytest.fixture
+def unbatched_session():
+    """A server without array batching, answering with `refusal`."""
+    mock_session = AsyncMock(aiohttp.ClientSession)
+    resp = mock_session.post.return_value.__aenter__.return_value
+
+    async def json():
+        payload = mock_session.post.call_args.kwargs["json"]
+        if isinstance(payload, list):
+            return await mock_session.refusal()
+        return {"data": {"query": payload["query"]}}
+
+    resp.json.side_effect = json
+    return mock_session
+
+
+@pytest.mark.parametrize(
+    "refusal",
+    (
+        AsyncMock(return_value={"errors": [{"message": "Batching is not supported"}]}),
+        AsyncMock(side_effect=aiohttp.ClientResponseError(Mock(), (), status=400)),
+    ),
+)
+async def test_execute_many_rejected_batch(unbatched_session, refusal):
+    unbatched_session.refusal = refusal
+    metrics = Metrics()
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        session=unbatched_session,
+        metrics=metrics,
+    )
+
+    assert await saleor.execute_many(
+        [("query One { one }", {}), ("query Two { two }", {})]
+    ) == [{"query": "query One { one }"}, {"query": "query Two { two }"}]
+
+    assert [call.kwargs["json"] for call in unbatched_session.post.call_args_list] == [
+        [
+            {"query": "query One { one }", "variables": {}},
+            {"query": "query Two { two }", "variables": {}},
+        ],
+        {"query": "query One { one }", "variables": {}},
+        {"query": "query Two { two }", "variables": {}},
+    ]
+    assert metrics.saleor_requests.values == {("One", "ok"): 1, ("Two", "ok"): 1}
+
+
+async def test_execute_many_rejected_batch_server_error(unbatched_session):
+    unbatched_session.refusal = AsyncMock(
+        side_effect=aiohttp.ClientResponseError(Mock(), (), status=500)
+    )
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        session=unbatched_session,
+        retry_policy=RetryPolicy(max_attempts=1),
+    )
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        await saleor.execute_many([("QUERY_1", {}), ("QUERY_2", {})])
+
+    assert unbatched_session.post.call_count == 1
+
+
+async def test_execute_many_metrics(batch_session):
+    metrics = Metrics()
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        session=batch_session,
+        metrics=metrics,
+    )
+
+    await saleor.execute_many(
+        [("query Products { products }", {}), ("FAIL", {})], return_exceptions=True
+    )
+
+    assert metrics.saleor_requests.values == {
+        ("Products", "ok"): 1,
+        ("anonymous", "graphql_error"): 1,
+    }
+    assert sum(metrics.saleor_request_duration.counts[("Products",)]) == 1
+
+
+async def test_execute_batched(batch_session):
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        session=batch_session,
+        max_batch_size=2,
+    )
+
+    results = await asyncio.gather(
+        saleor.execute_batched("QUERY_1", {"id": "1"}),
+        saleor.execute_batched("FAIL", {}),
+        saleor.execute_batched("QUERY_3", {"id": "3"}),
+        return_exceptions=True,
+    )
+
+    assert results[0] == {"query": "QUERY_1", "id": "1"}
+    assert isinstance(results[1], GraphQLError)
+    assert results[2] == {"query": "QUERY_3", "id": "3"}
+    assert [call.kwargs["json"] for call in batch_session.post.call_args_list] == [
+        [
+            {"query": "QUERY_1", "variables": {"id": "1"}},
+            {"query": "FAIL", "variables": {}},
+        ],
+        {"query": "QUERY_3", "variables": {"id": "3"}},
+    ]
+
+
+async def test_execute_batched_transport_error():
+    mock_session = AsyncMock(aiohttp.ClientSession)
+    mock_session.post.side_effect = aiohttp.ClientConnectionError()
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        session=mock_session,
+        retry_policy=RetryPolicy(max_attempts=1),
+    )
+
+    results = await asyncio.gather(
+        saleor.execute_batched("QUERY_1"),
+        saleor.execute_batched("QUERY_2"),
+        return_exceptions=True,
+    )
+
+    assert mock_session.post.call_count == 1
+    assert all(isinstance(result, aiohttp.ClientConnectionError) for result in results)
+
+
+PRODUCTS_QUERY = "query Products($first: Int, $after: String) { ... }"
+
+
+@pytest.fixture
+def paginated_client(mocker):
+    pages = {
+        None: (["1", "2"], "c2", True),
+        "c2": (["3", "4"], "c4", True),
+        "c4": (["5"], "c5", False),
+    }
+
+    async def execute(query, variables=None):
+        ids, end_cursor, has_next_page = pages[variables["after"]]
+        return {
+            "channel": {
+                "products": {
+                    "edges": [{"node": {"id": id}} for id in ids],
+                    "pageInfo": {"hasNextPage": has_next_page, "endCursor": end_cursor},
+                }
+            }
+        }
+
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        session=AsyncMock(aiohttp.ClientSession),
+    )
+    mocker.patch.object(saleor, "execute", side_effect=execute)
+    return saleor
+
+
+async def test_paginate(paginated_client):
+    edges = [
+        edge
+        async for edge in paginated_client.paginate(
+            PRODUCTS_QUERY,
+            variables={"channel": "default"},
+            path="channel.products",
+            page_size=2,
+        )
+    ]
+
+    assert [edge["node"]["id"] for edge in edges] == ["1", "2", "3", "4", "5"]
+    assert paginated_client.execute.await_args_list == [
+        call(
+            PRODUCTS_QUERY, variables={"channel": "default", "first": 2, "after": after}
+        )
+        for after in (None, "c2", "c4")
+    ]
+
+
+async def test_paginate_prefetches_next_page(paginated_client):
+    pages = paginated_client.paginate(
+        PRODUCTS_QUERY, path="channel.products", page_size=2
+    )
+
+    assert (await pages.__anext__())["node"]["id"] == "1"
+    await asyncio.sleep(0)
+
+    assert paginated_client.execute.await_count == 2
+
+    await pages.aclose()
+
+
+async def test_execute_persisted_query():
+    mock_session = AsyncMock(aiohttp.ClientSession)
+    mock_session.post.return_value.__aenter__.return_value.json.return_value = {
+        "data": "response_data"
+    }
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        session=mock_session,
+        persisted_queries=True,
+    )
+
+    assert await saleor.execute("QUERY", {"id": "1"}) == "response_data"
+
+    assert mock_session.post.call_count == 1
+    assert mock_session.post.call_args.kwargs["json"] == persisted_query_payload(
+        "QUERY", {"id": "1"}
+    )
+
+
+async def test_execute_persisted_query_not_found():
+    mock_session = AsyncMock(aiohttp.ClientSession)
+    mock_session.post.return_value.__aenter__.return_value.json.side_effect = [
+        {"errors": [{"message": "PersistedQueryNotFound"}]},
+        {"data": "response_data"},
+    ]
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        session=mock_session,
+        persisted_queries=True,
+    )
+
+    assert await saleor.execute("QUERY", {"id": "1"}) == "response_data"
+
+    assert [call.kwargs["json"] for call in mock_session.post.call_args_list] == [
+        persisted_query_payload("QUERY", {"id": "1"}),
+        persisted_query_payload("QUERY", {"id": "1"}, include_query=True),
+    ]
+
+
+async def test_execute_persisted_query_not_supported():
+    session_pool = SaleorSessionPool()
+    mock_session = AsyncMock(aiohttp.ClientSession)
+    mock_session.post.return_value.__aenter__.return_value.json.side_effect = [
+        {"errors": [{"message": "PersistedQueryNotSupported"}]},
+        {"data": "response_data"},
+        {"data": "response_data"},
+    ]
+    clients = [
+        SaleorClient(
+            saleor_url="http://saleor.local",
+            user_agent="test",
+            session=mock_session,
+            persisted_queries=True,
+            persisted_query_support=session_pool.get_persisted_query_support(
+                "http://saleor.local"
+            ),
+        )
+        for _ in range(2)
+    ]
+
+    for saleor in clients:
+        assert await saleor.execute("QUERY", {"id": "1"}) == "response_data"
+
+    assert [call.kwargs["json"] for call in mock_session.post.call_args_list] == [
+        persisted_query_payload("QUERY", {"id": "1"}),
+        persisted_query_payload("QUERY", {"id": "1"}, include_query=True),
+        {"query": "QUERY", "variables": {"id": "1"}},
+    ]
+
+
+async def test_execute_persisted_query_rejected_by_saleor():
+    mock_session = AsyncMock(aiohttp.ClientSession)
+    response = mock_session.post.return_value.__aenter__.return_value
+    # Pooled sessions raise for the 400 Saleor answers a hash only request with
+    mock_session.post.return_value.__aenter__.side_effect = [
+        aiohttp.ClientResponseError(None, (), status=400),
+        response,
+        response,
+    ]
+    response.json.return_value = {"data": "response_data"}
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        session=mock_session,
+        persisted_queries=True,
+    )
+
+    assert await saleor.execute("QUERY", {"id": "1"}) == "response_data"
+    assert await saleor.execute("QUERY", {"id": "1"}) == "response_data"
+
+    assert not saleor.persisted_query_support.supported
+    assert [call.kwargs["json"] for call in mock_session.post.call_args_list] == [
+        persisted_query_payload("QUERY", {"id": "1"}),
+        persisted_query_payload("QUERY", {"id": "1"}, include_query=True),
+        {"query": "QUERY", "variables": {"id": "1"}},
+    ]
+
+
+@pytest.fixture
+def flaky_session():
+    mock_session = AsyncMock(aiohttp.ClientSession)
+    mock_session.post.return_value.__aenter__.side_effect = [
+        aiohttp.ClientResponseError(None, (), status=502),
+        aiohttp.ClientConnectionError(),
+        mock_session.post.return_value.__aenter__.return_value,
+    ]
+    mock_session.post.return_value.__aenter__.return_value.json.return_value = {
+        "data": "response_data"
+    }
+    return mock_session
+
+
+@pytest.fixture
+def no_sleep(mocker):
+    return mocker.patch("saleor_app.saleor.client.asyncio.sleep")
+
+
+async def test_execute_retries_queries(flaky_session, no_sleep):
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        session=flaky_session,
+        retry_policy=RetryPolicy(max_attempts=3, base_delay=0.1, rng=lambda: 1),
+    )
+
+    assert await saleor.execute("query { shop { name } }") == "response_data"
+
+    assert flaky_session.post.call_count == 3
+    assert [call.args for call in no_sleep.await_args_list] == [(0.1,), (0.2,)]
+
+
+async def test_execute_does_not_retry_mutations(flaky_session, no_sleep):
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local", user_agent="test", session=flaky_session
+    )
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        await saleor.execute("mutation { tokenVerify }")
+
+    assert flaky_session.post.call_count == 1
+
+    assert await saleor.execute("mutation { tokenVerify }", idempotent=True) == (
+        "response_data"
+    )
+
+
+async def test_execute_retries_exhausted(flaky_session, no_sleep):
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        session=flaky_session,
+        retry_policy=RetryPolicy(max_attempts=2),
+    )
+
+    with pytest.raises(aiohttp.ClientConnectionError):
+        await saleor.execute("query { shop { name } }")
+
+    assert flaky_session.post.call_count == 2
+
+
+async def test_execute_circuit_breaker(flaky_session, no_sleep):
+    circuit_breaker = CircuitBreaker(failure_threshold=2)
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        session=flaky_session,
+        circuit_breaker=circuit_breaker,
+    )
+
+    with pytest.raises(CircuitOpenError):
+        await saleor.execute("query { shop { name } }")
+
+    assert flaky_session.post.call_count == 2
+    assert circuit_breaker.is_open
+
+
+async def test_execute_deadline(mocker):
+    mocker.patch("saleor_app.saleor.client.time.monotonic", return_value=100)
+    mock_session = AsyncMock(aiohttp.ClientSession)
+    mock_session.post.return_value.__aenter__.return_value.json.return_value = {
+        "data": "response_data"
+    }
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        timeout=15,
+        session=mock_session,
+    )
+
+    await saleor.execute("query { shop { name } }", deadline=105)
+    assert mock_session.post.call_args.kwargs["timeout"] == ClientTimeout(total=5)
+
+    await saleor.execute("query { shop { name } }", deadline=200)
+    assert mock_session.post.call_args.kwargs["timeout"] == ClientTimeout(total=15)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await saleor.execute("query { shop { name } }", deadline=100)
+    assert mock_session.post.call_count == 2
+
+
+async def test_execute_deadline_stops_retries(flaky_session, no_sleep, mocker):
+    mocker.patch("saleor_app.saleor.client.time.monotonic", return_value=100)
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        session=flaky_session,
+        retry_policy=RetryPolicy(base_delay=1, rng=lambda: 1),
+        deadline=100.5,
+    )
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        await saleor.execute("query { shop { name } }")
+
+    assert flaky_session.post.call_count == 1
+
+
+async def test_session_pool_circuit_breakers():
+    pool = SaleorSessionPool(failure_threshold=3, recovery_time=5)
+
+    circuit_breaker = pool.get_circuit_breaker("http://saleor.local")
+
+    assert pool.get_circuit_breaker("http://saleor.local") is circuit_breaker
+    assert pool.get_circuit_breaker("http://other.saleor.local") is not (
+        circuit_breaker
+    )
+    assert circuit_breaker.failure_threshold == 3
+    assert circuit_breaker.recovery_time == 5
+
+
+def test_session_pool_persisted_query_support():
+    pool = SaleorSessionPool()
+
+    support = pool.get_persisted_query_support("http://saleor.local")
+
+    assert support.supported
+    assert pool.get_persisted_query_support("http://saleor.local") is support
+    assert pool.get_persisted_query_support("http://other.saleor.local") is not (
+        support
+    )
+
+
+class FakeStream:
+    def __init__(self, data: bytes):
+        self.buffer = io.BytesIO(data)
+
+    async def read(self, size=-1):
+        return self.buffer.read(size)
+
+
+def stream_session(response_data, status=200):
+    body = json.dumps(response_data).encode("utf-8")
+    mock_session = AsyncMock(aiohttp.ClientSession)
+    resp = mock_session.post.return_value.__aenter__.return_value
+    resp.status = status
+    resp.raise_for_status = Mock(
+        side_effect=aiohttp.ClientResponseError(Mock(), (), status=status)
+    )
+    resp.content = FakeStream(body)
+    resp.read.return_value = body
+    return mock_session
+
+
+@pytest.fixture(params=["ijson", "buffered"])
+def stream_decoder(request, mocker):
+    if request.param == "ijson":
+        pytest.importorskip("ijson")
+    else:
+        mocker.patch("saleor_app.saleor.client.ijson", None)
+    return request.param
+
+
+async def test_execute_stream(stream_decoder):
+    edges = [{"node": {"id": str(i), "price": i / 2}} for i in range(5)]
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        session=stream_session({"data": {"products": {"edges": edges}}}),
+    )
+
+    items = [
+        item
+        async for item in saleor.execute_stream(
+            "query { products { edges { node { id } } } }", path="products.edges"
+        )
+    ]
+
+    assert items == edges
+
+
+async def test_execute_stream_scalars(stream_decoder):
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        session=stream_session({"data": {"ids": ["1", "2"]}}),
+    )
+
+    assert [item async for item in saleor.execute_stream("QUERY", path="ids")] == [
+        "1",
+        "2",
+    ]
+
+
+async def test_execute_stream_errors(stream_decoder):
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        session=stream_session(
+            {
+                "data": {"products": {"edges": [{"node": {"id": "1"}}]}},
+                "errors": [{"message": "there are errors"}],
+            }
+        ),
+    )
+    items = []
+
+    with pytest.raises(GraphQLError) as excinfo:
+        async for item in saleor.execute_stream("QUERY", path="products.edges"):
+            items.append(item)
+
+    assert items == [{"node": {"id": "1"}}]
+    assert excinfo.value.errors == [{"message": "there are errors"}]
+
+
+async def test_execute_stream_no_data(stream_decoder):
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        session=stream_session(
+            {"data": None, "errors": [{"message": "Permission denied"}]}
+        ),
+    )
+
+    with pytest.raises(GraphQLError):
+        async for _ in saleor.execute_stream("QUERY", path="products.edges"):
+            pass
+
+
+@pytest.mark.parametrize(
+    "response_data",
+    (
+        {"data": {"products": {"edges": {"node": {"id": "1"}}}}},
+        {"data": {"products": {"edges": "1"}}},
+    ),
+)
+async def test_execute_stream_not_a_list(stream_decoder, response_data):
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        session=stream_session(response_data),
+    )
+
+    with pytest.raises(ValueError) as excinfo:
+        async for _ in saleor.execute_stream("QUERY", path="products.edges"):
+            pass
+
+    assert str(excinfo.value) == "data.products.edges is not a list"
+
+
+async def test_execute_stream_error_status(stream_decoder):
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        session=stream_session({}, status=502),
+    )
+
+    with pytest.raises(aiohttp.ClientResponseError) as excinfo:
+        async for _ in saleor.execute_stream("QUERY", path="products.edges"):
+            pass
+
+    assert excinfo.value.status == 502
+
+
+async def test_execute_metrics(batch_session):
+    metrics = Metrics()
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        session=batch_session,
+        metrics=metrics,
+    )
+
+    await saleor.execute("query Products { products }", variables={})
+    with pytest.raises(GraphQLError):
+        await saleor.execute("FAIL", variables={})
+
+    assert metrics.saleor_requests.values == {
+        ("Products", "ok"): 1,
+        ("anonymous", "graphql_error"): 1,
+    }
+    assert sum(metrics.saleor_request_duration.counts[("Products",)]) == 1
+
+
+async def test_execute_spans(batch_session):
+    tracer = InMemoryTracer()
+    saleor = SaleorClient(
+        saleor_url="http://saleor.local",
+        user_agent="test",
+        session=batch_session,
+        tracer=tracer,
+    )
+
+    await saleor.execute("query Products { products }", variables={})
+
+    request, operation = tracer.spans
+    assert operation.name == "saleor_app.graphql"
+    assert operation.attributes == {"graphql.operation.name": "Products"}
+    assert request.name == "saleor_app.graphql_request"
+    assert request.parent_id == operation.span_id
+    headers = batch_session.post.call_args.kwargs["headers"]
+    assert headers["User-Agent"] == "test"
+    assert headers[TRACEPARENT_HEADER] == (
+        f"00-{request.trace_id}-{request.span_id}-01"
+    )
@@ -0,0 +1,87 @@
+import hashlib
+
+import pytest
+
+from saleor_app.saleor.mutations import CREATE_WEBHOOK
+from saleor_app.saleor.persisted_queries import (
+    is_persisted_query_miss,
+    is_persisted_query_not_supported,
+    persisted_query_payload,
+    query_hash,
+)
+
+
+def test_query_hash():
+    assert query_hash("QUERY") == hashlib.sha256(b"QUERY").hexdigest()
+
+
+def test_mutation_hashes_precomputed():
+    hits = query_hash.cache_info().hits
+
+    query_hash(CREATE_WEBHOOK)
+
+    assert query_hash.cache_info().hits == hits + 1
+
+
+@pytest.mark.parametrize("include_query", [False, True])
+def test_persisted_query_payload(include_query):
+    payload = persisted_query_payload("QUERY", {"id": "1"}, include_query)
+
+    assert payload["variables"] == {"id": "1"}
+    assert payload["extensions"] == {
+        "persistedQuery": {"version": 1, "sha256Hash": query_hash("QUERY")}
+    }
+    assert ("query" in payload) is include_query
+
+
+@pytest.mark.parametrize(
+    "errors, is_miss",
+    [
+        ([{"message": "PersistedQueryNotFound"}], True),
+        ([{"message": "PersistedQueryNotSupported"}], True),
+        (
+            [
+                {
+                    "message": "Not found",
+                    "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"},
+                }
+            ],
+            True,
+        ),
+        ([{"message": "Permission denied"}], False),
+        ([], False),
+    ],
+)
+def test_is_persisted_query_miss(errors, is_miss):
+    assert is_persisted_query_miss(errors) is is_miss
+
+
+@pytest.mark.parametrize(
+    "errors, not_supported",
+    [
+        ([{"message": "PersistedQueryNotSupported"}], True),
+        (
+            [
+                {
+                    "message": "Not supported",
+                    "extensions": {"code": "PERSISTED_QUERY_NOT_SUPPORTED"},
+                }
+            ],
+            True,
+        ),
+        # Saleor's answer to a request without the query text
+        (
+            [
+                {
+                    "message": "Must provide a query string.",
+                    "extensions": {"exception": {"code": "GraphQLError"}},
+                }
+            ],
+            True,
+        ),
+        ([{"message": "PersistedQueryNotFound"}], False),
+        ([], False),
+    ],
+)
+def test_is_persisted_query_not_supported(errors, not_supported):
+    assert is_persisted_query_not_supported(errors) is not_supported
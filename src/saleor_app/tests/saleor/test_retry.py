@@ -0,0 +1,137 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from saleor_app.saleor.exceptions import CircuitOpenError
+from saleor_app.saleor.retry import CircuitBreaker, RetryPolicy, is_mutation
+
+
+def response_error(status):
+    return aiohttp.ClientResponseError(None, (), status=status)
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("mutation Create { a }", True),
+        ("\n  mutation { a }", True),
+        ("query Products { mutations }", False),
+        ("{ mutation }", False),
+        ("fragment F on Webhook { id }\nmutation M { a { ...F } }", True),
+        ("# Creates a webhook\nmutation { a }", True),
+        ("query A { a }\nmutation B { b }", True),
+        ("query A($b: Int = 1) @c { a }\nfragment F on A { a }", False),
+        ('query { a(b: "}mutation {") }', False),
+        ('query { a(b: """\n}\nmutation {""") }', False),
+        ("fragment F on Webhook { id }", True),
+        ("", True),
+        ("query { a", True),
+        ("mutatoin { a }", True),
+    ],
+)
+def test_is_mutation(query, expected):
+    assert is_mutation(query) is expected
+
+
+def test_retry_policy_delays():
+    policy = RetryPolicy(max_attempts=5, base_delay=0.1, max_delay=0.3, rng=lambda: 1)
+
+    assert list(policy.delays()) == [0.1, 0.2, 0.3, 0.3]
+
+
+def test_retry_policy_jitter():
+    policy = RetryPolicy(max_attempts=2, base_delay=1, rng=lambda: 0.25)
+
+    assert list(policy.delays()) == [0.25]
+
+
+@pytest.mark.parametrize(
+    "exc, expected",
+    [
+        (response_error(502), True),
+        (response_error(429), True),
+        (response_error(400), False),
+        (response_error(500), False),
+        (aiohttp.ClientConnectionError(), True),
+        (asyncio.TimeoutError(), True),
+        (ValueError(), False),
+    ],
+)
+def test_retry_policy_should_retry(exc, expected):
+    assert RetryPolicy().should_retry(exc) is expected
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_circuit_breaker_opens_after_failures():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=2, recovery_time=10, clock=clock)
+
+    breaker.record(response_error(502))
+    breaker.before_call()
+    breaker.record(aiohttp.ClientConnectionError())
+
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.retry_after == 10
+
+
+def test_circuit_breaker_ignores_client_errors():
+    breaker = CircuitBreaker(failure_threshold=1)
+
+    breaker.record(response_error(400))
+
+    assert not breaker.is_open
+
+
+def test_circuit_breaker_success_resets_failures():
+    breaker = CircuitBreaker(failure_threshold=2)
+
+    breaker.record(response_error(502))
+    breaker.record()
+    breaker.record(response_error(502))
+
+    assert not breaker.is_open
+
+
+def test_circuit_breaker_trial_call():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=1, recovery_time=10, clock=clock)
+    breaker.record(response_error(503))
+
+    clock.now = 10
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        # Only one trial call at a time
+        breaker.before_call()
+
+    breaker.record(response_error(503))
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now = 20
+    breaker.before_call()
+    breaker.record()
+    assert not breaker.is_open
+    breaker.before_call()
+
+
+def test_circuit_breaker_cancelled_trial_call():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=1, recovery_time=10, clock=clock)
+    breaker.record(response_error(503))
+    clock.now = 10
+
+    breaker.before_call()
+    breaker.record(asyncio.CancelledError())
+
+    breaker.before_call()
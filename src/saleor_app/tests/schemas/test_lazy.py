@@ -0,0 +1,168 @@
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel, Extra, ValidationError, root_validator, validator
+
+from saleor_app.schemas.lazy import LazyModel, supports_lazy_validation
+
+
+class Line(BaseModel):
+    id: str
+    quantity: int
+
+
+class Order(BaseModel):
+    id: str
+    number: int
+    lines: List[Line]
+    billing_address: Optional[Line]
+    note: str = "no note"
+
+
+def test_lazy_model_validates_on_access(mocker):
+    validate = mocker.spy(Line, "validate")
+    order = LazyModel(
+        Order, {"id": "T3JkZXI6MQ==", "number": "10", "lines": [{"id": 1}]}
+    )
+
+    assert order.id == "T3JkZXI6MQ=="
+    assert order.number == 10
+    validate.assert_not_called()
+
+
+def test_lazy_model_caches_values():
+    order = LazyModel(Order, {"id": "T3JkZXI6MQ==", "number": "10"})
+
+    assert order.number is order.number
+
+
+def test_lazy_model_nested():
+    order = LazyModel(
+        Order,
+        {
+            "lines": [{"id": "1", "quantity": "2"}, {"id": "2"}],
+            "billing_address": {"id": "3", "quantity": 1},
+        },
+    )
+
+    assert isinstance(order.lines[0], LazyModel)
+    assert order.lines[0].quantity == 2
+    assert order.lines[1].id == "2"
+    assert order.billing_address.id == "3"
+    with pytest.raises(ValidationError):
+        order.lines[1].quantity
+
+
+def test_lazy_model_defaults():
+    order = LazyModel(Order, {"billing_address": None})
+
+    assert order.note == "no note"
+    assert order.billing_address is None
+
+
+def test_lazy_model_errors():
+    order = LazyModel(Order, {"number": "ten"})
+
+    with pytest.raises(ValidationError):
+        order.number
+    with pytest.raises(ValidationError):
+        order.id
+    with pytest.raises(AttributeError):
+        order.not_a_field
+
+
+def test_lazy_model_not_a_mapping():
+    with pytest.raises(ValidationError):
+        LazyModel(Order, ["not", "a", "mapping"])
+
+
+def test_lazy_model_to_model():
+    order = LazyModel(Order, {"id": "1", "number": 1, "lines": []})
+
+    assert order.to_model() == Order(id="1", number=1, lines=[])
+
+
+class Refund(BaseModel):
+    amount: int
+    captured: int
+
+    @root_validator
+    def not_above_captured(cls, values):
+        assert values.get("amount", 0) <= values.get("captured", 0)
+        return values
+
+
+class Shipping(BaseModel):
+    price: int
+    max_price: int
+
+    @validator("max_price")
+    def above_price(cls, value, values):
+        assert value >= values.get("price", 0)
+        return value
+
+
+class StrictLine(Line):
+    class Config:
+        extra = Extra.forbid
+
+
+class AliasedLine(BaseModel):
+    line_id: str
+
+    class Config:
+        alias_generator = str.upper
+        allow_population_by_field_name = True
+
+
+class TrimmedLine(BaseModel):
+    id: str
+
+    class Config:
+        alias_generator = str.upper
+
+    @validator("id", pre=True)
+    def strip(cls, value):
+        return value.strip()
+
+
+@pytest.mark.parametrize(
+    "model, supported",
+    (
+        (Order, True),
+        (TrimmedLine, True),
+        (Refund, False),
+        (Shipping, False),
+        (StrictLine, False),
+        (AliasedLine, False),
+    ),
+)
+def test_supports_lazy_validation(model, supported):
+    assert supports_lazy_validation(model) is supported
+
+
+@pytest.mark.parametrize(
+    "model, data",
+    (
+        (Refund, {"amount": 10, "captured": 5}),
+        (Shipping, {"price": 10, "max_price": 5}),
+        (StrictLine, {"id": "1", "quantity": 1, "unknown": True}),
+    ),
+)
+def test_lazy_model_full_validation(model, data):
+    with pytest.raises(ValidationError):
+        model.parse_obj(data)
+    with pytest.raises(ValidationError):
+        LazyModel(model, data)
+
+
+def test_lazy_model_full_validation_values():
+    refund = LazyModel(Refund, {"amount": "5", "captured": 10})
+    line = LazyModel(AliasedLine, {"line_id": "1"})
+
+    assert refund.amount == 5
+    assert line.line_id == "1"
+
+
+def test_lazy_model_alias_generator():
+    assert LazyModel(TrimmedLine, {"ID": " 1 "}).id == "1"
@@ -0,0 +1,69 @@
+import pytest
+from fastapi import APIRouter, FastAPI
+from starlette.requests import Request
+
+from saleor_app.errors import ConfigurationError
+from saleor_app.schemas.utils import LazyPath, LazyUrl, build_route_index
+
+
+@pytest.fixture
+def app():
+    app = FastAPI()
+    app.get("/configuration", name="configuration-form")(lambda: None)
+    app.get("/orders/{order_id}", name="order")(lambda order_id: None)
+    sub_app = FastAPI()
+    sub_app.get("/extension", name="extension")(lambda: None)
+    app.mount("/sub", sub_app, name="sub")
+    router = APIRouter(prefix="/webhooks")
+    router.post("/", name="handle-webhook")(lambda: None)
+    app.include_router(router)
+    return app
+
+
+def make_request(app, root_path=""):
+    return Request(
+        {
+            "type": "http",
+            "app": app,
+            "router": app.router,
+            "scheme": "https",
+            "server": ("app.local", 443),
+            "root_path": root_path,
+            "path": "/",
+            "query_string": b"",
+            "headers": [(b"host", b"app.local")],
+        }
+    )
+
+
+def test_build_route_index(app):
+    route_index = build_route_index(app.routes)
+
+    assert route_index["configuration-form"] == "/configuration"
+    assert route_index["handle-webhook"] == "/webhooks/"
+    assert route_index["sub:extension"] == "/sub/extension"
+    assert "order" not in route_index
+
+
+@pytest.mark.parametrize(
+    "name", ["configuration-form", "handle-webhook", "sub:extension"]
+)
+@pytest.mark.parametrize("root_path", ["", "/prefix"])
+def test_lazy_url_matches_url_for(app, name, root_path):
+    request = make_request(app, root_path)
+
+    assert LazyUrl(name)(request) == request.url_for(name)
+    assert LazyPath(name)(request) == app.url_path_for(name)
+
+
+def test_lazy_url_does_not_keep_the_request(app):
+    lazy_url = LazyUrl("configuration-form")
+
+    lazy_url(make_request(app))
+
+    assert not hasattr(lazy_url, "request")
+
+
+def test_lazy_url_unknown_name(app):
+    with pytest.raises(ConfigurationError):
+        LazyUrl("order")(make_request(app))
@@ -0,0 +1,73 @@
+from typing import List
+
+import pytest
+from pydantic import ValidationError, parse_obj_as
+
+from saleor_app.schemas.webhook import (
+    Webhook,
+    WebhookMeta,
+    WebhookV1,
+    WebhookV2,
+    WebhookV3,
+    parse_webhook,
+    parse_webhooks,
+)
+
+META = {
+    "issued_at": "2022-03-09T14:42:00.756412+00:00",
+    "version": "3.1.0-a.25",
+    "issuing_principal": {"id": "VXNlcjox", "type": "user"},
+}
+
+
+@pytest.mark.parametrize(
+    "data, model",
+    (
+        ({"meta": META}, WebhookV3),
+        ({"meta": META, "payload": {"id": "1"}}, WebhookV3),
+        ({"meta": META, "id": "1"}, WebhookV2),
+        ({"meta": "malformed", "id": "1"}, WebhookV1),
+        ({"id": "1"}, WebhookV1),
+        ({}, WebhookV1),
+    ),
+)
+def test_parse_webhook_matches_union(data, model):
+    webhook = parse_webhook(data)
+
+    assert type(webhook) is model
+    assert webhook == parse_obj_as(List[Webhook], [data])[0]
+
+
+@pytest.mark.parametrize(
+    "data, model",
+    (
+        ({"meta": META, "payload": {"id": "1"}}, WebhookV3),
+        ({"meta": META, "id": "1"}, WebhookV2),
+        ({"id": "1"}, WebhookV1),
+    ),
+)
+def test_parse_webhook_trusted(data, model, mocker):
+    validate = mocker.spy(WebhookMeta, "validate")
+
+    webhook = parse_webhook(data, trusted=True)
+
+    assert type(webhook) is model
+    assert webhook.dict() == data
+    validate.assert_not_called()
+
+
+def test_parse_webhook_invalid():
+    with pytest.raises(ValidationError):
+        parse_webhook("not a webhook")
+
+
+def test_parse_webhooks():
+    assert parse_webhooks([{"meta": META}, {"id": "1"}]) == [
+        WebhookV3(meta=META),
+        WebhookV1(id="1"),
+    ]
+
+
+def test_parse_webhooks_not_a_list():
+    with pytest.raises(ValidationError):
+        parse_webhooks({"id": "1"})
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from saleor_app.stores.base import CachedTenantStore
+from saleor_app.stores.memory import InMemoryTenantStore
+
+
+@pytest.fixture
+async def store(mocker):
+    store = InMemoryTenantStore(allowed_domains={"saleor.local"})
+    await store.save_app_data("saleor.local", "token", None)
+    await store.save_app_data("other.saleor.local", "other_token", None)
+    mocker.spy(store, "get_tenants")
+    mocker.spy(store, "validate_domain")
+    return store
+
+
+async def test_reads_cached(store):
+    cached_store = CachedTenantStore(store)
+
+    assert await cached_store.get_app_token("saleor.local") == "token"
+    assert await cached_store.get_webhook_details("saleor.local") is None
+    assert await cached_store.get_app_token("saleor.local") == "token"
+
+    store.get_tenants.assert_awaited_once_with(["saleor.local"])
+
+
+async def test_concurrent_reads_share_a_load(store):
+    cached_store = CachedTenantStore(store)
+
+    tokens = await asyncio.gather(
+        *(cached_store.get_app_token("saleor.local") for _ in range(5))
+    )
+
+    assert tokens == ["token"] * 5
+    assert store.get_tenants.await_count == 1
+
+
+async def test_get_tenants_batched(store):
+    cached_store = CachedTenantStore(store)
+    await cached_store.get_app_token("saleor.local")
+
+    tenants = await cached_store.get_tenants(
+        ["saleor.local", "other.saleor.local", "missing.saleor.local"]
+    )
+
+    assert set(tenants) == {"saleor.local", "other.saleor.local"}
+    store.get_tenants.assert_awaited_with(
+        ["other.saleor.local", "missing.saleor.local"]
+    )
+
+    await cached_store.get_tenants(["other.saleor.local", "missing.saleor.local"])
+    assert store.get_tenants.await_count == 2
+
+
+async def test_missing_tenant_cached_briefly(store):
+    cached_store = CachedTenantStore(store, negative_ttl=5)
+
+    assert await cached_store.get_app_token("missing.saleor.local") is None
+    assert await cached_store.get_app_token("missing.saleor.local") is None
+
+    assert store.get_tenants.await_count == 1
+
+
+async def test_missing_tenant_not_cached(store):
+    cached_store = CachedTenantStore(store, negative_ttl=0)
+
+    assert await cached_store.get_app_token("missing.saleor.local") is None
+    assert await cached_store.get_app_token("missing.saleor.local") is None
+
+    assert store.get_tenants.await_count == 2
+
+
+async def test_validate_domain_cached(store):
+    cached_store = CachedTenantStore(store)
+
+    for _ in range(2):
+        assert await cached_store.validate_domain("saleor.local")
+        assert not await cached_store.validate_domain("other.saleor.local")
+
+    assert store.validate_domain.await_count == 2
+
+
+async def test_writes_invalidate(store):
+    cached_store = CachedTenantStore(store)
+    await cached_store.get_app_token("saleor.local")
+
+    await cached_store.save_app_data("saleor.local", "new_token", None)
+    assert await cached_store.get_app_token("saleor.local") == "new_token"
+
+    await cached_store.delete_app_data("saleor.local")
+    assert await cached_store.get_app_token("saleor.local") is None
@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+from saleor_app.errors import ConfigurationError
+from saleor_app.stores.sqlite import SQLiteConnectionPool, SQLiteTenantStore
+
+
+async def test_connection_pool_reuses_connections(tmp_path):
+    pool = SQLiteConnectionPool(str(tmp_path / "db.sqlite3"), size=2)
+
+    def slow_query(connection):
+        connection.execute("SELECT 1").fetchall()
+        return id(connection)
+
+    ids = await asyncio.gather(*(pool.run(slow_query) for _ in range(10)))
+
+    assert len(pool.connections) <= 2
+    assert set(ids) <= {id(connection) for connection in pool.connections}
+
+    await pool.close()
+    assert pool.connections == []
+
+
+async def test_data_persisted(tmp_path):
+    database = str(tmp_path / "db.sqlite3")
+    store = SQLiteTenantStore(database)
+    await store.save_app_data("saleor.local", "token", None)
+    await store.close()
+
+    store = SQLiteTenantStore(database)
+    assert await store.get_app_token("saleor.local") == "token"
+    await store.close()
+
+
+def test_invalid_table_name(tmp_path):
+    with pytest.raises(ConfigurationError):
+        SQLiteTenantStore(str(tmp_path / "db.sqlite3"), table="tenants; DROP")
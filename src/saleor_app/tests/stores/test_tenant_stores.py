@@ -0,0 +1,77 @@
+import pytest
+
+from saleor_app.schemas.core import WebhookData
+from saleor_app.stores.memory import InMemoryTenantStore
+from saleor_app.stores.sqlite import SQLiteTenantStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+async def tenant_store(request, tmp_path):
+    if request.param == "memory":
+        yield InMemoryTenantStore(allowed_domains={"saleor.local"})
+    else:
+        store = SQLiteTenantStore(
+            str(tmp_path / "tenants.sqlite3"), allowed_domains={"saleor.local"}
+        )
+        yield store
+        await store.close()
+
+
+@pytest.fixture
+def webhook_data():
+    return WebhookData(
+        webhook_id="webhook_id",
+        webhook_ids=["webhook_id"],
+        webhook_secret_key="webhook_secret_key",
+    )
+
+
+async def test_validate_domain(tenant_store):
+    assert await tenant_store.validate_domain("saleor.local")
+    assert not await tenant_store.validate_domain("other.saleor.local")
+
+
+async def test_validate_domain_any():
+    assert await InMemoryTenantStore().validate_domain("saleor.local")
+
+
+async def test_save_app_data(tenant_store, webhook_data):
+    await tenant_store.save_app_data("saleor.local", "token", webhook_data)
+
+    assert await tenant_store.get_webhook_details("saleor.local") == webhook_data
+    assert await tenant_store.get_app_token("saleor.local") == "token"
+
+
+async def test_save_app_data_overwrites(tenant_store, webhook_data):
+    await tenant_store.save_app_data("saleor.local", "token", webhook_data)
+    await tenant_store.save_app_data("saleor.local", "new_token", None)
+
+    assert await tenant_store.get_webhook_details("saleor.local") is None
+    assert await tenant_store.get_app_token("saleor.local") == "new_token"
+
+
+async def test_not_installed(tenant_store):
+    assert await tenant_store.get_webhook_details("saleor.local") is None
+    assert await tenant_store.get_app_token("saleor.local") is None
+
+
+async def test_get_tenants(tenant_store, webhook_data):
+    domains = [f"saleor-{i}.local" for i in range(600)]
+    for domain in domains[::2]:
+        await tenant_store.save_app_data(domain, f"token-{domain}", webhook_data)
+
+    tenants = await tenant_store.get_tenants(domains + ["saleor-0.local"])
+
+    assert set(tenants) == set(domains[::2])
+    assert tenants["saleor-2.local"].auth_token == "token-saleor-2.local"
+    assert tenants["saleor-2.local"].webhook_data == webhook_data
+    assert await tenant_store.get_tenants([]) == {}
+
+
+async def test_delete_app_data(tenant_store, webhook_data):
+    await tenant_store.save_app_data("saleor.local", "token", webhook_data)
+
+    await tenant_store.delete_app_data("saleor.local")
+    await tenant_store.delete_app_data("saleor.local")
+
+    assert await tenant_store.get_app_token("saleor.local") is None
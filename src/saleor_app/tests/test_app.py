@@ -1,7 +1,19 @@
+from unittest.mock import AsyncMock
+
 import pytest
 from starlette.routing import NoMatchFound
 
+from saleor_app.app import SaleorApp
+from saleor_app.dedup import WebhookDeduplicator
+from saleor_app.errors import ConfigurationError
+from saleor_app.schemas.core import WebhookData
+from saleor_app.schemas.handlers import SaleorEventType
+from saleor_app.schemas.utils import LazyUrl
+from saleor_app.stores.base import CachedTenantStore
+from saleor_app.stores.memory import InMemoryTenantStore
+from saleor_app.stores.sqlite import SQLiteTenantStore
 from saleor_app.webhook import WebhookRouter
+from saleor_app.work_queue import WebhookWorkQueue
 
 
 async def test_saleor_app_init(
@@ -23,3 +35,217 @@ async def test_include_webhook_router(saleor_app, get_webhook_details):
     assert saleor_app.get_webhook_details == get_webhook_details
     assert saleor_app.url_path_for("handle-webhook") == "/webhook"
     assert isinstance(saleor_app.webhook_router, WebhookRouter)
+
+
+async def test_saleor_session_pool_closed_on_shutdown(saleor_app):
+    session = saleor_app.saleor_session_pool.get_session("http://saleor.local")
+
+    await saleor_app.router.shutdown()
+
+    assert session.closed
+
+
+async def test_route_index_built_on_startup(saleor_app):
+    await saleor_app.router.startup()
+
+    assert saleor_app.route_index["app-install"] == "/configuration/install"
+    assert saleor_app.route_index["configuration-form"] == "/configuration"
+    assert saleor_app.get_route_index() is saleor_app.route_index
+
+
+async def test_route_index_rebuilt_for_new_routes(saleor_app, get_webhook_details):
+    await saleor_app.router.startup()
+    assert "handle-webhook" not in saleor_app.route_index
+
+    saleor_app.include_webhook_router(get_webhook_details)
+    saleor_app.include_metrics_route()
+
+    assert LazyUrl("handle-webhook").path(saleor_app.get_route_index()) == "/webhook"
+    assert saleor_app.route_index["metrics"] == "/metrics"
+    assert saleor_app.get_route_index() is saleor_app.route_index
+
+
+async def test_route_index_unknown_lazy_url(saleor_app):
+    saleor_app.manifest.support_url = LazyUrl("missing")
+
+    with pytest.raises(ConfigurationError):
+        await saleor_app.router.startup()
+    assert saleor_app.route_index is None
+
+
+async def test_fetch_webhook_details_cached(saleor_app, get_webhook_details):
+    saleor_app.include_webhook_router(get_webhook_details)
+    get_webhook_details.return_value = WebhookData(
+        webhook_id="webhook_id", webhook_secret_key="webhook_secret_key"
+    )
+
+    for _ in range(3):
+        assert (
+            await saleor_app.fetch_webhook_details("saleor_domain")
+            == get_webhook_details.return_value
+        )
+
+    get_webhook_details.assert_awaited_once_with("saleor_domain")
+
+
+async def test_clear_domain_cache(saleor_app, get_webhook_details):
+    saleor_app.include_webhook_router(get_webhook_details)
+    await saleor_app.fetch_webhook_details("saleor_domain")
+
+    saleor_app.clear_domain_cache("saleor_domain")
+    await saleor_app.fetch_webhook_details("saleor_domain")
+
+    assert get_webhook_details.await_count == 2
+
+
+async def test_clear_domain_cache_without_webhook_router(saleor_app):
+    saleor_app.clear_domain_cache("saleor_domain")
+
+
+async def test_fetch_app_token_cached(saleor_app):
+    saleor_app.get_app_token = AsyncMock(return_value="app_token")
+
+    for _ in range(3):
+        assert await saleor_app.fetch_app_token("saleor_domain") == "app_token"
+
+    saleor_app.get_app_token.assert_awaited_once_with("saleor_domain")
+
+    saleor_app.clear_domain_cache("saleor_domain")
+    await saleor_app.fetch_app_token("saleor_domain")
+
+    assert saleor_app.get_app_token.await_count == 2
+
+
+async def test_validate_domain_cached(saleor_app):
+    inner = saleor_app.validate_domain.validate_domain
+    inner.return_value = True
+
+    for _ in range(3):
+        assert await saleor_app.validate_domain("saleor_domain")
+
+    inner.assert_awaited_once_with("saleor_domain")
+
+    saleor_app.clear_domain_cache("saleor_domain")
+    await saleor_app.validate_domain("saleor_domain")
+
+    assert inner.await_count == 2
+
+
+async def test_allowed_domains(manifest):
+    saleor_app = SaleorApp(
+        manifest=manifest,
+        allowed_domains=["*.saleor.cloud"],
+        save_app_data=AsyncMock(),
+    )
+
+    assert await saleor_app.validate_domain("shop.saleor.cloud")
+    assert not await saleor_app.validate_domain("saleor.local")
+
+
+def test_validate_domain_required(manifest):
+    with pytest.raises(ConfigurationError):
+        SaleorApp(manifest=manifest, save_app_data=AsyncMock())
+
+
+async def test_fetch_app_token_not_configured(saleor_app):
+    with pytest.raises(ConfigurationError):
+        await saleor_app.fetch_app_token("saleor_domain")
+
+
+async def test_include_webhook_router_work_queue(saleor_app, get_webhook_details):
+    async def handler(payload, saleor_domain):
+        pass
+
+    saleor_app.include_webhook_router(get_webhook_details)
+    assert saleor_app.webhook_work_queue is None
+
+    saleor_app.webhook_router.http_event_route(SaleorEventType.PRODUCT_CREATED)(handler)
+    assert saleor_app.webhook_work_queue is None
+
+    saleor_app.webhook_router.http_event_route(
+        SaleorEventType.PRODUCT_UPDATED, ack="immediate"
+    )(handler)
+    work_queue = saleor_app.webhook_work_queue
+    assert isinstance(work_queue, WebhookWorkQueue)
+    assert work_queue.drain in saleor_app.router.on_shutdown
+
+    passed_work_queue = WebhookWorkQueue(maxsize=1)
+    saleor_app.include_webhook_router(
+        get_webhook_details, webhook_work_queue=passed_work_queue
+    )
+    saleor_app.webhook_router.http_event_route(
+        SaleorEventType.PRODUCT_UPDATED, ack="immediate"
+    )(handler)
+    assert saleor_app.webhook_work_queue is passed_work_queue
+
+
+async def test_include_webhook_router_deduplication(saleor_app, get_webhook_details):
+    saleor_app.include_webhook_router(get_webhook_details)
+    assert saleor_app.webhook_deduplicator is None
+
+    saleor_app.include_webhook_router(get_webhook_details, deduplicate_webhooks=True)
+    assert isinstance(saleor_app.webhook_deduplicator, WebhookDeduplicator)
+
+    deduplicator = WebhookDeduplicator(ttl=60)
+    saleor_app.include_webhook_router(
+        get_webhook_details, webhook_deduplicator=deduplicator
+    )
+    assert saleor_app.webhook_deduplicator is deduplicator
+
+
+async def test_from_tenant_store(manifest):
+    tenant_store = InMemoryTenantStore(allowed_domains={"saleor.local"})
+    await tenant_store.save_app_data(
+        "saleor.local",
+        "token",
+        WebhookData(webhook_id="webhook_id", webhook_secret_key="secret"),
+    )
+
+    saleor_app = SaleorApp.from_tenant_store(tenant_store, manifest=manifest)
+    saleor_app.include_webhook_router()
+
+    assert isinstance(saleor_app.tenant_store, CachedTenantStore)
+    assert await saleor_app.validate_domain("saleor.local")
+    assert await saleor_app.fetch_app_token("saleor.local") == "token"
+    assert (await saleor_app.fetch_webhook_details("saleor.local")).webhook_id == (
+        "webhook_id"
+    )
+
+
+async def test_from_tenant_store_clear_domain_cache(manifest):
+    tenant_store = InMemoryTenantStore()
+    saleor_app = SaleorApp.from_tenant_store(tenant_store, manifest=manifest)
+    saleor_app.include_webhook_router()
+    webhook_data = WebhookData(webhook_id="webhook_id", webhook_secret_key="secret")
+    await saleor_app.save_app_data("saleor.local", "token", webhook_data)
+    assert await saleor_app.fetch_app_token("saleor.local") == "token"
+    assert await saleor_app.fetch_webhook_details("saleor.local") == webhook_data
+
+    # Changed behind the app's back
+    new_webhook_data = WebhookData(webhook_id="webhook_id", webhook_secret_key="new")
+    await tenant_store.save_app_data("saleor.local", "new_token", new_webhook_data)
+    saleor_app.clear_domain_cache("saleor.local")
+
+    assert await saleor_app.fetch_app_token("saleor.local") == "new_token"
+    assert await saleor_app.fetch_webhook_details("saleor.local") == new_webhook_data
+    # Cached only once, by the tenant store
+    assert len(saleor_app.app_token_cache) == 0
+    assert len(saleor_app.webhook_details_cache) == 0
+
+
+async def test_from_tenant_store_closes_store(manifest, tmp_path):
+    tenant_store = SQLiteTenantStore(str(tmp_path / "db.sqlite3"))
+    saleor_app = SaleorApp.from_tenant_store(
+        tenant_store, manifest=manifest, cache_ttl=0
+    )
+    assert saleor_app.tenant_store is tenant_store
+    await saleor_app.save_app_data("saleor.local", "token", None)
+
+    await saleor_app.router.shutdown()
+
+    assert tenant_store.pool.connections == []
+
+
+def test_include_webhook_router_without_get_webhook_details(saleor_app):
+    with pytest.raises(ConfigurationError):
+        saleor_app.include_webhook_router()
@@ -0,0 +1,175 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from saleor_app.cache import InMemoryCacheBackend, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_get_set():
+    cache = TTLCache()
+    cache.set("key", "value")
+
+    assert cache.get("key") == "value"
+    assert "key" in cache
+    assert cache.get("missing") is None
+    assert cache.get("missing", "default") == "default"
+
+
+def test_ttl_cache_expiry():
+    clock = FakeClock()
+    cache = TTLCache(ttl=10, clock=clock)
+    cache.set("default_ttl", "value")
+    cache.set("custom_ttl", "value", ttl=20)
+
+    clock.now = 10
+    assert cache.get("default_ttl") is None
+    assert cache.get("custom_ttl") == "value"
+    assert len(cache) == 1
+
+    clock.now = 20
+    assert "custom_ttl" not in cache
+
+
+def test_ttl_cache_non_positive_ttl_is_not_stored():
+    cache = TTLCache()
+    cache.set("key", "value")
+    cache.set("key", "value", ttl=0)
+
+    assert "key" not in cache
+
+
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+
+def test_ttl_cache_pop_and_clear():
+    cache = TTLCache()
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.pop("a") == 1
+    assert cache.pop("a") is None
+    cache.clear()
+    assert len(cache) == 0
+
+
+async def test_in_memory_cache_backend():
+    backend = InMemoryCacheBackend()
+    await backend.set("key", "value", ttl=10)
+
+    assert await backend.get("key") == "value"
+
+    await backend.delete("key")
+    assert await backend.get("key") is None
+
+
+async def test_ttl_cache_get_or_load():
+    cache = TTLCache()
+    loader = AsyncMock(return_value="value")
+
+    assert await cache.get_or_load("key", loader) == "value"
+    assert await cache.get_or_load("key", loader) == "value"
+
+    loader.assert_awaited_once_with()
+
+
+async def test_ttl_cache_get_or_load_concurrent_misses():
+    cache = TTLCache()
+    release = asyncio.Event()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await release.wait()
+        return "value"
+
+    tasks = [asyncio.create_task(cache.get_or_load("key", loader)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*tasks) == ["value"] * 5
+    assert len(calls) == 1
+    assert cache.pending == {}
+
+
+async def test_ttl_cache_get_or_load_loader_cancelled():
+    cache = TTLCache()
+    release = asyncio.Event()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await release.wait()
+        return "value"
+
+    first = asyncio.create_task(cache.get_or_load("key", loader))
+    await asyncio.sleep(0)
+    waiters = [asyncio.create_task(cache.get_or_load("key", loader)) for _ in range(2)]
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiters) == ["value"] * 2
+    assert first.cancelled()
+    assert len(calls) == 2
+    assert cache.get("key") == "value"
+    assert cache.pending == {}
+
+
+async def test_ttl_cache_get_or_load_waiter_cancelled():
+    cache = TTLCache()
+    release = asyncio.Event()
+
+    async def loader():
+        await release.wait()
+        return "value"
+
+    first = asyncio.create_task(cache.get_or_load("key", loader))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.get_or_load("key", loader))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await first == "value"
+    assert waiter.cancelled()
+
+
+async def test_ttl_cache_get_or_load_none_not_cached():
+    cache = TTLCache()
+    loader = AsyncMock(return_value=None)
+
+    assert await cache.get_or_load("key", loader) is None
+    assert await cache.get_or_load("key", loader) is None
+
+    assert loader.await_count == 2
+
+
+async def test_ttl_cache_get_or_load_error():
+    cache = TTLCache()
+    loader = AsyncMock(side_effect=ValueError())
+
+    with pytest.raises(ValueError):
+        await cache.get_or_load("key", loader)
+
+    assert "key" not in cache
+    assert cache.pending == {}
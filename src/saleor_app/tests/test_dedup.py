@@ -0,0 +1,44 @@
+from saleor_app.dedup import WebhookDeduplicator
+
+
+def test_get_key():
+    key = WebhookDeduplicator.get_key("saleor.local", "order_created", "sig", b"{}")
+
+    assert key == WebhookDeduplicator.get_key(
+        "saleor.local", "ORDER_CREATED", "sig", b"[]"
+    )
+    assert key != WebhookDeduplicator.get_key(
+        "other.saleor.local", "ORDER_CREATED", "sig", b"{}"
+    )
+    assert key != WebhookDeduplicator.get_key(
+        "saleor.local", "ORDER_UPDATED", "sig", b"{}"
+    )
+
+
+def test_get_key_without_signature():
+    assert WebhookDeduplicator.get_key(
+        "saleor.local", "ORDER_CREATED", None, b"{}"
+    ) != WebhookDeduplicator.get_key("saleor.local", "ORDER_CREATED", None, b"[]")
+
+
+async def test_mark_handled():
+    deduplicator = WebhookDeduplicator(ttl=60)
+
+    assert not await deduplicator.is_duplicate("key")
+
+    await deduplicator.mark_handled("key")
+
+    assert await deduplicator.is_duplicate("key")
+    assert not await deduplicator.is_duplicate("other_key")
+
+
+async def test_custom_backend(mocker):
+    backend = mocker.AsyncMock()
+    backend.get.return_value = None
+    deduplicator = WebhookDeduplicator(backend=backend, ttl=30)
+
+    assert not await deduplicator.is_duplicate("key")
+    await deduplicator.mark_handled("key")
+
+    backend.get.assert_awaited_once_with("key")
+    backend.set.assert_awaited_once_with("key", True, ttl=30)
@@ -2,18 +2,24 @@ import hashlib
 from unittest.mock import AsyncMock
 
 import pytest
-from fastapi import HTTPException
+from fastapi import Depends, HTTPException
+from httpx import AsyncClient
 
 from saleor_app.deps import (
+    SALEOR_DOMAIN_HEADER,
+    configuration_saleor_client,
+    require_permission,
     saleor_domain_header,
     saleor_token,
     verify_saleor_domain,
     verify_saleor_token,
     verify_webhook_signature,
+    webhook_saleor_client,
 )
 from saleor_app.saleor.client import SaleorClient
 from saleor_app.saleor.exceptions import GraphQLError
-from saleor_app.schemas.core import WebhookData
+from saleor_app.schemas.core import SaleorPermissions, WebhookData
+from saleor_app.tokens import JWKSTokenVerifier
 
 
 async def test_saleor_domain_header_missing():
@@ -76,13 +82,110 @@ async def test_verify_saleor_token_saleor_error(mock_request, mocker):
     assert not await verify_saleor_token(mock_request, "saleor_domain", "token")
 
 
+async def test_verify_saleor_token_cached(mock_request, mocker, make_jwt):
+    token = make_jwt({})
+    mock_saleor_client = AsyncMock(SaleorClient)
+    mock_saleor_client.__aenter__.return_value.execute.return_value = {
+        "tokenVerify": {"isValid": True}
+    }
+    mock_get_client_for_app = mocker.patch(
+        "saleor_app.deps.get_client_for_app", return_value=mock_saleor_client
+    )
+
+    assert await verify_saleor_token(mock_request, "saleor_domain", token)
+    assert await verify_saleor_token(mock_request, "saleor_domain", token)
+
+    mock_get_client_for_app.assert_called_once()
+
+
+async def test_verify_saleor_token_invalid_cached(mock_request, mocker, make_jwt):
+    token = make_jwt({})
+    mock_saleor_client = AsyncMock(SaleorClient)
+    mock_saleor_client.__aenter__.return_value.execute.return_value = {
+        "tokenVerify": {"isValid": False}
+    }
+    mock_get_client_for_app = mocker.patch(
+        "saleor_app.deps.get_client_for_app", return_value=mock_saleor_client
+    )
+
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            await verify_saleor_token(mock_request, "saleor_domain", token)
+
+    mock_get_client_for_app.assert_called_once()
+
+
+async def test_verify_saleor_token_saleor_error_not_cached(
+    mock_request, mocker, make_jwt
+):
+    token = make_jwt({})
+    mock_saleor_client = AsyncMock(SaleorClient)
+    mock_saleor_client.__aenter__.return_value.execute.side_effect = GraphQLError(
+        "error"
+    )
+    mocker.patch("saleor_app.deps.get_client_for_app", return_value=mock_saleor_client)
+
+    assert not await verify_saleor_token(mock_request, "saleor_domain", token)
+    assert (
+        await mock_request.app.token_verification_cache.get("saleor_domain", token)
+        is None
+    )
+
+
+async def test_verify_saleor_token_locally(
+    mock_request, mocker, jwks_session, make_signed_jwt
+):
+    mock_request.app.jwks_verifier = JWKSTokenVerifier()
+    mocker.patch.object(
+        mock_request.app.saleor_session_pool, "get_session", return_value=jwks_session
+    )
+    mock_get_client_for_app = mocker.patch("saleor_app.deps.get_client_for_app")
+
+    assert await verify_saleor_token(mock_request, "saleor_domain", make_signed_jwt({}))
+    mock_get_client_for_app.assert_not_called()
+
+
+async def test_verify_saleor_token_locally_invalid(
+    mock_request, mocker, jwks_session, make_jwt
+):
+    mock_request.app.jwks_verifier = JWKSTokenVerifier()
+    mocker.patch.object(
+        mock_request.app.saleor_session_pool, "get_session", return_value=jwks_session
+    )
+
+    with pytest.raises(HTTPException) as excinfo:
+        await verify_saleor_token(mock_request, "saleor_domain", make_jwt({}))
+
+    assert excinfo.value.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "permissions, allowed",
+    (
+        ([], True),
+        ([SaleorPermissions.MANAGE_APPS], True),
+        ([SaleorPermissions.MANAGE_APPS, SaleorPermissions.MANAGE_ORDERS], False),
+    ),
+)
+async def test_require_permission(make_jwt, permissions, allowed):
+    check = require_permission(permissions)
+    token = make_jwt({"permissions": ["MANAGE_APPS"]})
+
+    if allowed:
+        assert await check("saleor_domain", token, True)
+    else:
+        with pytest.raises(HTTPException) as excinfo:
+            await check("saleor_domain", token, True)
+        assert excinfo.value.status_code == 403
+
+
 async def test_verify_saleor_domain(mock_request):
-    mock_request.app.validate_domain.return_value = True
+    mock_request.app.validate_domain.validate_domain.return_value = True
     assert await verify_saleor_domain(mock_request, "saleor_domain")
 
 
 async def test_verify_saleor_domain_invalid(mock_request):
-    mock_request.app.validate_domain.return_value = False
+    mock_request.app.validate_domain.validate_domain.return_value = False
     with pytest.raises(HTTPException) as excinfo:
         await verify_saleor_domain(mock_request, "saleor_domain")
 
@@ -119,3 +222,103 @@ async def test_verify_webhook_signature_invalid(
         await verify_webhook_signature(mock_request, "BAD_signature", "saleor_domain")
 
     assert excinfo.value.detail == "Invalid webhook signature for x-saleor-signature"
+
+
+async def test_verify_webhook_signature_not_installed(
+    get_webhook_details, mock_request
+):
+    mock_request.app.include_webhook_router(get_webhook_details)
+    mock_request.app.get_webhook_details.return_value = None
+
+    with pytest.raises(HTTPException) as excinfo:
+        await verify_webhook_signature(mock_request, "test_signature", "saleor_domain")
+
+    assert excinfo.value.status_code == 401
+    assert excinfo.value.detail == "The app is not installed for saleor_domain"
+
+
+@pytest.fixture
+def saleor_client_app(saleor_app):
+    clients = []
+
+    @saleor_app.get("/products")
+    async def products(client=Depends(configuration_saleor_client)):
+        clients.append(client)
+        return {}
+
+    saleor_app.get_app_token = AsyncMock(return_value="app_token")
+    saleor_app.dependency_overrides[verify_saleor_token] = lambda: True
+    return saleor_app, clients
+
+
+async def test_saleor_client(saleor_client_app):
+    saleor_app, clients = saleor_client_app
+
+    async with AsyncClient(app=saleor_app, base_url="http://app.local") as ac:
+        for _ in range(2):
+            response = await ac.get(
+                "products", headers={SALEOR_DOMAIN_HEADER: "saleor.local"}
+            )
+            assert response.status_code == 200
+
+    saleor_app.get_app_token.assert_awaited_once_with("saleor.local")
+    assert clients[0].session is saleor_app.saleor_session_pool.get_session(
+        "https://saleor.local"
+    )
+    assert clients[0].request_kwargs["headers"]["Authorization"] == ("Bearer app_token")
+    assert clients[0].circuit_breaker is (
+        saleor_app.saleor_session_pool.get_circuit_breaker("https://saleor.local")
+    )
+    assert clients[1].persisted_query_support is (
+        saleor_app.saleor_session_pool.get_persisted_query_support(
+            "https://saleor.local"
+        )
+    )
+    await saleor_app.saleor_session_pool.close()
+
+
+async def test_saleor_client_not_installed(saleor_client_app):
+    saleor_app, clients = saleor_client_app
+    saleor_app.get_app_token.return_value = None
+
+    async with AsyncClient(app=saleor_app, base_url="http://app.local") as ac:
+        response = await ac.get(
+            "products", headers={SALEOR_DOMAIN_HEADER: "saleor.local"}
+        )
+
+    assert response.status_code == 403
+    assert clients == []
+
+
+async def test_configuration_saleor_client_verifies_token(saleor_client_app, mocker):
+    saleor_app, clients = saleor_client_app
+    saleor_app.dependency_overrides.clear()
+    mocker.patch("saleor_app.deps._verify_saleor_token_remote", return_value=False)
+
+    async with AsyncClient(app=saleor_app, base_url="http://app.local") as ac:
+        response = await ac.get(
+            "products", headers={SALEOR_DOMAIN_HEADER: "saleor.local"}
+        )
+
+    assert response.status_code == 400
+    assert clients == []
+    saleor_app.get_app_token.assert_not_awaited()
+
+
+async def test_webhook_saleor_client_verifies_signature(
+    saleor_app, get_webhook_details
+):
+    saleor_app.include_webhook_router(get_webhook_details)
+    saleor_app.get_app_token = AsyncMock(return_value="app_token")
+
+    @saleor_app.post("/products")
+    async def products(client=Depends(webhook_saleor_client)):
+        return {}
+
+    async with AsyncClient(app=saleor_app, base_url="http://app.local") as ac:
+        response = await ac.post(
+            "products", headers={SALEOR_DOMAIN_HEADER: "saleor.local"}
+        )
+
+    assert response.status_code == 401
+    saleor_app.get_app_token.assert_not_awaited()
@@ -0,0 +1,106 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from saleor_app.domains import DomainAllowList, DomainValidator
+from saleor_app.errors import ConfigurationError
+
+
+@pytest.mark.parametrize(
+    "domain,allowed",
+    [
+        ("saleor.local", True),
+        ("SALEOR.local", True),
+        ("localhost:8000", True),
+        ("localhost", False),
+        ("shop.saleor.cloud", True),
+        ("eu.shop.saleor.cloud", True),
+        ("saleor.cloud", False),
+        ("shop.saleor.cloud:8000", False),
+        ("shopsaleor.cloud", False),
+        ("shop.saleor.cloud.evil.com", False),
+        ("user@shop.saleor.cloud", False),
+        ("shop.example.com", True),
+    ],
+)
+def test_allow_list(domain, allowed):
+    allow_list = DomainAllowList(
+        ["saleor.local", "localhost:8000", "*.saleor.cloud", "*.Example.com"]
+    )
+
+    assert (domain in allow_list) is allowed
+
+
+@pytest.mark.parametrize("pattern", ["saleor.*", "*.*.saleor.cloud", "shop*.cloud"])
+def test_allow_list_invalid_pattern(pattern):
+    with pytest.raises(ConfigurationError):
+        DomainAllowList([pattern])
+
+
+def test_validator_requires_a_source():
+    with pytest.raises(ConfigurationError):
+        DomainValidator()
+
+
+async def test_validator_allow_list_skips_callable():
+    validate_domain = AsyncMock(return_value=False)
+    validator = DomainValidator(validate_domain, allowed_domains=["*.saleor.cloud"])
+
+    assert await validator("shop.saleor.cloud")
+    validate_domain.assert_not_awaited()
+
+
+async def test_validator_allow_list_only():
+    validator = DomainValidator(allowed_domains=["saleor.local"])
+
+    assert await validator("saleor.local")
+    assert not await validator("other.saleor.local")
+
+
+async def test_validator_caches_decisions():
+    validate_domain = AsyncMock(side_effect=lambda domain: domain == "saleor.local")
+    validator = DomainValidator(validate_domain)
+
+    for _ in range(3):
+        assert await validator("saleor.local")
+        assert not await validator("other.saleor.local")
+
+    assert validate_domain.await_count == 2
+
+
+async def test_validator_negative_ttl(mocker):
+    validate_domain = AsyncMock(return_value=False)
+    validator = DomainValidator(validate_domain, ttl=300, negative_ttl=5)
+    mocker.patch.object(validator.cache, "clock", return_value=0)
+
+    assert not await validator("saleor.local")
+    validator.cache.clock.return_value = 6
+    validate_domain.return_value = True
+    assert await validator("saleor.local")
+    validator.cache.clock.return_value = 200
+    assert await validator("saleor.local")
+
+    assert validate_domain.await_count == 2
+
+
+async def test_validator_concurrent_checks_share_a_call():
+    async def validate_domain(saleor_domain):
+        await asyncio.sleep(0)
+        return True
+
+    validate_domain = AsyncMock(side_effect=validate_domain)
+    validator = DomainValidator(validate_domain)
+
+    assert all(await asyncio.gather(*(validator("saleor.local") for _ in range(5))))
+    assert validate_domain.await_count == 1
+
+
+async def test_validator_invalidate():
+    validate_domain = AsyncMock(return_value=False)
+    validator = DomainValidator(validate_domain)
+
+    assert not await validator("saleor.local")
+    validate_domain.return_value = True
+    validator.invalidate("saleor.local")
+    assert await validator("saleor.local")
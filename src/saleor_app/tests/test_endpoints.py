@@ -1,11 +1,15 @@
 import json
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, Mock
 
+import pytest
 from httpx import AsyncClient
 
+from saleor_app import endpoints
 from saleor_app.deps import SALEOR_DOMAIN_HEADER
+from saleor_app.errors import InstallAppError
 from saleor_app.schemas.handlers import SaleorEventType
 from saleor_app.schemas.manifest import Manifest
+from saleor_app.schemas.utils import LazyPath, LazyUrl
 
 
 async def test_manifest(saleor_app):
@@ -28,6 +32,10 @@ async def test_manifest(saleor_app):
 
 async def test_install(saleor_app_with_webhooks, get_webhook_details, monkeypatch):
     install_app_mock = AsyncMock()
+    clear_domain_cache_mock = Mock()
+    monkeypatch.setattr(
+        saleor_app_with_webhooks, "clear_domain_cache", clear_domain_cache_mock
+    )
     monkeypatch.setattr("saleor_app.endpoints.install_app", install_app_mock)
     base_url = "http://test_app.saleor.local"
 
@@ -60,4 +68,105 @@ async def test_install(saleor_app_with_webhooks, get_webhook_details, monkeypatc
             ],
         },
         use_insecure_saleor_http=False,
+        concurrency=5,
+        session_pool=saleor_app_with_webhooks.saleor_session_pool,
+        metrics=saleor_app_with_webhooks.metrics,
+        tracer=saleor_app_with_webhooks.tracer,
+    )
+    clear_domain_cache_mock.assert_called_once_with("example.com")
+
+
+async def test_install_unexpected_error(saleor_app_with_webhooks, monkeypatch):
+    connection_error = ConnectionError()
+    install_error = InstallAppError("failed", [connection_error])
+    install_error.__cause__ = connection_error
+    monkeypatch.setattr(
+        "saleor_app.endpoints.install_app", AsyncMock(side_effect=install_error)
+    )
+
+    async with AsyncClient(
+        app=saleor_app_with_webhooks, base_url="http://test_app.saleor.local"
+    ) as ac:
+        with pytest.raises(InstallAppError):
+            await ac.post(
+                "configuration/install",
+                json={"auth_token": "saleor-app-token"},
+                headers={SALEOR_DOMAIN_HEADER: "example.com"},
+            )
+
+
+@pytest.mark.parametrize(
+    "install_error,status_code,status",
+    [(None, 200, "ok"), (InstallAppError("failed"), 403, "error")],
+)
+async def test_install_metrics(
+    saleor_app_with_webhooks, monkeypatch, install_error, status_code, status
+):
+    monkeypatch.setattr(
+        "saleor_app.endpoints.install_app", AsyncMock(side_effect=install_error)
     )
+    saleor_app_with_webhooks.include_metrics_route()
+
+    async with AsyncClient(
+        app=saleor_app_with_webhooks, base_url="http://test_app.saleor.local"
+    ) as ac:
+        response = await ac.post(
+            "configuration/install",
+            json={"auth_token": "saleor-app-token"},
+            headers={SALEOR_DOMAIN_HEADER: "example.com"},
+        )
+
+    assert response.status_code == status_code
+    assert saleor_app_with_webhooks.metrics.installs.values == {
+        ("example.com", status): 1
+    }
+
+
+async def test_manifest_is_resolved_per_host(saleor_app):
+    async with AsyncClient(app=saleor_app, base_url="http://one.local") as ac:
+        first = await ac.get("configuration/manifest")
+    async with AsyncClient(app=saleor_app, base_url="http://two.local") as ac:
+        second = await ac.get("configuration/manifest")
+
+    assert first.json()["appUrl"] == "http://one.local/configuration"
+    assert second.json()["appUrl"] == "http://two.local/configuration"
+    assert first.headers["etag"] != second.headers["etag"]
+    assert isinstance(saleor_app.manifest.app_url, LazyUrl)
+    assert isinstance(saleor_app.manifest.extensions[0].url, LazyPath)
+
+
+async def test_manifest_is_cached(saleor_app, mocker):
+    serialize_manifest = mocker.spy(endpoints, "serialize_manifest")
+
+    async with AsyncClient(app=saleor_app, base_url="http://one.local") as ac:
+        first = await ac.get("configuration/manifest")
+        second = await ac.get("configuration/manifest")
+
+    assert serialize_manifest.call_count == 1
+    assert first.content == second.content
+    assert first.headers["cache-control"] == "public, max-age=300"
+
+
+@pytest.mark.parametrize(
+    "if_none_match", ["{etag}", "W/{etag}", '"other", {etag}', "*"]
+)
+async def test_manifest_not_modified(saleor_app, if_none_match):
+    async with AsyncClient(app=saleor_app, base_url="http://one.local") as ac:
+        etag = (await ac.get("configuration/manifest")).headers["etag"]
+        response = await ac.get(
+            "configuration/manifest",
+            headers={"If-None-Match": if_none_match.format(etag=etag)},
+        )
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+async def test_manifest_etag_mismatch(saleor_app):
+    async with AsyncClient(app=saleor_app, base_url="http://one.local") as ac:
+        response = await ac.get(
+            "configuration/manifest", headers={"If-None-Match": '"other"'}
+        )
+
+    assert response.status_code == 200
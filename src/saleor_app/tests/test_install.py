@@ -1,7 +1,13 @@
+import asyncio
 from unittest.mock import AsyncMock
 
-from saleor_app.install import install_app
+import aiohttp
+import pytest
+
+from saleor_app.errors import InstallAppError
+from saleor_app.install import group_webhook_events, install_app
 from saleor_app.saleor.client import SaleorClient
+from saleor_app.saleor.exceptions import GraphQLError
 from saleor_app.saleor.mutations import CREATE_WEBHOOK
 from saleor_app.schemas.core import WebhookData
 
@@ -22,7 +28,9 @@ async def test_install_app(mocker, manifest):
         manifest=manifest,
         events={"queue_1": [("TEST_EVENT_1", None)], "url_1": [("TEST_EVENT_2", None)]},
         use_insecure_saleor_http=True,
-    ) == WebhookData(webhook_id="123", webhook_secret_key="A" * 20)
+    ) == WebhookData(
+        webhook_id="123", webhook_ids=["123", "123"], webhook_secret_key="A" * 20
+    )
 
     mock_get_client_for_app.assert_called_once_with(
         "http://saleor_domain", manifest=manifest, auth_token="test_token"
@@ -69,8 +77,183 @@ async def test_install_app_secure_https(mocker, manifest):
         manifest=manifest,
         events={"queue_1": [("TEST_EVENT_1", None)], "url_1": [("TEST_EVENT_2", None)]},
         use_insecure_saleor_http=False,
-    ) == WebhookData(webhook_id="123", webhook_secret_key="A" * 20)
+    ) == WebhookData(
+        webhook_id="123", webhook_ids=["123", "123"], webhook_secret_key="A" * 20
+    )
 
     mock_get_client_for_app.assert_called_once_with(
         "https://saleor_domain", manifest=manifest, auth_token="test_token"
     )
+
+
+def test_group_webhook_events():
+    assert group_webhook_events(
+        {
+            "url_1": [
+                ("TEST_EVENT_1", None),
+                ("test_event_2", None),
+                ("TEST_EVENT_3", "subscription { a }"),
+                ("TEST_EVENT_4", "subscription { a }"),
+                ("TEST_EVENT_5", "subscription { b }"),
+            ],
+            "queue_1": [("TEST_EVENT_1", None)],
+        }
+    ) == [
+        ("url_1", ["TEST_EVENT_1", "TEST_EVENT_2"], None),
+        ("url_1", ["TEST_EVENT_3", "TEST_EVENT_4"], "subscription { a }"),
+        ("url_1", ["TEST_EVENT_5"], "subscription { b }"),
+        ("queue_1", ["TEST_EVENT_1"], None),
+    ]
+
+
+async def test_install_app_groups_events(mocker, manifest):
+    mock_saleor_client = AsyncMock(SaleorClient)
+    mock_execute = mock_saleor_client.__aenter__.return_value.execute
+    mock_execute.side_effect = [
+        {"webhookCreate": {"webhook": {"id": "1"}}},
+        {"webhookCreate": {"webhook": {"id": "2"}}},
+    ]
+    mocker.patch(
+        "saleor_app.install.get_client_for_app", return_value=mock_saleor_client
+    )
+    mocker.patch("saleor_app.install.secrets.choice", return_value="A")
+
+    assert await install_app(
+        saleor_domain="saleor_domain",
+        auth_token="test_token",
+        manifest=manifest,
+        events={
+            "url_1": [
+                ("TEST_EVENT_1", None),
+                ("TEST_EVENT_2", None),
+                ("TEST_EVENT_3", "subscription { a }"),
+            ]
+        },
+        use_insecure_saleor_http=False,
+    ) == WebhookData(
+        webhook_id="2", webhook_ids=["1", "2"], webhook_secret_key="A" * 20
+    )
+
+    assert mock_execute.call_count == 2
+    mock_execute.assert_any_await(
+        CREATE_WEBHOOK,
+        variables={
+            "input": {
+                "targetUrl": "url_1",
+                "events": ["TEST_EVENT_1", "TEST_EVENT_2"],
+                "name": f"{manifest.name}",
+                "secretKey": "A" * 20,
+            }
+        },
+    )
+    mock_execute.assert_any_await(
+        CREATE_WEBHOOK,
+        variables={
+            "input": {
+                "targetUrl": "url_1",
+                "events": ["TEST_EVENT_3"],
+                "name": f"{manifest.name}",
+                "secretKey": "A" * 20,
+                "query": "subscription { a }",
+            }
+        },
+    )
+
+
+async def test_install_app_concurrency(mocker, manifest):
+    running = 0
+    max_running = 0
+
+    async def execute(query, variables):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(running, max_running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {"webhookCreate": {"webhook": {"id": variables["input"]["targetUrl"]}}}
+
+    mock_saleor_client = AsyncMock(SaleorClient)
+    mock_saleor_client.__aenter__.return_value.execute.side_effect = execute
+    mocker.patch(
+        "saleor_app.install.get_client_for_app", return_value=mock_saleor_client
+    )
+
+    webhook_data = await install_app(
+        saleor_domain="saleor_domain",
+        auth_token="test_token",
+        manifest=manifest,
+        events={f"url_{i}": [("TEST_EVENT_1", None)] for i in range(10)},
+        use_insecure_saleor_http=False,
+        concurrency=3,
+    )
+
+    assert max_running == 3
+    assert webhook_data.webhook_ids == [f"url_{i}" for i in range(10)]
+
+
+async def test_install_app_aggregates_errors(mocker, manifest):
+    mock_saleor_client = AsyncMock(SaleorClient)
+    mock_execute = mock_saleor_client.__aenter__.return_value.execute
+    mock_execute.side_effect = [
+        {"webhookCreate": {"webhook": {"id": "1"}}},
+        GraphQLError(errors=[{"message": "Permission denied"}]),
+        {
+            "webhookCreate": {
+                "webhookErrors": [
+                    {"field": "query", "message": "Invalid", "code": "INVALID"}
+                ],
+                "webhook": None,
+            }
+        },
+    ]
+    mocker.patch(
+        "saleor_app.install.get_client_for_app", return_value=mock_saleor_client
+    )
+
+    with pytest.raises(InstallAppError) as excinfo:
+        await install_app(
+            saleor_domain="saleor_domain",
+            auth_token="test_token",
+            manifest=manifest,
+            events={
+                "url_1": [("TEST_EVENT_1", None)],
+                "url_2": [("TEST_EVENT_2", None)],
+                "url_3": [("TEST_EVENT_3", None)],
+            },
+            use_insecure_saleor_http=False,
+        )
+
+    assert mock_execute.call_count == 3
+    permission_error, webhook_error = excinfo.value.errors
+    assert permission_error.errors == [{"message": "Permission denied"}]
+    assert webhook_error.errors[0]["code"] == "INVALID"
+    assert excinfo.value.__cause__ is None
+
+
+async def test_install_app_unexpected_errors(mocker, manifest):
+    mock_saleor_client = AsyncMock(SaleorClient)
+    mock_execute = mock_saleor_client.__aenter__.return_value.execute
+    connection_error = aiohttp.ClientConnectionError()
+    mock_execute.side_effect = [
+        GraphQLError(errors=[{"message": "Permission denied"}]),
+        connection_error,
+    ]
+    mocker.patch(
+        "saleor_app.install.get_client_for_app", return_value=mock_saleor_client
+    )
+
+    with pytest.raises(InstallAppError) as excinfo:
+        await install_app(
+            saleor_domain="saleor_domain",
+            auth_token="test_token",
+            manifest=manifest,
+            events={
+                "url_1": [("TEST_EVENT_1", None)],
+                "url_2": [("TEST_EVENT_2", None)],
+            },
+            use_insecure_saleor_http=False,
+        )
+
+    assert len(excinfo.value.errors) == 2
+    assert excinfo.value.errors[1] is connection_error
+    assert excinfo.value.__cause__ is connection_error
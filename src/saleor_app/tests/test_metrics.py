@@ -0,0 +1,76 @@
+import pytest
+
+from saleor_app.cache import TTLCache
+from saleor_app.metrics import (
+    Counter,
+    Histogram,
+    Metrics,
+    NoopMetrics,
+    get_operation_name,
+)
+
+
+@pytest.mark.parametrize(
+    "query,name",
+    [
+        ("query Products { products }", "Products"),
+        ("\n  mutation createWebhook($input: X) { x }", "createWebhook"),
+        ("query { products }", "anonymous"),
+        ("{ products }", "anonymous"),
+    ],
+)
+def test_get_operation_name(query, name):
+    assert get_operation_name(query) == name
+
+
+def test_counter_render():
+    counter = Counter("requests_total", "Requests.", ("domain",))
+    counter.inc(("saleor.local",))
+    counter.inc(("saleor.local",), amount=2)
+    counter.inc(('"quoted"\\',))
+
+    assert list(counter.render()) == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{domain="saleor.local"} 3',
+        'requests_total{domain="\\"quoted\\"\\\\"} 1',
+    ]
+
+
+def test_histogram_render():
+    histogram = Histogram("duration_seconds", "Duration.", ("stage",), (0.1, 1))
+    for value in (0.05, 0.1, 0.5, 5):
+        histogram.observe(value, ("handler",))
+
+    assert list(histogram.render()) == [
+        "# HELP duration_seconds Duration.",
+        "# TYPE duration_seconds histogram",
+        'duration_seconds_bucket{stage="handler",le="0.1"} 2',
+        'duration_seconds_bucket{stage="handler",le="1"} 3',
+        'duration_seconds_bucket{stage="handler",le="+Inf"} 4',
+        'duration_seconds_sum{stage="handler"} 5.65',
+        'duration_seconds_count{stage="handler"} 4',
+    ]
+
+
+def test_metrics_render_caches():
+    cache = TTLCache()
+    cache.set("key", "value")
+    cache.get("key")
+    cache.get("missing")
+
+    rendered = Metrics().render({"webhook_details": cache})
+
+    assert 'saleor_app_cache_hits_total{cache="webhook_details"} 1' in rendered
+    assert 'saleor_app_cache_misses_total{cache="webhook_details"} 1' in rendered
+
+
+def test_noop_metrics():
+    metrics = NoopMetrics()
+    metrics.observe_webhook("PRODUCT_CREATED", "saleor.local", "200", 0.1)
+    metrics.observe_webhook_stage("PRODUCT_CREATED", "handler", 0.1)
+    metrics.observe_install("saleor.local", "ok", 0.1)
+    metrics.observe_saleor_request("query Products { products }", "ok", 0.1)
+
+    assert not metrics.enabled
+    assert metrics.render() == ""
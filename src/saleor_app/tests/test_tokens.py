@@ -0,0 +1,147 @@
+import time
+from unittest.mock import ANY, AsyncMock
+
+import aiohttp
+import pytest
+
+from saleor_app.errors import TokenVerificationError
+from saleor_app.tokens import (
+    JWKS_PATH,
+    JWKSTokenVerifier,
+    TokenVerificationCache,
+    decode_token_unverified,
+    token_cache_key,
+)
+
+
+def test_decode_token_unverified(make_jwt):
+    token = make_jwt({"exp": 1, "permissions": ["MANAGE_APPS"]})
+
+    assert decode_token_unverified(token) == {"exp": 1, "permissions": ["MANAGE_APPS"]}
+
+
+def test_token_cache_key():
+    key = token_cache_key("saleor_domain", "token")
+
+    assert key == token_cache_key("saleor_domain", "token")
+    assert key != token_cache_key("other_domain", "token")
+    assert "token" not in key
+
+
+@pytest.mark.parametrize(
+    "payload, is_valid, expected_ttl",
+    (
+        ({}, True, 300),
+        ({}, False, 5),
+        ({"exp": "soon"}, True, 0),
+        ({"exp": 0}, True, 0),
+    ),
+)
+def test_token_verification_cache_get_ttl(make_jwt, payload, is_valid, expected_ttl):
+    cache = TokenVerificationCache()
+
+    assert cache.get_ttl(make_jwt(payload), is_valid) == expected_ttl
+
+
+def test_token_verification_cache_ttl_bounded_by_exp(make_jwt):
+    cache = TokenVerificationCache(max_ttl=300)
+    token = make_jwt({"exp": int(time.time()) + 30})
+
+    assert 0 < cache.get_ttl(token, True) <= 30
+
+
+def test_token_verification_cache_ttl_not_a_jwt():
+    assert TokenVerificationCache().get_ttl("token", True) == 0
+
+
+async def test_token_verification_cache(make_jwt):
+    cache = TokenVerificationCache()
+    token = make_jwt({})
+
+    assert await cache.get("saleor_domain", token) is None
+
+    await cache.set("saleor_domain", token, True)
+
+    assert await cache.get("saleor_domain", token) is True
+    assert await cache.get("other_domain", token) is None
+
+
+async def test_token_verification_cache_custom_backend(make_jwt):
+    backend = AsyncMock()
+    cache = TokenVerificationCache(backend=backend, negative_ttl=1)
+    token = make_jwt({})
+
+    await cache.set("saleor_domain", token, False)
+
+    backend.set.assert_awaited_once_with(
+        token_cache_key("saleor_domain", token), False, ttl=1
+    )
+
+
+async def test_jwks_token_verifier(jwks_session, make_signed_jwt):
+    verifier = JWKSTokenVerifier()
+    token = make_signed_jwt({"exp": int(time.time()) + 60, "permissions": []})
+
+    assert await verifier.verify("https://saleor.local", token, jwks_session) == {
+        "exp": ANY,
+        "permissions": [],
+    }
+    assert await verifier.verify("https://saleor.local", token, jwks_session)
+
+    jwks_session.get.assert_called_once_with(JWKS_PATH, timeout=ANY)
+
+
+async def test_jwks_token_verifier_expired_token(jwks_session, make_signed_jwt):
+    verifier = JWKSTokenVerifier()
+    token = make_signed_jwt({"exp": int(time.time()) - 60})
+
+    with pytest.raises(TokenVerificationError, match="JWT Expired"):
+        await verifier.verify("https://saleor.local", token, jwks_session)
+
+
+async def test_jwks_token_verifier_bad_signature(jwks_session, make_jwt):
+    verifier = JWKSTokenVerifier()
+    token = make_jwt({})
+
+    with pytest.raises(TokenVerificationError):
+        await verifier.verify("https://saleor.local", token, jwks_session)
+
+
+async def test_jwks_token_verifier_malformed_token(jwks_session):
+    with pytest.raises(TokenVerificationError, match="Malformed"):
+        await JWKSTokenVerifier().verify("https://saleor.local", "#", jwks_session)
+
+
+async def test_jwks_token_verifier_refresh_on_unknown_kid(
+    jwks, jwks_session, make_signed_jwt
+):
+    verifier = JWKSTokenVerifier(min_refresh_interval=0)
+    token = make_signed_jwt({}, kid="key-2")
+    await verifier.verify("https://saleor.local", make_signed_jwt({}), jwks_session)
+
+    jwks["keys"][0]["kid"] = "key-2"
+
+    assert await verifier.verify("https://saleor.local", token, jwks_session) == {}
+    assert jwks_session.get.call_count == 2
+
+
+async def test_jwks_token_verifier_refresh_rate_limited(jwks_session, make_signed_jwt):
+    verifier = JWKSTokenVerifier(min_refresh_interval=30)
+    await verifier.verify("https://saleor.local", make_signed_jwt({}), jwks_session)
+
+    for _ in range(3):
+        with pytest.raises(TokenVerificationError, match="Unknown signing key"):
+            await verifier.verify(
+                "https://saleor.local", make_signed_jwt({}, kid="forged"), jwks_session
+            )
+
+    jwks_session.get.assert_called_once()
+
+
+async def test_jwks_token_verifier_fetch_error(jwks_session, make_signed_jwt):
+    jwks_session.get.side_effect = aiohttp.ClientError()
+
+    with pytest.raises(TokenVerificationError, match="Unable to fetch"):
+        await JWKSTokenVerifier().verify(
+            "https://saleor.local", make_signed_jwt({}), jwks_session
+        )
@@ -0,0 +1,90 @@
+import re
+
+import pytest
+
+from saleor_app.tracing import (
+    TRACEPARENT_HEADER,
+    InMemoryTracer,
+    NoopTracer,
+    OpenTelemetryTracer,
+)
+
+
+def test_noop_tracer():
+    tracer = NoopTracer()
+    headers = {}
+
+    with tracer.start_span("span", {"key": "value"}) as span:
+        span.set_attribute("other", 1)
+        tracer.inject(headers)
+
+    assert headers == {}
+
+
+def test_in_memory_tracer_nesting():
+    tracer = InMemoryTracer()
+
+    with tracer.start_span("parent", {"saleor.domain": "saleor.local"}) as parent:
+        with tracer.start_span("child") as child:
+            child.set_attribute("key", "value")
+    with tracer.start_span("other"):
+        pass
+
+    assert [span.name for span in tracer.spans] == ["child", "parent", "other"]
+    assert child.trace_id == parent.trace_id
+    assert child.parent_id == parent.span_id
+    assert parent.parent_id is None
+    assert child.attributes == {"key": "value"}
+    assert parent.attributes == {"saleor.domain": "saleor.local"}
+    assert parent.duration >= child.duration >= 0
+    assert tracer.get_spans("other")[0].trace_id != parent.trace_id
+
+
+def test_in_memory_tracer_records_errors():
+    tracer = InMemoryTracer()
+
+    with pytest.raises(ValueError):
+        with tracer.start_span("span"):
+            raise ValueError("failed")
+
+    (span,) = tracer.spans
+    assert isinstance(span.error, ValueError)
+    assert span.end_time is not None
+
+
+def test_in_memory_tracer_inject():
+    tracer = InMemoryTracer()
+    headers = {}
+
+    tracer.inject(headers)
+    assert headers == {}
+
+    with tracer.start_span("span") as span:
+        tracer.inject(headers)
+
+    assert headers[TRACEPARENT_HEADER] == f"00-{span.trace_id}-{span.span_id}-01"
+    assert re.fullmatch(r"00-[0-9a-f]{32}-[0-9a-f]{16}-01", headers["traceparent"])
+
+
+def test_open_telemetry_tracer():
+    sdk_trace = pytest.importorskip("opentelemetry.sdk.trace")
+    export = pytest.importorskip("opentelemetry.sdk.trace.export")
+    in_memory = pytest.importorskip(
+        "opentelemetry.sdk.trace.export.in_memory_span_exporter"
+    )
+    exporter = in_memory.InMemorySpanExporter()
+    provider = sdk_trace.TracerProvider()
+    provider.add_span_processor(export.SimpleSpanProcessor(exporter))
+    tracer = OpenTelemetryTracer(provider.get_tracer("test"))
+    headers = {}
+
+    with tracer.start_span("parent", {"saleor.domain": "saleor.local"}):
+        with tracer.start_span("child"):
+            tracer.inject(headers)
+
+    child, parent = exporter.get_finished_spans()
+    assert child.parent.span_id == parent.context.span_id
+    assert parent.attributes["saleor.domain"] == "saleor.local"
+    assert headers[TRACEPARENT_HEADER].startswith(
+        f"00-{child.context.trace_id:032x}-{child.context.span_id:016x}-"
+    )
@@ -0,0 +1,17 @@
+import json
+
+import pytest
+
+from saleor_app.utils import json_loads
+
+
+@pytest.mark.parametrize("use_orjson", (True, False))
+def test_json_loads(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr("saleor_app.utils.orjson", None)
+
+    assert json_loads(b'[{"id": 1}]') == [{"id": 1}]
+    assert json_loads('{"id": 1}') == {"id": 1}
+
+    with pytest.raises(json.JSONDecodeError):
+        json_loads(b"not json")
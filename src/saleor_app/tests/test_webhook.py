@@ -0,0 +1,604 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+from typing import List
+
+import pytest
+from fastapi import Depends, HTTPException, Request
+from httpx import AsyncClient
+from pydantic import BaseModel
+
+import saleor_app.webhook
+from saleor_app.dedup import WebhookDeduplicator
+from saleor_app.deps import (
+    SALEOR_DOMAIN_HEADER,
+    SALEOR_SIGNATURE_HEADER,
+    parsed_webhook_payload,
+    request_deadline,
+    typed_webhook_payload,
+    webhook_payload,
+)
+from saleor_app.errors import ConfigurationError
+from saleor_app.schemas.core import WebhookData
+from saleor_app.schemas.handlers import SaleorEventType
+from saleor_app.schemas.webhook import Webhook, WebhookV1
+from saleor_app.tracing import InMemoryTracer
+from saleor_app.webhook import SALEOR_EVENT_HEADER
+from saleor_app.work_queue import WebhookWorkQueue
+
+BASE_URL = "http://test_app.saleor.local"
+
+
+@pytest.fixture
+def webhook_body():
+    return json.dumps([{"id": "UHJvZHVjdDox"}]).encode("utf-8")
+
+
+@pytest.fixture
+def webhook_headers(get_webhook_details, webhook_body):
+    get_webhook_details.return_value = WebhookData(
+        webhook_id="webhook_id", webhook_secret_key="webhook_secret_key"
+    )
+    return {
+        SALEOR_DOMAIN_HEADER: "saleor_domain",
+        SALEOR_SIGNATURE_HEADER: hmac.new(
+            b"webhook_secret_key", webhook_body, hashlib.sha256
+        ).hexdigest(),
+    }
+
+
+@pytest.fixture
+def handled_webhooks(saleor_app_with_webhooks):
+    handled_webhooks = []
+
+    async def product_created(request: Request):
+        handled_webhooks.append(await request.json())
+        return {}
+
+    saleor_app_with_webhooks.webhook_router.http_event_route(
+        SaleorEventType.PRODUCT_CREATED
+    )(product_created)
+    return handled_webhooks
+
+
+def test_http_event_route_compiles_handler(saleor_app_with_webhooks):
+    router = saleor_app_with_webhooks.webhook_router
+
+    assert set(router.http_handlers) == set(router.http_routes)
+    assert all(callable(handler) for handler in router.http_handlers.values())
+
+
+async def test_webhook_dispatch(
+    saleor_app_with_webhooks, handled_webhooks, webhook_body, webhook_headers
+):
+    async with AsyncClient(app=saleor_app_with_webhooks, base_url=BASE_URL) as ac:
+        response = await ac.post(
+            "webhook",
+            content=webhook_body,
+            headers={**webhook_headers, SALEOR_EVENT_HEADER: "product_created"},
+        )
+
+    assert response.status_code == 200
+    assert handled_webhooks == [[{"id": "UHJvZHVjdDox"}]]
+
+
+async def test_webhook_dispatch_unknown_event(
+    saleor_app_with_webhooks, handled_webhooks, webhook_body, webhook_headers
+):
+    async with AsyncClient(app=saleor_app_with_webhooks, base_url=BASE_URL) as ac:
+        response = await ac.post(
+            "webhook",
+            content=webhook_body,
+            headers={**webhook_headers, SALEOR_EVENT_HEADER: "unknown_event"},
+        )
+
+    assert response.status_code == 404
+    assert handled_webhooks == []
+
+
+async def test_webhook_dispatch_sqs_event(
+    saleor_app_with_webhooks, webhook_body, webhook_headers
+):
+    async with AsyncClient(app=saleor_app_with_webhooks, base_url=BASE_URL) as ac:
+        response = await ac.post(
+            "webhook",
+            content=webhook_body,
+            headers={
+                **webhook_headers,
+                SALEOR_EVENT_HEADER: SaleorEventType.ORDER_CREATED.value,
+            },
+        )
+
+    assert response.status_code == 404
+
+
+async def test_webhook_dispatch_missing_event_header(
+    saleor_app_with_webhooks, webhook_body, webhook_headers
+):
+    async with AsyncClient(app=saleor_app_with_webhooks, base_url=BASE_URL) as ac:
+        response = await ac.post(
+            "webhook", content=webhook_body, headers=webhook_headers
+        )
+
+    assert response.status_code == 400
+
+
+async def test_webhook_dispatch_invalid_signature(
+    saleor_app_with_webhooks, handled_webhooks, webhook_body, webhook_headers
+):
+    async with AsyncClient(app=saleor_app_with_webhooks, base_url=BASE_URL) as ac:
+        response = await ac.post(
+            "webhook",
+            content=webhook_body,
+            headers={
+                **webhook_headers,
+                SALEOR_EVENT_HEADER: "product_created",
+                SALEOR_SIGNATURE_HEADER: "bad_signature",
+            },
+        )
+
+    assert response.status_code == 401
+    assert handled_webhooks == []
+
+
+async def test_webhook_body_decoded_once(
+    saleor_app_with_webhooks, webhook_body, webhook_headers, mocker
+):
+    checked_payloads = []
+
+    async def checker(request: Request):
+        checked_payloads.append(await request.json())
+
+    async def product_updated(
+        request: Request,
+        payload: List[Webhook],
+        raw_payload=Depends(webhook_payload),
+        _checker=Depends(checker),
+    ):
+        assert raw_payload is await request.json()
+        return {}
+
+    saleor_app_with_webhooks.webhook_router.http_event_route(
+        SaleorEventType.PRODUCT_UPDATED
+    )(product_updated)
+    json_loads = mocker.patch(
+        "saleor_app.webhook.json_loads", wraps=saleor_app.webhook.json_loads
+    )
+
+    async with AsyncClient(app=saleor_app_with_webhooks, base_url=BASE_URL) as ac:
+        response = await ac.post(
+            "webhook",
+            content=webhook_body,
+            headers={**webhook_headers, SALEOR_EVENT_HEADER: "product_updated"},
+        )
+
+    assert response.status_code == 200
+    assert checked_payloads == [[{"id": "UHJvZHVjdDox"}]]
+    json_loads.assert_called_once_with(webhook_body)
+
+
+async def test_webhook_invalid_json(saleor_app_with_webhooks, webhook_headers):
+    async def product_updated(payload=Depends(webhook_payload)):
+        return {}
+
+    saleor_app_with_webhooks.webhook_router.http_event_route(
+        SaleorEventType.PRODUCT_UPDATED
+    )(product_updated)
+    body = b"not json"
+
+    async with AsyncClient(app=saleor_app_with_webhooks, base_url=BASE_URL) as ac:
+        response = await ac.post(
+            "webhook",
+            content=body,
+            headers={
+                **webhook_headers,
+                SALEOR_SIGNATURE_HEADER: hmac.new(
+                    b"webhook_secret_key", body, hashlib.sha256
+                ).hexdigest(),
+                SALEOR_EVENT_HEADER: "product_updated",
+            },
+        )
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("trusted", (True, False))
+async def test_parsed_webhook_payload(
+    saleor_app_with_webhooks, webhook_body, webhook_headers, trusted
+):
+    saleor_app_with_webhooks.trust_verified_payloads = trusted
+    parsed_payloads = []
+
+    async def product_updated(payload=Depends(parsed_webhook_payload)):
+        parsed_payloads.append(payload)
+        return {}
+
+    saleor_app_with_webhooks.webhook_router.http_event_route(
+        SaleorEventType.PRODUCT_UPDATED
+    )(product_updated)
+
+    async with AsyncClient(app=saleor_app_with_webhooks, base_url=BASE_URL) as ac:
+        response = await ac.post(
+            "webhook",
+            content=webhook_body,
+            headers={**webhook_headers, SALEOR_EVENT_HEADER: "product_updated"},
+        )
+
+    assert response.status_code == 200
+    assert parsed_payloads == [[WebhookV1(id="UHJvZHVjdDox")]]
+
+
+async def test_parsed_webhook_payload_invalid(
+    saleor_app_with_webhooks, webhook_headers
+):
+    async def product_updated(payload=Depends(parsed_webhook_payload)):
+        return {}
+
+    saleor_app_with_webhooks.webhook_router.http_event_route(
+        SaleorEventType.PRODUCT_UPDATED
+    )(product_updated)
+    body = b'{"id": "UHJvZHVjdDox"}'
+
+    async with AsyncClient(app=saleor_app_with_webhooks, base_url=BASE_URL) as ac:
+        response = await ac.post(
+            "webhook",
+            content=body,
+            headers={
+                **webhook_headers,
+                SALEOR_SIGNATURE_HEADER: hmac.new(
+                    b"webhook_secret_key", body, hashlib.sha256
+                ).hexdigest(),
+                SALEOR_EVENT_HEADER: "product_updated",
+            },
+        )
+
+    assert response.status_code == 422
+
+
+class ProductPayload(BaseModel):
+    id: str
+    name: str
+
+
+async def test_typed_webhook_payload(
+    saleor_app_with_webhooks, webhook_body, webhook_headers
+):
+    product_ids = []
+
+    async def product_updated(payload=Depends(typed_webhook_payload)):
+        product_ids.extend(product.id for product in payload)
+        return {}
+
+    saleor_app_with_webhooks.webhook_router.http_event_route(
+        SaleorEventType.PRODUCT_UPDATED, payload_model=ProductPayload
+    )(product_updated)
+
+    async with AsyncClient(app=saleor_app_with_webhooks, base_url=BASE_URL) as ac:
+        response = await ac.post(
+            "webhook",
+            content=webhook_body,
+            headers={**webhook_headers, SALEOR_EVENT_HEADER: "product_updated"},
+        )
+
+    assert response.status_code == 200
+    assert product_ids == ["UHJvZHVjdDox"]
+
+
+async def test_typed_webhook_payload_without_model(
+    saleor_app_with_webhooks, webhook_body, webhook_headers
+):
+    async def product_updated(payload=Depends(typed_webhook_payload)):
+        return {}
+
+    saleor_app_with_webhooks.webhook_router.http_event_route(
+        SaleorEventType.PRODUCT_UPDATED
+    )(product_updated)
+
+    with pytest.raises(ConfigurationError):
+        async with AsyncClient(app=saleor_app_with_webhooks, base_url=BASE_URL) as ac:
+            await ac.post(
+                "webhook",
+                content=webhook_body,
+                headers={**webhook_headers, SALEOR_EVENT_HEADER: "product_updated"},
+            )
+
+
+@pytest.mark.parametrize("timeout, expected", [(None, None), (10, 110)])
+async def test_webhook_request_deadline(
+    saleor_app_with_webhooks, webhook_body, webhook_headers, mocker, timeout, expected
+):
+    mocker.patch("saleor_app.webhook.time.monotonic", return_value=100)
+    saleor_app_with_webhooks.webhook_response_timeout = timeout
+    deadlines = []
+
+    async def product_created(deadline=Depends(request_deadline)):
+        deadlines.append(deadline)
+        return {}
+
+    saleor_app_with_webhooks.webhook_router.http_event_route(
+        SaleorEventType.PRODUCT_CREATED
+    )(product_created)
+
+    async with AsyncClient(app=saleor_app_with_webhooks, base_url=BASE_URL) as ac:
+        response = await ac.post(
+            "webhook",
+            content=webhook_body,
+            headers={**webhook_headers, SALEOR_EVENT_HEADER: "product_created"},
+        )
+
+    assert response.status_code == 200
+    assert deadlines == [expected]
+
+
+@pytest.fixture
+async def immediate_webhooks(saleor_app_with_webhooks):
+    # Async, so the event is created in the test's loop, on Python < 3.10 it
+    # is bound to the loop it's created in
+    handled = []
+    release = asyncio.Event()
+
+    async def product_created(payload, saleor_domain):
+        await release.wait()
+        handled.append((payload, saleor_domain))
+
+    saleor_app_with_webhooks.webhook_router.http_event_route(
+        SaleorEventType.PRODUCT_CREATED, ack="immediate"
+    )(product_created)
+    return handled, release
+
+
+async def test_webhook_ack_immediate(
+    saleor_app_with_webhooks, immediate_webhooks, webhook_body, webhook_headers
+):
+    handled, release = immediate_webhooks
+
+    async with AsyncClient(app=saleor_app_with_webhooks, base_url=BASE_URL) as ac:
+        response = await ac.post(
+            "webhook",
+            content=webhook_body,
+            headers={**webhook_headers, SALEOR_EVENT_HEADER: "product_created"},
+        )
+
+    assert response.status_code == 200
+    assert handled == []
+
+    release.set()
+    await saleor_app_with_webhooks.router.shutdown()
+
+    assert len(handled) == 1
+    payload, saleor_domain = handled[0]
+    assert isinstance(payload[0], WebhookV1)
+    assert payload[0].id == "UHJvZHVjdDox"
+    assert saleor_domain == "saleor_domain"
+
+
+async def test_webhook_ack_immediate_sync_handler(
+    saleor_app_with_webhooks, webhook_body, webhook_headers
+):
+    handled = []
+
+    def product_created(payload, saleor_domain):
+        handled.append((threading.current_thread(), saleor_domain))
+
+    saleor_app_with_webhooks.webhook_router.http_event_route(
+        SaleorEventType.PRODUCT_CREATED, ack="immediate"
+    )(product_created)
+
+    async with AsyncClient(app=saleor_app_with_webhooks, base_url=BASE_URL) as ac:
+        response = await ac.post(
+            "webhook",
+            content=webhook_body,
+            headers={**webhook_headers, SALEOR_EVENT_HEADER: "product_created"},
+        )
+    await saleor_app_with_webhooks.router.shutdown()
+
+    assert response.status_code == 200
+    assert len(handled) == 1
+    thread, saleor_domain = handled[0]
+    assert thread is not threading.current_thread()
+    assert saleor_domain == "saleor_domain"
+
+
+async def test_webhook_ack_immediate_invalid_signature(
+    saleor_app_with_webhooks, immediate_webhooks, webhook_body, webhook_headers
+):
+    async with AsyncClient(app=saleor_app_with_webhooks, base_url=BASE_URL) as ac:
+        response = await ac.post(
+            "webhook",
+            content=webhook_body,
+            headers={
+                **webhook_headers,
+                SALEOR_SIGNATURE_HEADER: "invalid",
+                SALEOR_EVENT_HEADER: "product_created",
+            },
+        )
+
+    assert response.status_code == 401
+    assert len(saleor_app_with_webhooks.webhook_work_queue) == 0
+
+
+async def test_webhook_ack_immediate_queue_full(
+    saleor_app_with_webhooks, immediate_webhooks, webhook_body, webhook_headers
+):
+    handled, release = immediate_webhooks
+    saleor_app_with_webhooks.webhook_work_queue = WebhookWorkQueue(maxsize=1, workers=1)
+
+    async with AsyncClient(app=saleor_app_with_webhooks, base_url=BASE_URL) as ac:
+        statuses = []
+        for _ in range(3):
+            response = await ac.post(
+                "webhook",
+                content=webhook_body,
+                headers={**webhook_headers, SALEOR_EVENT_HEADER: "product_created"},
+            )
+            statuses.append(response.status_code)
+            await asyncio.sleep(0)
+
+    assert statuses == [200, 200, 503]
+
+    release.set()
+    await saleor_app_with_webhooks.webhook_work_queue.drain()
+    assert len(handled) == 2
+
+
+async def test_webhook_duplicate_delivery(
+    saleor_app_with_webhooks, handled_webhooks, webhook_body, webhook_headers
+):
+    saleor_app_with_webhooks.webhook_deduplicator = WebhookDeduplicator()
+
+    async with AsyncClient(app=saleor_app_with_webhooks, base_url=BASE_URL) as ac:
+        statuses = [
+            (
+                await ac.post(
+                    "webhook",
+                    content=webhook_body,
+                    headers={**webhook_headers, SALEOR_EVENT_HEADER: "product_created"},
+                )
+            ).status_code
+            for _ in range(2)
+        ]
+
+    assert statuses == [200, 200]
+    assert handled_webhooks == [[{"id": "UHJvZHVjdDox"}]]
+
+
+async def test_webhook_failed_delivery_not_deduplicated(
+    saleor_app_with_webhooks, webhook_body, webhook_headers
+):
+    saleor_app_with_webhooks.webhook_deduplicator = WebhookDeduplicator()
+    calls = []
+
+    async def product_created():
+        calls.append(True)
+        if len(calls) == 1:
+            raise HTTPException(status_code=500)
+        return {}
+
+    saleor_app_with_webhooks.webhook_router.http_event_route(
+        SaleorEventType.PRODUCT_CREATED
+    )(product_created)
+
+    async with AsyncClient(app=saleor_app_with_webhooks, base_url=BASE_URL) as ac:
+        statuses = [
+            (
+                await ac.post(
+                    "webhook",
+                    content=webhook_body,
+                    headers={**webhook_headers, SALEOR_EVENT_HEADER: "product_created"},
+                )
+            ).status_code
+            for _ in range(3)
+        ]
+
+    assert statuses == [500, 200, 200]
+    assert len(calls) == 2
+
+
+async def test_webhook_metrics(
+    saleor_app_with_webhooks, handled_webhooks, webhook_body, webhook_headers
+):
+    saleor_app_with_webhooks.include_metrics_route()
+    metrics = saleor_app_with_webhooks.metrics
+
+    async with AsyncClient(app=saleor_app_with_webhooks, base_url=BASE_URL) as ac:
+        for signature in (webhook_headers[SALEOR_SIGNATURE_HEADER], "invalid"):
+            await ac.post(
+                "webhook",
+                content=webhook_body,
+                headers={
+                    **webhook_headers,
+                    SALEOR_EVENT_HEADER: "product_created",
+                    SALEOR_SIGNATURE_HEADER: signature,
+                },
+            )
+        for i in range(3):
+            await ac.post(
+                "webhook",
+                content=webhook_body,
+                headers={
+                    **webhook_headers,
+                    SALEOR_EVENT_HEADER: "product_created",
+                    SALEOR_DOMAIN_HEADER: f"unknown-{i}",
+                    SALEOR_SIGNATURE_HEADER: "invalid",
+                },
+            )
+        response = await ac.get("metrics")
+
+    assert metrics.webhooks.values == {
+        ("PRODUCT_CREATED", "saleor_domain", "200"): 1,
+        ("PRODUCT_CREATED", "unverified", "401"): 4,
+    }
+    assert {stage for _, stage in metrics.webhook_duration.counts} == {
+        "total",
+        "webhook_details",
+        "signature",
+        "handler",
+    }
+    assert sum(metrics.webhook_duration.counts[("PRODUCT_CREATED", "handler")]) == 1
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert (
+        'saleor_app_webhooks_total{event="PRODUCT_CREATED",'
+        'saleor_domain="saleor_domain",status="200"} 1'
+    ) in response.text
+    assert 'saleor_app_cache_hits_total{cache="webhook_details"} 1' in response.text
+
+
+async def test_webhook_spans(
+    saleor_app_with_webhooks, handled_webhooks, webhook_body, webhook_headers
+):
+    tracer = saleor_app_with_webhooks.tracer = InMemoryTracer()
+
+    async with AsyncClient(app=saleor_app_with_webhooks, base_url=BASE_URL) as ac:
+        response = await ac.post(
+            "webhook",
+            content=webhook_body,
+            headers={**webhook_headers, SALEOR_EVENT_HEADER: "product_created"},
+        )
+
+    assert response.status_code == 200
+    (root,) = tracer.get_spans("saleor_app.webhook")
+    assert root.attributes == {
+        "saleor.domain": "saleor_domain",
+        "saleor.event": "PRODUCT_CREATED",
+        "http.status_code": 200,
+    }
+    assert [span.name for span in tracer.spans if span.parent_id == root.span_id] == [
+        "saleor_app.validate_domain",
+        "saleor_app.get_webhook_details",
+        "saleor_app.verify_signature",
+        "saleor_app.handler",
+    ]
+
+
+async def test_webhook_spans_immediate_ack(
+    saleor_app_with_webhooks, webhook_body, webhook_headers
+):
+    tracer = saleor_app_with_webhooks.tracer = InMemoryTracer()
+    handled = asyncio.Event()
+
+    async def product_created(payload: List[Webhook], saleor_domain: str):
+        handled.set()
+
+    saleor_app_with_webhooks.webhook_router.http_event_route(
+        SaleorEventType.PRODUCT_CREATED, ack="immediate"
+    )(product_created)
+
+    async with AsyncClient(app=saleor_app_with_webhooks, base_url=BASE_URL) as ac:
+        await ac.post(
+            "webhook",
+            content=webhook_body,
+            headers={**webhook_headers, SALEOR_EVENT_HEADER: "product_created"},
+        )
+    await asyncio.wait_for(handled.wait(), 1)
+    await saleor_app_with_webhooks.webhook_work_queue.drain()
+
+    assert {span.name for span in tracer.spans} >= {
+        "saleor_app.webhook",
+        "saleor_app.decode_payload",
+        "saleor_app.parse_payload",
+        "saleor_app.enqueue",
+        "saleor_app.handler",
+    }
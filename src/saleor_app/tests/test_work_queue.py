@@ -0,0 +1,116 @@
+import asyncio
+import functools
+
+import pytest
+
+from saleor_app.work_queue import WebhookWorkQueue
+
+
+async def test_work_queue_runs_handlers():
+    work_queue = WebhookWorkQueue(workers=2)
+    handled = []
+
+    async def handler(payload, saleor_domain):
+        handled.append((payload, saleor_domain))
+
+    work_queue.put_nowait(handler, "payload_1", "saleor_domain")
+    work_queue.put_nowait(handler, "payload_2", "saleor_domain")
+    await work_queue.drain()
+
+    assert handled == [
+        ("payload_1", "saleor_domain"),
+        ("payload_2", "saleor_domain"),
+    ]
+    assert work_queue.queue is None
+
+
+async def test_work_queue_full():
+    work_queue = WebhookWorkQueue(maxsize=1, workers=1)
+    release = asyncio.Event()
+
+    async def handler():
+        await release.wait()
+
+    work_queue.put_nowait(handler)
+    await asyncio.sleep(0)
+    work_queue.put_nowait(handler)
+
+    with pytest.raises(asyncio.QueueFull):
+        work_queue.put_nowait(handler)
+
+    release.set()
+    await work_queue.drain()
+
+
+async def test_work_queue_handler_error(caplog):
+    work_queue = WebhookWorkQueue(workers=1)
+    handled = []
+
+    async def failing():
+        raise ValueError()
+
+    async def handler():
+        handled.append(True)
+
+    work_queue.put_nowait(failing)
+    work_queue.put_nowait(handler)
+    await work_queue.drain()
+
+    assert handled == [True]
+    assert "Webhook handler <function" in caplog.text
+    assert "failing at" in caplog.text
+
+
+async def test_work_queue_handler_without_name_error(caplog):
+    work_queue = WebhookWorkQueue(workers=1)
+    handled = []
+
+    async def failing(payload):
+        raise ValueError()
+
+    async def handler():
+        handled.append(True)
+
+    work_queue.put_nowait(functools.partial(failing, "payload"))
+    work_queue.put_nowait(handler)
+    await work_queue.drain()
+
+    assert handled == [True]
+    assert "Webhook handler functools.partial(" in caplog.text
+
+
+async def test_work_queue_drain_timeout(caplog):
+    work_queue = WebhookWorkQueue(workers=1, drain_timeout=0.01)
+    cancelled = asyncio.Event()
+
+    async def handler():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    work_queue.put_nowait(handler)
+    work_queue.put_nowait(handler)
+    await work_queue.drain()
+
+    assert cancelled.is_set()
+    assert "Dropping 1 queued webhooks on shutdown" in caplog.text
+
+
+async def test_work_queue_rejects_while_draining():
+    work_queue = WebhookWorkQueue(workers=1)
+    release = asyncio.Event()
+
+    async def handler():
+        await release.wait()
+
+    work_queue.put_nowait(handler)
+    drain = asyncio.create_task(work_queue.drain())
+    await asyncio.sleep(0)
+
+    with pytest.raises(asyncio.QueueFull):
+        work_queue.put_nowait(handler)
+
+    release.set()
+    await drain
@@ -0,0 +1,160 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+import aiohttp
+from jwt import JWT, AbstractJWKBase, jwk_from_dict
+from jwt.exceptions import JWTDecodeError, JWTException
+from jwt.utils import b64decode
+
+from saleor_app.cache import CacheBackend, InMemoryCacheBackend, TTLCache
+from saleor_app.errors import TokenVerificationError
+from saleor_app.schemas.core import DomainName
+
+logger = logging.getLogger(__name__)
+
+JWKS_PATH = "/.well-known/jwks.json"
+
+_jwt = JWT()
+
+
+def decode_token_unverified(token: str) -> Dict[str, Any]:
+    """
+    Returns the JWT payload without checking the signature or expiry, only
+    use it on tokens that were verified by other means.
+    """
+    return _jwt.decode(token, do_verify=False, do_time_check=False)
+
+
+def token_cache_key(saleor_domain: DomainName, token: str) -> str:
+    return hashlib.sha256(f"{saleor_domain}:{token}".encode("utf-8")).hexdigest()
+
+
+class TokenVerificationCache:
+    """
+    Caches the outcome of Saleor's `tokenVerify` mutation.
+
+    Valid tokens are cached for at most `max_ttl` seconds and never past the
+    JWT `exp` claim, invalid ones only for `negative_ttl` seconds. Raw tokens
+    never reach the backend, entries are keyed by a hash of domain and token.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        max_ttl: float = 300,
+        negative_ttl: float = 5,
+    ):
+        self.backend = backend or InMemoryCacheBackend(ttl=max_ttl)
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+
+    def get_ttl(self, token: str, is_valid: bool) -> float:
+        if not is_valid:
+            return self.negative_ttl
+        try:
+            expires_at = decode_token_unverified(token).get("exp")
+        except (JWTDecodeError, ValueError):
+            return 0
+        if expires_at is None:
+            return self.max_ttl
+        if not isinstance(expires_at, (int, float)):
+            return 0
+        return max(0, min(self.max_ttl, expires_at - time.time()))
+
+    async def get(self, saleor_domain: DomainName, token: str) -> Optional[bool]:
+        return await self.backend.get(token_cache_key(saleor_domain, token))
+
+    async def set(self, saleor_domain: DomainName, token: str, is_valid: bool):
+        ttl = self.get_ttl(token, is_valid)
+        if ttl > 0:
+            await self.backend.set(
+                token_cache_key(saleor_domain, token), is_valid, ttl=ttl
+            )
+
+
+def get_token_header(token: str) -> Dict[str, Any]:
+    try:
+        return json.loads(b64decode(token.split(".", 1)[0]))
+    except ValueError as exc:
+        raise TokenVerificationError("Malformed token header.") from exc
+
+
+class JWKSTokenVerifier:
+    """
+    Verifies Saleor tokens locally against the instance's JSON Web Key Set.
+
+    Key sets are fetched from `/.well-known/jwks.json` and cached per Saleor
+    url for `ttl` seconds. A token signed with an unknown key id triggers a
+    refresh, but not more often than every `min_refresh_interval` seconds per
+    Saleor url so that forged key ids can't be used to flood Saleor.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 3600,
+        min_refresh_interval: float = 30,
+        algorithms=frozenset({"RS256"}),
+        timeout: float = 5,
+    ):
+        self.keys = TTLCache(ttl=ttl)
+        self.last_refresh = TTLCache(ttl=min_refresh_interval)
+        self.algorithms = algorithms
+        self.timeout = timeout
+        self.locks = defaultdict(asyncio.Lock)
+
+    async def fetch_keys(
+        self, session: aiohttp.ClientSession
+    ) -> Dict[str, AbstractJWKBase]:
+        async with session.get(
+            JWKS_PATH, timeout=aiohttp.ClientTimeout(total=self.timeout)
+        ) as resp:
+            jwks = await resp.json(content_type=None)
+        keys = {}
+        for key in jwks.get("keys", []):
+            try:
+                keys[key.get("kid")] = jwk_from_dict(key)
+            except (JWTException, ValueError, KeyError):
+                logger.warning("Skipping an unsupported key in %s", JWKS_PATH)
+        return keys
+
+    async def get_key(
+        self, saleor_url: str, kid: Optional[str], session: aiohttp.ClientSession
+    ) -> AbstractJWKBase:
+        keys = self.keys.get(saleor_url)
+        if keys is not None and kid in keys:
+            return keys[kid]
+        async with self.locks[saleor_url]:
+            keys = self.keys.get(saleor_url)
+            if (keys is None or kid not in keys) and (
+                saleor_url not in self.last_refresh
+            ):
+                self.last_refresh.set(saleor_url, True)
+                try:
+                    keys = await self.fetch_keys(session)
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as exc:
+                    raise TokenVerificationError(
+                        f"Unable to fetch the key set from {saleor_url}."
+                    ) from exc
+                self.keys.set(saleor_url, keys)
+        if keys is None or kid not in keys:
+            raise TokenVerificationError(f"Unknown signing key {kid}.")
+        return keys[kid]
+
+    async def verify(
+        self, saleor_url: str, token: str, session: aiohttp.ClientSession
+    ) -> Dict[str, Any]:
+        """
+        Returns the token payload if the signature and expiry are valid,
+        raises `TokenVerificationError` otherwise.
+        """
+        header = get_token_header(token)
+        key = await self.get_key(saleor_url, header.get("kid"), session)
+        try:
+            return _jwt.decode(token, key, algorithms=self.algorithms)
+        except JWTException as exc:
+            raise TokenVerificationError(str(exc)) from exc
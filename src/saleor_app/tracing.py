@@ -0,0 +1,173 @@
+"""
+Spans around the stages of handling webhooks and installs and around GraphQL
+calls to Saleor, with the trace context propagated to Saleor in the W3C
+`traceparent` header.
+
+Pass a `Tracer` to `SaleorApp(tracer=...)`, `OpenTelemetryTracer` reports to
+OpenTelemetry, `InMemoryTracer` keeps the spans in memory for tests.
+"""
+import secrets
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Protocol
+
+from saleor_app.errors import ConfigurationError
+
+try:
+    from opentelemetry import propagate, trace
+except ImportError:  # pragma: no cover
+    trace = None
+
+TRACEPARENT_HEADER = "traceparent"
+
+
+class Span(Protocol):
+    def set_attribute(self, key: str, value: Any):
+        ...
+
+
+class Tracer(Protocol):
+    def start_span(
+        self, name: str, attributes: Optional[Dict[str, Any]] = None
+    ) -> ContextManager[Span]:
+        """
+        Starts a span, a child of the current one, and makes it the current
+        span until the context manager exits.
+        """
+        ...
+
+    def inject(self, headers: Dict[str, str]):
+        """Adds the current trace context to the headers of an outgoing request."""
+        ...
+
+
+class NoopSpan:
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def __enter__(self) -> "NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class NoopTracer:
+    """The default tracer, records nothing."""
+
+    def start_span(
+        self, name: str, attributes: Optional[Dict[str, Any]] = None
+    ) -> NoopSpan:
+        return NOOP_SPAN
+
+    def inject(self, headers: Dict[str, str]):
+        pass
+
+
+def format_traceparent(trace_id: str, span_id: str) -> str:
+    return f"00-{trace_id}-{span_id}-01"
+
+
+class RecordedSpan:
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        attributes: Dict[str, Any],
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.error: Optional[BaseException] = None
+        self.start_time = time.perf_counter()
+        self.end_time: Optional[float] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    def __repr__(self):
+        return f"RecordedSpan({self.name})"
+
+
+_current_span: ContextVar[Optional[RecordedSpan]] = ContextVar(
+    "saleor_app_current_span", default=None
+)
+
+
+class InMemoryTracer:
+    """
+    Keeps the last `maxlen` finished spans in `spans`, in the order they
+    finished. Meant for tests and for profiling a single process.
+    """
+
+    def __init__(self, maxlen: int = 10_000):
+        self.spans: "deque[RecordedSpan]" = deque(maxlen=maxlen)
+
+    @contextmanager
+    def start_span(
+        self, name: str, attributes: Optional[Dict[str, Any]] = None
+    ) -> Iterator[RecordedSpan]:
+        parent = _current_span.get()
+        span = RecordedSpan(
+            name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            parent_id=parent.span_id if parent else None,
+            attributes=dict(attributes or {}),
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.error = exc
+            raise
+        finally:
+            span.end_time = time.perf_counter()
+            _current_span.reset(token)
+            self.spans.append(span)
+
+    def inject(self, headers: Dict[str, str]):
+        span = _current_span.get()
+        if span is not None:
+            headers[TRACEPARENT_HEADER] = format_traceparent(
+                span.trace_id, span.span_id
+            )
+
+    def get_spans(self, name: Optional[str] = None) -> List[RecordedSpan]:
+        return [span for span in self.spans if name is None or span.name == name]
+
+    def clear(self):
+        self.spans.clear()
+
+
+class OpenTelemetryTracer:
+    """
+    Reports spans to OpenTelemetry, the context is propagated with the
+    globally configured propagator (W3C Trace Context by default).
+    """
+
+    def __init__(self, tracer=None):
+        if trace is None:
+            raise ConfigurationError(
+                "opentelemetry-api is required to report spans to OpenTelemetry."
+            )
+        self.tracer = tracer or trace.get_tracer("saleor_app")
+
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        return self.tracer.start_as_current_span(name, attributes=attributes)
+
+    def inject(self, headers: Dict[str, str]):
+        propagate.inject(headers)
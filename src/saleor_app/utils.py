@@ -0,0 +1,18 @@
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def json_loads(data: Union[bytes, str]) -> Any:
+    """
+    Decodes JSON with `orjson` when it's installed, falls back to the
+    standard library otherwise. Both raise a subclass of
+    `json.JSONDecodeError` on invalid input.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
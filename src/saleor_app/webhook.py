@@ -1,14 +1,27 @@
-from typing import Callable, List, Optional
+import asyncio
+import functools
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, List, Literal, Optional, Type
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Request
 from fastapi.routing import APIRoute
-from starlette.responses import Response
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
 
 from saleor_app.deps import (
+    SALEOR_DOMAIN_HEADER,
+    SALEOR_EVENT_HEADER,
+    deduplicate_webhook,
+    parsed_webhook_payload,
     saleor_domain_header,
+    typed_webhook_payload,
     verify_saleor_domain,
     verify_webhook_signature,
 )
+from saleor_app.errors import DuplicateWebhook
+from saleor_app.metrics import UNVERIFIED_DOMAIN
 from saleor_app.schemas.handlers import (
     SaleorEventType,
     SQSHandler,
@@ -16,17 +29,87 @@ from saleor_app.schemas.handlers import (
     WebHookHandlerSignature,
 )
 from saleor_app.schemas.webhook import Webhook
+from saleor_app.tracing import NoopTracer, Tracer
+from saleor_app.utils import json_loads
+from saleor_app.work_queue import WebhookWorkQueue
 
-SALEOR_EVENT_HEADER = "x-saleor-event"
+# The tracer of the app handling the current webhook, used for handler spans
+current_tracer: ContextVar[Tracer] = ContextVar(
+    "saleor_app_webhook_tracer", default=NoopTracer()
+)
+
+
+def traced_handler(func: Callable, tracer: Optional[Tracer] = None) -> Callable:
+    """
+    Wraps an event handler in a `saleor_app.handler` span of `tracer`, or
+    of the `current_tracer`. FastAPI still sees the signature of `func`.
+    """
+    if asyncio.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def handler(*args, **kwargs):
+            with (tracer or current_tracer.get()).start_span("saleor_app.handler"):
+                return await func(*args, **kwargs)
+
+    else:
+
+        @functools.wraps(func)
+        def handler(*args, **kwargs):
+            with (tracer or current_tracer.get()).start_span("saleor_app.handler"):
+                return func(*args, **kwargs)
+
+    return handler
+
+
+class WebhookRequest(Request):
+    """
+    The body is read once (and cached by Starlette) for the signature check,
+    it's also decoded only once and the result is shared with FastAPI's body
+    parsing, dependencies and handlers through `request.state`.
+    """
+
+    async def json(self) -> Any:
+        try:
+            return self.state.webhook_payload
+        except AttributeError:
+            pass
+        payload = json_loads(await self.body())
+        self.state.webhook_payload = payload
+        return payload
 
 
 class WebhookRoute(APIRoute):
     def get_route_handler(self) -> Callable:
         async def custom_route_handler(request: Request) -> Response:
+            request = WebhookRequest(request.scope, request.receive)
+            if timeout := request.app.webhook_response_timeout:
+                # The time Saleor still waits for the response, Saleor calls
+                # made while handling the webhook should not outlive it
+                request.state.deadline = time.monotonic() + timeout
             if event_type := request.headers.get(SALEOR_EVENT_HEADER):
-                route = request.app.webhook_router.http_routes[event_type.upper()]
-                handler = route.get_route_handler()
-                response: Response = await handler(request)
+                handler = request.app.webhook_router.http_handlers.get(
+                    event_type.upper()
+                )
+                if handler is None:
+                    raise HTTPException(
+                        status_code=404, detail=f"Unsupported event {event_type}."
+                    )
+                tracer = request.app.tracer
+                with tracer.start_span(
+                    "saleor_app.webhook",
+                    {
+                        "saleor.domain": request.headers.get(SALEOR_DOMAIN_HEADER),
+                        "saleor.event": event_type.upper(),
+                    },
+                ) as span:
+                    token = current_tracer.set(tracer)
+                    try:
+                        response = await self.dispatch(
+                            request, handler, event_type.upper()
+                        )
+                    finally:
+                        current_tracer.reset(token)
+                    span.set_attribute("http.status_code", response.status_code)
                 return response
 
             raise HTTPException(
@@ -35,18 +118,67 @@ class WebhookRoute(APIRoute):
 
         return custom_route_handler
 
+    async def dispatch(
+        self, request: Request, handler: Callable, event_type: str
+    ) -> Response:
+        started_at = time.perf_counter()
+        status = "error"
+        try:
+            response: Response = await handler(request)
+        except DuplicateWebhook:
+            status = "duplicate"
+            return JSONResponse({})
+        except HTTPException as exc:
+            status = str(exc.status_code)
+            raise
+        else:
+            status = str(response.status_code)
+        finally:
+            self.observe(request, event_type, status, started_at)
+        key = getattr(request.state, "webhook_dedup_key", None)
+        if key is not None and response.status_code < 400:
+            await request.app.webhook_deduplicator.mark_handled(key)
+        return response
+
+    @staticmethod
+    def observe(request: Request, event_type: str, status: str, started_at: float):
+        finished_at = time.perf_counter()
+        metrics = request.app.metrics
+        verified_at = getattr(request.state, "webhook_verified_at", None)
+        metrics.observe_webhook(
+            event_type,
+            UNVERIFIED_DOMAIN
+            if verified_at is None
+            else request.headers.get(SALEOR_DOMAIN_HEADER, ""),
+            status,
+            finished_at - started_at,
+        )
+        if verified_at is not None:
+            metrics.observe_webhook_stage(
+                event_type, "handler", finished_at - verified_at
+            )
+
 
 class WebhookRouter(APIRouter):
-    def __init__(self, *args, **kwargs):
+    def __init__(
+        self,
+        *args,
+        get_work_queue: Optional[Callable[[], WebhookWorkQueue]] = None,
+        **kwargs,
+    ):
         super().__init__(*args, **kwargs)
+        # Called when a route with ack="immediate" is registered
+        self.get_work_queue = get_work_queue
         self.http_routes = {}
+        self.http_handlers = {}
+        self.http_payload_models = {}
         self.http_routes_subscriptions = {}
         self.sqs_routes = {}
         self.post("", name="handle-webhook")(self.__handle_webhook_stub)
 
     async def __handle_webhook_stub(
         request: Request,
-        payload: List[Webhook],  # FIXME provide a way to proper define payload types
+        payload: List[Webhook],
         saleor_domain=Depends(saleor_domain_header),
         _verify_saleor_domain=Depends(verify_saleor_domain),
         _verify_webhook_signature=Depends(verify_webhook_signature),
@@ -60,23 +192,90 @@ class WebhookRouter(APIRouter):
         return {}
 
     def http_event_route(
-        self, event_type: SaleorEventType, subscription_query: Optional[str] = None
+        self,
+        event_type: SaleorEventType,
+        subscription_query: Optional[str] = None,
+        payload_model: Optional[Type[BaseModel]] = None,
+        ack: Literal["after_handler", "immediate"] = "after_handler",
     ):
+        """
+        Registers `func` as the handler of `event_type` webhooks.
+
+        With a `payload_model` the handler can take the payload validated
+        lazily against that model through the `typed_webhook_payload`
+        dependency.
+
+        With `ack="immediate"` Saleor gets its response as soon as the
+        webhook is verified and parsed, `func(payload, saleor_domain)` is run
+        later by the app's `webhook_work_queue`, in a thread if it's not a
+        coroutine function. A full queue responds with 503 so that Saleor
+        retries the delivery.
+        """
+
         def decorator(func: WebHookHandlerSignature):
-            self.http_routes[event_type] = APIRoute(
+            if ack == "immediate":
+                if self.get_work_queue is not None:
+                    self.get_work_queue()
+                endpoint = self.make_acknowledge_endpoint(func, payload_model)
+            else:
+                endpoint = traced_handler(func)
+            route = APIRoute(
                 "",
-                func,
+                endpoint,
                 dependencies=[
                     Depends(verify_saleor_domain),
                     Depends(verify_webhook_signature),
+                    Depends(deduplicate_webhook),
                 ],
             )
+            self.http_routes[event_type] = route
+            # Building the handler resolves the whole dependency tree, do it
+            # once here rather than on every webhook
+            self.http_handlers[event_type] = route.get_route_handler()
 
             if subscription_query:
                 self.http_routes_subscriptions[event_type] = subscription_query
+            if payload_model:
+                self.http_payload_models[event_type] = payload_model
 
         return decorator
 
+    @staticmethod
+    def make_acknowledge_endpoint(
+        func: WebHookHandlerSignature, payload_model: Optional[Type[BaseModel]]
+    ):
+        payload_dependency = (
+            typed_webhook_payload if payload_model else parsed_webhook_payload
+        )
+        # Like FastAPI's endpoints, sync handlers run in a thread rather than
+        # blocking the event loop
+        run_in_thread = not asyncio.iscoroutinefunction(func)
+
+        async def acknowledge_webhook(
+            request: Request,
+            saleor_domain=Depends(saleor_domain_header),
+            payload=Depends(payload_dependency),
+        ):
+            tracer = request.app.tracer
+            # Queued handlers run outside of the request's context
+            handler = (
+                func if isinstance(tracer, NoopTracer) else traced_handler(func, tracer)
+            )
+            if run_in_thread:
+                handler = functools.partial(run_in_threadpool, handler)
+            try:
+                with tracer.start_span("saleor_app.enqueue"):
+                    request.app.get_webhook_work_queue().put_nowait(
+                        handler, payload, saleor_domain
+                    )
+            except asyncio.QueueFull:
+                raise HTTPException(
+                    status_code=503, detail="Too many webhooks queued, retry later."
+                )
+            return {}
+
+        return acknowledge_webhook
+
     def sqs_event_route(self, target_url: SQSUrl, event_type: SaleorEventType):
         def decorator(func):
             self.sqs_routes[event_type] = SQSHandler(
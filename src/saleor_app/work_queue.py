@@ -0,0 +1,69 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookWorkQueue:
+    """
+    A bounded in-process queue of webhook handler calls, run by `workers`
+    tasks once the webhook was acknowledged.
+
+    The queue is started on first use and drained on app shutdown, calls
+    still queued after `drain_timeout` seconds are dropped. Not shared
+    between processes, queued webhooks are lost if the process is killed.
+    """
+
+    def __init__(
+        self, maxsize: int = 1000, workers: int = 4, drain_timeout: float = 30
+    ):
+        self.maxsize = maxsize
+        self.workers = workers
+        self.drain_timeout = drain_timeout
+        self.queue: Optional[asyncio.Queue] = None
+        self.tasks: List[asyncio.Task] = []
+        self.draining = False
+
+    def start(self):
+        if self.queue is not None:
+            return
+        self.draining = False
+        self.queue = asyncio.Queue(maxsize=self.maxsize)
+        self.tasks = [asyncio.create_task(self.work()) for _ in range(self.workers)]
+
+    def put_nowait(self, handler: Callable[..., Awaitable], *args: Any):
+        """Queues `handler(*args)`, raises `asyncio.QueueFull` if it can't."""
+        if self.draining:
+            raise asyncio.QueueFull()
+        self.start()
+        self.queue.put_nowait((handler, args))
+
+    async def work(self):
+        while True:
+            handler, args = await self.queue.get()
+            try:
+                await handler(*args)
+            except Exception:
+                logger.exception("Webhook handler %r failed", handler)
+            finally:
+                self.queue.task_done()
+
+    async def drain(self):
+        if self.queue is None:
+            return
+        self.draining = True
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Dropping %s queued webhooks on shutdown", self.queue.qsize()
+            )
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.queue = None
+        self.tasks = []
+
+    def __len__(self) -> int:
+        return self.queue.qsize() if self.queue is not None else 0